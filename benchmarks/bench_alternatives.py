@@ -0,0 +1,72 @@
+"""Measure top-3 healthier-alternative lookups over a synthetic catalogue.
+
+Run from the repository root::
+
+    python benchmarks/bench_alternatives.py --products 1000000 --categories 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.agents.nutrition_resolver import score_from_macros  # noqa: E402
+from infyfit.barcodes import check_digit  # noqa: E402
+from infyfit.storage import AlternativesIndex, CatalogueRecord, write_alternatives  # noqa: E402
+from infyfit.storage.alternatives import DIMENSIONS  # noqa: E402
+
+
+def products(count: int, categories: int, seed: int = 7):
+    rng = random.Random(seed)
+    for number in range(count):
+        body = f"{number:012d}"
+        nutrients = {
+            "calories": rng.uniform(40, 650),
+            "protein": rng.uniform(0, 40),
+            "fat": rng.uniform(0, 35),
+            "carbs": rng.uniform(0, 80),
+            "serving_size_g": 100.0,
+        }
+        record = CatalogueRecord(body + str(check_digit(body)), f"P{number}", None, (), nutrients)
+        yield record, f"category-{rng.randrange(categories)}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "alternatives.ifalt")
+        start = time.perf_counter()
+        write_alternatives(path, products(args.products, args.categories), score_from_macros)
+        print(f"build: {time.perf_counter() - start:.1f} s for {args.products} products")
+
+        sample = list(products(args.queries, args.categories, seed=11))
+        with AlternativesIndex(path) as index:
+            timings = []
+            for record, category in sample:
+                nutrients = record.nutrients
+                score = score_from_macros(*(nutrients[name] for name in DIMENSIONS))
+                start = time.perf_counter()
+                index.better(nutrients, category, score)
+                timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"query: mean {statistics.fmean(timings):.3f} ms, "
+            f"p50 {timings[len(timings) // 2]:.3f} ms, "
+            f"p99 {timings[int(len(timings) * 0.99)]:.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
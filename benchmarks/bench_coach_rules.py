@@ -0,0 +1,58 @@
+"""Measure compiled coach rule throughput for single requests and columns.
+
+Run from the repository root::
+
+    python benchmarks/bench_coach_rules.py --requests 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.agents import CoachInsightsAgent  # noqa: E402
+from infyfit.data_models import CoachRequest  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    requests = [
+        CoachRequest(
+            day=date(2024, 5, 2),
+            total_calories=rng.uniform(1200, 3500),
+            steps=rng.randrange(0, 20_000),
+            sleep_quality=rng.choice(["poor", "fair", "good", "excellent"]),
+            streak_days=rng.randrange(0, 60),
+        )
+        for _ in range(args.requests)
+    ]
+    agent = CoachInsightsAgent()
+    rules = agent.rules
+    columns = {field: [getattr(r, field) for r in requests] for field in rules.fields}
+    days = [request.day for request in requests]
+
+    for name, run in (
+        ("mask per request", lambda: [rules.mask(request) for request in requests]),
+        ("column_masks", lambda: rules.column_masks(columns)),
+        ("generate", lambda: [agent.generate(request) for request in requests]),
+        ("generate_many", lambda: agent.generate_many(requests)),
+        ("generate_columns", lambda: agent.generate_columns(columns, days)),
+    ):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:17s}: {args.requests / elapsed / 1e6:5.2f} M requests/s")
+
+
+if __name__ == "__main__":
+    main()
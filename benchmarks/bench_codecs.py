@@ -0,0 +1,76 @@
+"""Compare generated model codecs with generic ``dataclasses.asdict`` + ``json.dumps``.
+
+Run from the repository root::
+
+    python benchmarks/bench_codecs.py --rounds 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.data_models import (  # noqa: E402
+    ConfidenceLevel,
+    MealItemEstimate,
+    MealScanResult,
+    NutrientInfo,
+    ProductScore,
+    WorkoutPlanRequest,
+)
+
+
+def _timed(label: str, rounds: int, func) -> None:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    per_call_us = (time.perf_counter() - start) / rounds * 1e6
+    print(f"{label:44} {per_call_us:7.2f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50_000)
+    args = parser.parse_args()
+
+    meal = MealScanResult(
+        items=[
+            MealItemEstimate("Grilled Chicken", 150.0, 247.5, ConfidenceLevel.HIGH),
+            MealItemEstimate("Mixed Greens", 180.0, 36.0, ConfidenceLevel.HIGH),
+        ],
+        total_calories=283.5,
+        confidence_message="Looks good! Tap to adjust if anything seems off.",
+    )
+    score = ProductScore(
+        "InfyFit Protein Bar",
+        "InfyFit Labs",
+        9,
+        "Rich in protein for muscle recovery",
+        ["InfyFit Crunch Bar", "Greek Yogurt"],
+        NutrientInfo(210.0, 20.0, 8.0, 18.0, 60.0),
+    )
+    request = {"goal": "weight_loss", "recent_intake": 2200, "steps_today": 6000}
+
+    def generic(model) -> bytes:
+        return json.dumps(dataclasses.asdict(model), separators=(",", ":"), default=str).encode()
+
+    def via_dict(model) -> bytes:
+        return json.dumps(model.to_dict(), separators=(",", ":")).encode()
+
+    for name, model in (("MealScanResult", meal), ("ProductScore", score)):
+        _timed(f"{name} asdict + json.dumps", args.rounds, lambda: generic(model))
+        _timed(f"{name} to_dict + json.dumps", args.rounds, lambda: via_dict(model))
+        _timed(f"{name} to_json_bytes", args.rounds, model.to_json_bytes)
+    _timed(
+        "WorkoutPlanRequest.from_dict", args.rounds, lambda: WorkoutPlanRequest.from_dict(request)
+    )
+
+
+if __name__ == "__main__":
+    main()
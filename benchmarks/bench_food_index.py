@@ -0,0 +1,65 @@
+"""Measure ``FoodIndex`` build time and per-query latency on a large synthetic table.
+
+Run from the repository root::
+
+    python benchmarks/bench_food_index.py --foods 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.agents.food_index import FoodIndex  # noqa: E402
+from infyfit.agents.meal_scan import CALORIE_TABLE  # noqa: E402
+
+PREPARATIONS = ["grilled", "fried", "steamed", "baked", "roasted", "raw", "smoked", "braised"]
+BASES = ["chicken", "salmon", "rice", "broccoli", "potato", "tofu", "beef", "pasta", "lentil"]
+QUERIES = [
+    "grilled chicken breast",
+    "Salmon fillet",
+    "steamed broccoli florets",
+    "sweet potatoes",
+    "salmn",
+    "smoked tofu bowl",
+]
+
+
+def _build_table(size: int, seed: int) -> dict[str, float]:
+    rng = random.Random(seed)
+    table = dict(CALORIE_TABLE)
+    while len(table) < size:
+        name = " ".join(
+            [rng.choice(PREPARATIONS), rng.choice(BASES), f"variant{rng.randrange(size)}"]
+        )
+        table[name] = round(rng.uniform(20.0, 600.0), 1)
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--foods", type=int, default=500_000)
+    parser.add_argument("--rounds", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    table = _build_table(args.foods, args.seed)
+    start = time.perf_counter()
+    index = FoodIndex(table)
+    print(f"foods={len(index)} build={time.perf_counter() - start:.2f} s")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            match = index.match(query)
+        per_query_us = (time.perf_counter() - start) / args.rounds * 1e6
+        print(f"{query!r:28} {per_query_us:8.1f} us  -> {match}")
+
+
+if __name__ == "__main__":
+    main()
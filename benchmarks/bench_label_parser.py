@@ -0,0 +1,61 @@
+"""Measure single-pass label parsing on multi-kilobyte OCR dumps.
+
+Run from the repository root::
+
+    python benchmarks/bench_label_parser.py --labels 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.agents.label_parser import parse_label  # noqa: E402
+
+WORDS = ("oats", "sugar", "cocoa", "butter", "whey", "protein", "salt", "honey", "soy", "lecithin")
+
+
+def make_label(rng: random.Random) -> str:
+    ingredients = []
+    for _ in range(rng.randrange(20, 60)):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(1, 4)))
+        if rng.random() < 0.2:
+            name += f" ({', '.join(rng.sample(WORDS, 3))})"
+        ingredients.append(name)
+    noise = "\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(rng.randrange(10, 40))
+    )
+    return (
+        "Sample Product\n"
+        f"Ingredients: {', '.join(ingredients)}.\n"
+        "Contains: milk, soy and wheat\n"
+        "Nutrition Facts\nServing size 1 bar (60g)\nCalories 210\nTotal Fat 9g\n"
+        f"Total Carbohydrate 22g\nProtein 20g\n{noise}\n"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    labels = [make_label(rng) for _ in range(args.labels)]
+    total_kb = sum(map(len, labels)) / 1024
+
+    start = time.perf_counter()
+    for label in labels:
+        parse_label(label)
+    elapsed = time.perf_counter() - start
+    print(f"labels: {args.labels}, average {total_kb / args.labels:.1f} KB")
+    rate = total_kb / 1024 / elapsed
+    print(f"parse_label: {args.labels / elapsed:,.0f} labels/s ({rate:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
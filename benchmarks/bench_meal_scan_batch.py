@@ -0,0 +1,61 @@
+"""Compare ``MealScanFirstPassAgent.estimate_many`` against a loop over ``estimate``.
+
+Run from the repository root::
+
+    python benchmarks/bench_meal_scan_batch.py --hints 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.agents.meal_scan import CALORIE_TABLE, MealScanFirstPassAgent  # noqa: E402
+from infyfit.data_models import MealScanRequest  # noqa: E402
+
+EXTRA_HINTS = ["salad bowl", "dessert", "fried rice", "snack mix", "Grilled Chicken "]
+
+
+def _build_requests(total_hints: int, hints_per_scan: int, seed: int) -> list[MealScanRequest]:
+    rng = random.Random(seed)
+    vocabulary = list(CALORIE_TABLE) + EXTRA_HINTS
+    requests = []
+    remaining = total_hints
+    while remaining > 0:
+        count = min(hints_per_scan, remaining)
+        requests.append(MealScanRequest(hints=[rng.choice(vocabulary) for _ in range(count)]))
+        remaining -= count
+    return requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hints", type=int, default=100_000)
+    parser.add_argument("--per-scan", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    agent = MealScanFirstPassAgent()
+    requests = _build_requests(args.hints, args.per_scan, args.seed)
+
+    start = time.perf_counter()
+    looped = [agent.estimate(request) for request in requests]
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = agent.estimate_many(requests)
+    batch_s = time.perf_counter() - start
+
+    assert [r.to_dict() for r in looped] == [r.to_dict() for r in batched]
+    print(f"scans={len(requests)} hints={args.hints}")
+    print(f"estimate loop : {loop_s * 1000:8.1f} ms")
+    print(f"estimate_many : {batch_s * 1000:8.1f} ms  ({loop_s / batch_s:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
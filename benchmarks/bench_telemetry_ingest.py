@@ -0,0 +1,58 @@
+"""Measure bulk telemetry ingestion throughput (spans per second, one core).
+
+Run from the repository root::
+
+    python benchmarks/bench_telemetry_ingest.py --spans 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.agents import TelemetryAgent  # noqa: E402
+from infyfit.storage import SpanBuffer, SpanSegmentWriter  # noqa: E402
+
+NAMES = [f"infyfit.agent.{name}" for name in ("meal", "product", "resolve", "plan", "coach")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spans", type=int, default=1_000_000)
+    parser.add_argument("--capacity", type=int, default=1 << 18)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    names = [rng.choice(NAMES) for _ in range(args.spans)]
+    durations = array("d", (rng.expovariate(1 / 80.0) for _ in range(args.spans)))
+    successes = array("B", (rng.random() > 0.02 for _ in range(args.spans)))
+    events = [
+        {"event_name": n, "duration_ms": d, "success": bool(s)}
+        for n, d, s in zip(names[:100_000], durations, successes)
+    ]
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        buffer = SpanBuffer(capacity=args.capacity, writer=SpanSegmentWriter(spill_dir))
+        agent = TelemetryAgent(buffer=buffer)
+
+        start = time.perf_counter()
+        result = agent.ingest_columns(names, durations, successes)
+        elapsed = time.perf_counter() - start
+        print(f"ingest_columns: {args.spans / elapsed / 1e6:5.2f} M spans/s ({result.to_dict()})")
+
+        start = time.perf_counter()
+        result = agent.ingest_batch(events)
+        elapsed = time.perf_counter() - start
+        print(f"ingest_batch  : {len(events) / elapsed / 1e6:5.2f} M spans/s ({result.to_dict()})")
+        print(f"segments written: {buffer.segments_written}")
+
+
+if __name__ == "__main__":
+    main()
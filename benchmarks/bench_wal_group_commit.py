@@ -0,0 +1,59 @@
+"""Measure durable offline-sync batch throughput with WAL group commit.
+
+Run from the repository root::
+
+    python benchmarks/bench_wal_group_commit.py --threads 16 --batches 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.agents import OfflineSyncAgent  # noqa: E402
+from infyfit.agents.offline_sync import SyncStore  # noqa: E402
+from infyfit.data_models import OfflineSyncRequest, SyncOperation  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--batches", type=int, default=500, help="requests per thread")
+    parser.add_argument("--ops", type=int, default=8, help="operations per request")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        store = SyncStore.open(log_dir)
+        agent = OfflineSyncAgent(store=store)
+
+        def device(user: int) -> None:
+            for batch in range(args.batches):
+                operations = [
+                    SyncOperation(op_id=f"{user}-{batch}-{i}", entity="meal", key=f"m{i}")
+                    for i in range(args.ops)
+                ]
+                agent.flush(
+                    OfflineSyncRequest(queue_size=0, user_id=f"u{user}", operations=operations)
+                )
+
+        threads = [threading.Thread(target=device, args=(user,)) for user in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        wal = store.wal
+        print(f"durable batches: {wal.appends / elapsed:,.0f}/s over {elapsed:.2f}s")
+        print(f"fsyncs: {wal.commits} for {wal.appends} batches ({wal.appends / wal.commits:.1f}x)")
+        wal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compare table-driven workout planning with the exact per-request path.
+
+Run from the repository root::
+
+    python benchmarks/bench_workout_plans.py --users 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from infyfit.agents import WorkoutPlannerAgent  # noqa: E402
+from infyfit.data_models import WorkoutPlanRequest  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    requests = [
+        WorkoutPlanRequest(
+            goal=rng.choice(["weight_loss", "muscle_gain", "maintenance"]),
+            recent_intake=rng.choice([1800, 2000, 2500, 3000, 3500]),
+            steps_today=rng.randrange(0, 20_000),
+            sleep_quality=rng.choice(["poor", "fair", "good", "excellent"]),
+        )
+        for _ in range(args.users)
+    ]
+    agent = WorkoutPlannerAgent()
+    timings = {}
+    for name, run in (
+        ("exact", lambda: [agent._build_exact(request) for request in requests]),
+        ("build_plan", lambda: [agent.build_plan(request) for request in requests]),
+        ("build_plans", lambda: agent.build_plans(requests)),
+    ):
+        start = time.perf_counter()
+        run()
+        timings[name] = time.perf_counter() - start
+        print(f"{name:12s}: {args.users / timings[name] / 1e3:8.1f} k plans/s")
+    print(f"batch speed-up over exact: {timings['exact'] / timings['build_plans']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,43 @@
 """Tiny FastAPI-compatible façade used for offline testing.
 
-Only the pieces required by the tests are implemented: route
-registration via ``@app.post`` and an ``HTTPException`` type.  The
+Only the pieces required by the reference backend are implemented: route
+registration via ``@app.get``/``@app.post`` (including ``{name}`` path
+parameters), ``@app.on_event`` startup/shutdown hooks run by the ASGI
+lifespan protocol, an ``HTTPException`` type and an ASGI ``__call__`` so
+the same app can be served by uvicorn.  The
 :class:`fastapi.testclient.TestClient` defined in this repository calls
-:func:`FastAPI.handle_request` directly, so no ASGI machinery is needed.
+:func:`FastAPI.handle_request` directly and skips the ASGI layer.
+
+Handlers may be plain functions or coroutines and return either a
+JSON-serialisable value, ``bytes`` that already hold a JSON document, or a
+:class:`JSONResponse` when the status code is not 200.  Under ASGI, plain
+functions run on a bounded thread pool so a slow agent never blocks the
+event loop.
+
+Routes are compiled when they are registered.  Each handler becomes an
+:class:`Endpoint` record holding its calling convention, static paths are
+resolved with a single dict lookup and templated paths walk a tree of path
+segments, so dispatch never inspects handlers per request.
 """
 
 from __future__ import annotations
 
-from typing import Any, Callable, Dict
+import asyncio
+import functools
+import inspect
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+logger = logging.getLogger(__name__)
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
 
 
 class HTTPException(Exception):
@@ -20,32 +49,268 @@ class HTTPException(Exception):
         self.detail = detail
 
 
+class JSONResponse:
+    """Stand-in for :class:`fastapi.responses.JSONResponse`: a body with its status."""
+
+    def __init__(self, content: Any, status_code: int = 200) -> None:
+        self.content = content
+        self.status_code = status_code
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """Dispatch record compiled once per registered handler."""
+
+    handler: Callable[..., Any]
+    is_async: bool
+    payload_param: Optional[str]
+    path_params: Tuple[str, ...]
+
+    @classmethod
+    def compile(cls, handler: Callable[..., Any], path_params: Tuple[str, ...]) -> "Endpoint":
+        parameters = inspect.signature(handler).parameters
+        missing = [name for name in path_params if name not in parameters]
+        if missing:
+            raise TypeError(f"{handler.__name__} does not accept path parameters {missing}")
+        # The first parameter that is not a path parameter receives the payload.
+        payload_param = next((name for name in parameters if name not in path_params), None)
+        return cls(
+            handler=handler,
+            is_async=inspect.iscoroutinefunction(handler),
+            payload_param=payload_param,
+            path_params=path_params,
+        )
+
+    def arguments(self, payload: Any, params: Dict[str, str]) -> Dict[str, Any]:
+        if self.payload_param is None:
+            return params
+        return {**params, self.payload_param: payload}
+
+
+class _RouteNode:
+    """One path segment in the route tree."""
+
+    __slots__ = ("children", "param_name", "param_child", "methods")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _RouteNode] = {}
+        self.param_name: Optional[str] = None
+        self.param_child: Optional[_RouteNode] = None
+        self.methods: Dict[str, Endpoint] = {}
+
+    def match(
+        self, segments: List[str], index: int, params: Dict[str, str]
+    ) -> Optional["_RouteNode"]:
+        if index == len(segments):
+            return self if self.methods else None
+        segment = segments[index]
+        child = self.children.get(segment)
+        if child is not None:
+            found = child.match(segments, index + 1, params)
+            if found is not None:
+                return found
+        if self.param_child is not None and segment:
+            found = self.param_child.match(segments, index + 1, params)
+            if found is not None:
+                params[self.param_name] = segment
+                return found
+        return None
+
+
+def _split_path(path: str) -> List[str]:
+    return path.strip("/").split("/")
+
+
+def _is_param(segment: str) -> bool:
+    return segment.startswith("{") and segment.endswith("}")
+
+
 class FastAPI:
     """Minimal route registry that mimics FastAPI's decorator style."""
 
-    def __init__(self, title: str | None = None, version: str | None = None) -> None:
+    def __init__(
+        self, title: str | None = None, version: str | None = None, max_workers: int = 8
+    ) -> None:
         self.title = title or "FastAPI"
         self.version = version or "0.0"
-        self._routes: Dict[str, Dict[str, Callable[..., Any]]] = {}
+        self.max_workers = max_workers
+        self._static_routes: Dict[str, Dict[str, Endpoint]] = {}
+        self._route_tree = _RouteNode()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._event_handlers: Dict[str, List[Callable[[], Any]]] = {
+            "startup": [],
+            "shutdown": [],
+        }
+
+    def on_event(self, event_type: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+        """Register a ``startup`` or ``shutdown`` hook for the ASGI lifespan."""
+        if event_type not in self._event_handlers:
+            raise ValueError(f"Unknown event type: {event_type}")
+
+        def decorator(func: Callable[[], Any]) -> Callable[[], Any]:
+            self._event_handlers[event_type].append(func)
+            return func
+
+        return decorator
+
+    async def _run_event(self, event_type: str) -> None:
+        for handler in self._event_handlers[event_type]:
+            result = handler()
+            if inspect.isawaitable(result):
+                await result
+
+    def get(self, path: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Register a handler for ``GET`` requests at ``path``."""
+        return self._route("GET", path)
 
     def post(self, path: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
         """Register a handler for ``POST`` requests at ``path``."""
+        return self._route("POST", path)
 
+    def _route(self, method: str, path: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
         def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
-            methods = self._routes.setdefault(path, {})
-            methods["POST"] = func
+            self._add_route(method, path, func)
             return func
 
         return decorator
 
+    def _add_route(self, method: str, path: str, func: Callable[..., Any]) -> None:
+        segments = _split_path(path)
+        params = tuple(segment[1:-1] for segment in segments if _is_param(segment))
+        endpoint = Endpoint.compile(func, params)
+        if not params:
+            self._static_routes.setdefault("/" + "/".join(segments), {})[method] = endpoint
+            return
+        node = self._route_tree
+        for segment in segments:
+            if _is_param(segment):
+                name = segment[1:-1]
+                if node.param_child is None:
+                    node.param_child, node.param_name = _RouteNode(), name
+                elif node.param_name != name:
+                    raise ValueError(f"Conflicting path parameter {{{name}}} in {path}")
+                node = node.param_child
+            else:
+                node = node.children.setdefault(segment, _RouteNode())
+        node.methods[method] = endpoint
+
     def handle_request(self, method: str, path: str, payload: Any = None) -> Any:
+        endpoint, params = self._resolve(method, path)
+        result = endpoint.handler(**endpoint.arguments(payload, params))
+        if inspect.iscoroutine(result):
+            result = asyncio.run(result)
+        return result
+
+    def _resolve(self, method: str, path: str) -> Tuple[Endpoint, Dict[str, str]]:
         method = method.upper()
-        route = self._routes.get(path)
-        if not route or method not in route:
-            raise HTTPException(status_code=404, detail="Not Found")
-        handler = route[method]
-        # Our handlers expect at most a single payload argument.
-        return handler(payload) if handler.__code__.co_argcount else handler()
+        params: Dict[str, str] = {}
+        methods = self._static_routes.get("/" + path.strip("/"))
+        if methods is None:
+            node = self._route_tree.match(_split_path(path), 0, params)
+            if node is None:
+                raise HTTPException(status_code=404, detail="Not Found")
+            methods = node.methods
+        endpoint = methods.get(method)
+        if endpoint is None:
+            raise HTTPException(status_code=405, detail="Method Not Allowed")
+        return endpoint, params
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        try:
+            endpoint, params = self._resolve(scope["method"], scope["path"])
+            payload = self._decode_body(await self._read_body(receive))
+            if payload is None and scope.get("query_string"):
+                payload = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+            kwargs = endpoint.arguments(payload, params)
+            if endpoint.is_async:
+                result = await endpoint.handler(**kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                call = functools.partial(endpoint.handler, **kwargs)
+                result = await loop.run_in_executor(self._get_executor(), call)
+            status = 200
+            if isinstance(result, JSONResponse):
+                status, result = result.status_code, result.content
+        except HTTPException as exc:
+            status, result = exc.status_code, {"detail": exc.detail}
+        except Exception:  # pragma: no cover - defensive logging only
+            logger.exception("Unhandled error for %s %s", scope["method"], scope["path"])
+            status, result = 500, {"detail": "Internal Server Error"}
+        await self._send_json(send, status, result)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="fastapi-shim"
+            )
+        return self._executor
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks: List[bytes] = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _decode_body(body: bytes) -> Any:
+        if not body:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError as exc:  # JSONDecodeError and UnicodeDecodeError
+            raise HTTPException(status_code=400, detail="Request body is not valid JSON") from exc
+
+    @staticmethod
+    async def _send_json(send: Send, status: int, payload: Any) -> None:
+        if isinstance(payload, (bytes, bytearray)):
+            body = bytes(payload)
+        else:
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self._run_event("startup")
+                except Exception as exc:
+                    logger.exception("Startup hook failed")
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                try:
+                    await self._run_event("shutdown")
+                except Exception:
+                    logger.exception("Shutdown hook failed")
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
 
 
-__all__ = ["FastAPI", "HTTPException"]
+__all__ = ["Endpoint", "FastAPI", "HTTPException", "JSONResponse"]
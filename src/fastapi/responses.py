@@ -0,0 +1,5 @@
+"""Response types, importable from the same module path as in FastAPI."""
+
+from . import JSONResponse
+
+__all__ = ["JSONResponse"]
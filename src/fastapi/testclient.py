@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
+import json as jsonlib
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
-from . import FastAPI, HTTPException
+from . import FastAPI, HTTPException, JSONResponse
 
 
 @dataclass
@@ -23,10 +24,21 @@ class TestClient:
     def __init__(self, app: FastAPI) -> None:
         self._app = app
 
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> _Response:
+        return self._request("GET", path, dict(params) if params else None)
+
     def post(self, path: str, json: Optional[Dict[str, Any]] = None) -> _Response:
+        return self._request("POST", path, json or {})
+
+    def _request(self, method: str, path: str, payload: Any) -> _Response:
         try:
-            payload = self._app.handle_request("POST", path, json or {})
-            return _Response(status_code=200, _payload=payload)
+            result = self._app.handle_request(method, path, payload)
+            status_code = 200
+            if isinstance(result, JSONResponse):
+                status_code, result = result.status_code, result.content
+            if isinstance(result, (bytes, bytearray)):
+                result = jsonlib.loads(result)
+            return _Response(status_code=status_code, _payload=result)
         except HTTPException as exc:  # pragma: no cover - exercised in tests
             body: Dict[str, Any] = {"detail": exc.detail}
             return _Response(status_code=exc.status_code, _payload=body)
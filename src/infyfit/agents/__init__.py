@@ -6,6 +6,7 @@ from .nutrition_resolver import NutritionResolverAgent
 from .offline_sync import OfflineSyncAgent
 from .privacy import PrivacyOpsAgent
 from .product_scanner import ProductScannerAgent
+from .reporting import ReportingAgent
 from .telemetry import TelemetryAgent
 from .workout_planner import WorkoutPlannerAgent
 
@@ -16,6 +17,7 @@ __all__ = [
     "OfflineSyncAgent",
     "PrivacyOpsAgent",
     "ProductScannerAgent",
+    "ReportingAgent",
     "TelemetryAgent",
     "WorkoutPlannerAgent",
     "default_daily_card",
@@ -2,63 +2,71 @@
 
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import date
+from typing import Any, Iterable, List, Mapping, Sequence
 
 from ..data_models import CoachCard, CoachRequest
+from ..storage.timeseries import HealthTimeSeries
+from .coach_rules import CompiledRules
 
 
 class CoachInsightsAgent:
-    """Generate one actionable card per day."""
+    """Generate one actionable card per day.
+
+    Cards come from a declarative rule table (see :mod:`.coach_rules`)
+    compiled into a bitmask evaluator, so each predicate runs once per
+    request and the card text is assembled once per distinct outcome.
+    With a :class:`HealthTimeSeries`, a known user's unset steps and sleep
+    quality come from the health history synced for the card's day.
+    """
+
+    def __init__(
+        self, rules: CompiledRules | None = None, health: HealthTimeSeries | None = None
+    ) -> None:
+        self.rules = rules if rules is not None else CompiledRules()
+        self.health = health
 
     def generate(self, request: CoachRequest) -> CoachCard:
-        body = self._select_body(request)
-        category = self._determine_category(request)
-        return CoachCard(
-            title=self._title_for_category(category),
-            body=body,
-            category=category,
-            generated_for=request.day,
-        )
-
-    @staticmethod
-    def _determine_category(request: CoachRequest) -> str:
-        if request.total_calories > 2400:
-            return "nutrition"
-        if request.steps < 5000:
-            return "activity"
-        if request.sleep_quality.lower() in {"poor", "fair"}:
-            return "recovery"
-        if request.streak_days and request.streak_days % 7 == 0:
-            return "celebration"
-        return "maintenance"
-
-    @staticmethod
-    def _title_for_category(category: str) -> str:
-        return {
-            "nutrition": "Fuel Check",
-            "activity": "Move Boost",
-            "recovery": "Rest Reset",
-            "celebration": "Streak High-Five",
-        }.get(category, "Daily Focus")
-
-    @staticmethod
-    def _select_body(request: CoachRequest) -> str:
-        suggestions = []
-        if request.total_calories > 2400:
-            suggestions.append("Swap one dinner carb for greens to stay on target.")
-        if request.steps < 5000:
-            suggestions.append("Add a 10-minute walk after lunch to boost steps.")
-        if request.sleep_quality.lower() in {"poor", "fair"}:
-            suggestions.append("Try winding down 30 minutes earlier tonight.")
-        if request.streak_days and request.streak_days % 7 == 0:
-            suggestions.append("Seven-day streak! Lock it in with a quick reflection.")
-        if not suggestions:
-            suggestions.append("Keep the momentum—log meals within 15 minutes for accuracy.")
-        return " ".join(suggestions)
+        if self.health is not None:
+            request = self._with_health(request)
+        title, body, category = self.rules.card(self.rules.mask(request))
+        return CoachCard(title=title, body=body, category=category, generated_for=request.day)
+
+    def generate_many(self, requests: Sequence[CoachRequest]) -> List[CoachCard]:
+        """Classify a chunk of requests; see :meth:`generate_columns` for columnar input."""
+        if self.health is not None:
+            requests = [self._with_health(request) for request in requests]
+        days = [request.day for request in requests]
+        return self._cards(days, map(self.rules.mask, requests))
+
+    def generate_columns(
+        self, columns: Mapping[str, Sequence[Any]], days: Sequence[date]
+    ) -> List[CoachCard]:
+        """Classify parallel per-field columns (one entry per user) for ``days``."""
+        return self._cards(days, self.rules.column_masks(columns))
+
+    def _with_health(self, request: CoachRequest) -> CoachRequest:
+        if not request.user_id or (request.steps and request.sleep_quality != "unknown"):
+            return request
+        steps, sleep = self.health.recent(request.user_id, request.day)
+        if request.sleep_quality != "unknown" or sleep is None:
+            sleep = request.sleep_quality
+        return replace(request, steps=request.steps or steps or 0, sleep_quality=sleep)
+
+    def _cards(self, days: Iterable[date], masks: Iterable[int]) -> List[CoachCard]:
+        card = self.rules.card
+        cards = []
+        for day, mask in zip(days, masks):
+            title, body, category = card(mask)
+            cards.append(CoachCard(title=title, body=body, category=category, generated_for=day))
+        return cards
+
+
+_DEFAULT_AGENT = CoachInsightsAgent()
 
 
 def default_daily_card(day: date) -> CoachCard:
-    agent = CoachInsightsAgent()
-    return agent.generate(
+    return _DEFAULT_AGENT.generate(
         CoachRequest(day=day, total_calories=2000, steps=8000, sleep_quality="good", streak_days=0)
     )
@@ -0,0 +1,158 @@
+"""Declarative coach rules compiled into bitmask evaluators.
+
+Each :class:`CoachRule` names a request field, a comparison and the card
+text it contributes.  :func:`compile_rules` generates (with :func:`exec`,
+like :mod:`infyfit.codecs`) two functions that evaluate every predicate
+exactly once and pack the outcomes into an integer, one bit per rule:
+
+* ``mask(request)`` for a single :class:`~infyfit.data_models.CoachRequest`;
+* ``column_masks(columns)`` for parallel per-field sequences.
+
+Cards depend only on the mask, so they are assembled once per distinct
+mask and cached.  The first matching rule (in table order) picks the
+category and title; every matching rule contributes its suggestion.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+CardParts = Tuple[str, str, str]  # (title, body, category)
+
+OPERATORS = (">", ">=", "<", "<=", "==", "in", "multiple_of")
+
+
+@dataclass(frozen=True)
+class CoachRule:
+    name: str
+    field: str
+    op: str
+    value: Any
+    category: str
+    title: str
+    suggestion: str
+
+
+DEFAULT_RULES: Tuple[CoachRule, ...] = (
+    CoachRule(
+        name="high_calories",
+        field="total_calories",
+        op=">",
+        value=2400,
+        category="nutrition",
+        title="Fuel Check",
+        suggestion="Swap one dinner carb for greens to stay on target.",
+    ),
+    CoachRule(
+        name="low_steps",
+        field="steps",
+        op="<",
+        value=5000,
+        category="activity",
+        title="Move Boost",
+        suggestion="Add a 10-minute walk after lunch to boost steps.",
+    ),
+    CoachRule(
+        name="low_sleep",
+        field="sleep_quality",
+        op="in",
+        value=frozenset({"poor", "fair"}),
+        category="recovery",
+        title="Rest Reset",
+        suggestion="Try winding down 30 minutes earlier tonight.",
+    ),
+    CoachRule(
+        name="weekly_streak",
+        field="streak_days",
+        op="multiple_of",
+        value=7,
+        category="celebration",
+        title="Streak High-Five",
+        suggestion="Seven-day streak! Lock it in with a quick reflection.",
+    ),
+)
+
+DEFAULT_CARD: CardParts = (
+    "Daily Focus",
+    "Keep the momentum—log meals within 15 minutes for accuracy.",
+    "maintenance",
+)
+
+
+class CompiledRules:
+    """A rule table compiled into mask functions plus a per-mask card cache."""
+
+    def __init__(
+        self, rules: Sequence[CoachRule] = DEFAULT_RULES, default: CardParts = DEFAULT_CARD
+    ) -> None:
+        self.rules = tuple(rules)
+        self.default = default
+        self.fields = tuple(dict.fromkeys(rule.field for rule in self.rules))
+        self.mask, self.column_masks = compile_rules(self.rules)
+        self._cards: Dict[int, CardParts] = {}
+        self._lock = threading.Lock()
+
+    def card(self, mask: int) -> CardParts:
+        parts = self._cards.get(mask)
+        if parts is None:
+            parts = self._assemble(mask)
+            with self._lock:
+                self._cards[mask] = parts
+        return parts
+
+    def _assemble(self, mask: int) -> CardParts:
+        matched = [rule for bit, rule in enumerate(self.rules) if mask >> bit & 1]
+        if not matched:
+            return self.default
+        body = " ".join(rule.suggestion for rule in matched)
+        return matched[0].title, body, matched[0].category
+
+
+def _predicate(rule: CoachRule, var: str, ref: Callable[[Any], str]) -> str:
+    if not rule.field.isidentifier():
+        raise ValueError(f"Rule {rule.name!r} names an invalid field {rule.field!r}")
+    if rule.op not in OPERATORS:
+        raise ValueError(f"Rule {rule.name!r} uses unknown operator {rule.op!r}")
+    if rule.op == "in":
+        return f"({var}.lower() in {ref(frozenset(str(item).lower() for item in rule.value))})"
+    if rule.op == "multiple_of":
+        return f"(bool({var}) and {var} % {ref(rule.value)} == 0)"
+    return f"({var} {rule.op} {ref(rule.value)})"
+
+
+def compile_rules(
+    rules: Sequence[CoachRule],
+) -> Tuple[Callable[[Any], int], Callable[[Mapping[str, Sequence[Any]]], List[int]]]:
+    """Generate ``(mask, column_masks)`` for ``rules``; fields are read once each."""
+    namespace: Dict[str, Any] = {}
+
+    def ref(value: Any) -> str:
+        name = f"_ref{len(namespace)}"
+        namespace[name] = value
+        return name
+
+    fields = list(dict.fromkeys(rule.field for rule in rules))
+    var = {field: f"v{index}" for index, field in enumerate(fields)}
+    terms = [
+        f"({_predicate(rule, var[rule.field], ref)} << {bit})" for bit, rule in enumerate(rules)
+    ]
+    expression = " | ".join(terms) or "0"
+
+    loads = "".join(f"    {var[field]} = request.{field}\n" for field in fields)
+    row_source = f"def mask(request):\n{loads}    return {expression}\n"
+    if fields:
+        targets = ", ".join(var[field] for field in fields) + ","
+        columns = ", ".join(f"columns[{field!r}]" for field in fields)
+        column_source = (
+            "def column_masks(columns):\n"
+            f"    return [{expression} for {targets} in zip({columns})]\n"
+        )
+    else:
+        column_source = "def column_masks(columns):\n    return []\n"
+    exec(compile(row_source + column_source, "<coach rules>", "exec"), namespace)
+    return namespace["mask"], namespace["column_masks"]
+
+
+__all__ = ["CoachRule", "CompiledRules", "DEFAULT_CARD", "DEFAULT_RULES", "compile_rules"]
@@ -0,0 +1,173 @@
+"""Prebuilt fuzzy matcher that maps free-text meal hints onto a food table."""
+
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class FoodMatch:
+    name: str
+    calories_per_100g: float
+    score: float
+
+
+def _stem(token: str) -> str:
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Split ``text`` into lowercase, lightly singularised tokens."""
+    return tuple(_stem(token) for token in _TOKEN_RE.findall(text.lower()))
+
+
+def _trigrams(token: str) -> set[str]:
+    padded = f" {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class FoodIndex:
+    """Token inverted index with prefix and trigram fallbacks.
+
+    Every food name is tokenised once at build time.  Postings lists are
+    sorted by the total weight of the food they point to, so the shortest
+    (best scoring) names for a common token come first and a query only ever
+    touches ``max_postings`` entries per token.  Query tokens missing from
+    the vocabulary are resolved through a sorted vocabulary (prefixes such as
+    ``"broc"``) or a trigram index over the vocabulary (typos such as
+    ``"salmn"``).  Scores are a weighted Jaccard similarity in ``[0, 1]``.
+    """
+
+    def __init__(
+        self,
+        table: Mapping[str, float],
+        *,
+        min_score: float = 0.4,
+        max_postings: int = 1024,
+    ) -> None:
+        self.min_score = min_score
+        self.max_postings = max_postings
+        self._names: List[str] = list(table)
+        self._calories = array("d", (float(table[name]) for name in self._names))
+        self._food_tokens: List[Tuple[str, ...]] = [tokenize(name) for name in self._names]
+
+        postings: Dict[str, List[int]] = {}
+        for food_id, tokens in enumerate(self._food_tokens):
+            for token in set(tokens):
+                postings.setdefault(token, []).append(food_id)
+
+        count = len(self._names)
+        self._idf: Dict[str, float] = {
+            token: math.log(1.0 + count / len(ids)) for token, ids in postings.items()
+        }
+        self._food_weight = array(
+            "d", (sum(self._idf[token] for token in set(tokens)) for tokens in self._food_tokens)
+        )
+        weights = self._food_weight
+        self._postings: Dict[str, array] = {
+            token: array("l", sorted(ids, key=lambda food_id: (weights[food_id], food_id)))
+            for token, ids in postings.items()
+        }
+
+        self._vocabulary: List[str] = sorted(postings)
+        trigram_index: Dict[str, List[int]] = {}
+        for vocab_id, token in enumerate(self._vocabulary):
+            for gram in _trigrams(token):
+                trigram_index.setdefault(gram, []).append(vocab_id)
+        self._trigram_index = {gram: array("l", ids) for gram, ids in trigram_index.items()}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def match(self, query: str) -> Optional[FoodMatch]:
+        """Return the best matching food for ``query`` or ``None`` below ``min_score``."""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+
+        resolved: List[Tuple[str, float]] = []
+        query_weight = 0.0
+        unknown = 0
+        for token in dict.fromkeys(tokens):
+            found = self._resolve_token(token)
+            if found is None:
+                unknown += 1
+                continue
+            vocab_token, similarity = found
+            weight = self._idf[vocab_token] * similarity
+            query_weight += weight
+            resolved.append((vocab_token, weight))
+        if not resolved:
+            return None
+        # Tokens outside the vocabulary count as an average token of the query.
+        query_weight += unknown * query_weight / len(resolved)
+
+        resolved.sort(key=lambda item: len(self._postings[item[0]]))
+        scores: Dict[int, float] = {}
+        for token, weight in resolved:
+            postings = self._postings[token]
+            if len(postings) <= self.max_postings or not scores:
+                for food_id in postings[: self.max_postings]:
+                    scores[food_id] = scores.get(food_id, 0.0) + weight
+            else:
+                food_tokens = self._food_tokens
+                for food_id in scores:
+                    if token in food_tokens[food_id]:
+                        scores[food_id] += weight
+
+        best_id = -1
+        best_score = 0.0
+        weights = self._food_weight
+        for food_id, matched in scores.items():
+            score = matched / (query_weight + weights[food_id] - matched)
+            if score > best_score or (
+                score == best_score and (weights[food_id], food_id) < (weights[best_id], best_id)
+            ):
+                best_id, best_score = food_id, score
+        if best_score < self.min_score:
+            return None
+        return FoodMatch(
+            name=self._names[best_id],
+            calories_per_100g=self._calories[best_id],
+            score=round(min(best_score, 1.0), 4),
+        )
+
+    def _resolve_token(self, token: str) -> Optional[Tuple[str, float]]:
+        if token in self._postings:
+            return token, 1.0
+        if len(token) < 3:
+            return None
+
+        best: Optional[Tuple[str, float]] = None
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, token)
+        for candidate in vocabulary[position : position + 8]:
+            if not candidate.startswith(token):
+                break
+            similarity = len(token) / len(candidate)
+            if best is None or similarity > best[1]:
+                best = (candidate, similarity)
+
+        grams = _trigrams(token)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            ids = self._trigram_index.get(gram)
+            if ids is None or len(ids) > self.max_postings:
+                continue
+            for vocab_id in ids:
+                shared[vocab_id] = shared.get(vocab_id, 0) + 1
+        for vocab_id, overlap in shared.items():
+            candidate = vocabulary[vocab_id]
+            similarity = 2.0 * overlap / (len(grams) + len(candidate))
+            if similarity >= 0.5 and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
@@ -0,0 +1,246 @@
+"""Digest-driven delta sync for daily health aggregates.
+
+Records are bucketed per calendar month.  Each day has a 64-bit leaf hash
+over its canonical binary encoding and each month a digest over its sorted
+leaves, so a reconnecting device can:
+
+1. send only its month digests; the server answers with the months that
+   differ and, for those, its own per-day leaf hashes;
+2. upload just the days whose leaf hash differs, as a compact delta.
+
+Delta layout (all integers are unsigned LEB128 varints)::
+
+    count
+    per record, sorted by date:
+        day gap   days since 1970-01-01 for the first record, else since the previous one
+        steps
+        sleep     one byte from SLEEP_QUALITIES, or 0xFF + length + UTF-8 text
+        activity  minutes
+
+Leaf layout, per stale month in request order: ``count`` then
+``count * (day-of-month byte, 8-byte leaf hash)``.  Both are carried in
+JSON as base64 text.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from ..data_models import HealthAggregate
+
+SLEEP_QUALITIES: Tuple[str, ...] = ("unknown", "poor", "fair", "good", "excellent")
+_SLEEP_CODES = {quality: code for code, quality in enumerate(SLEEP_QUALITIES)}
+_LITERAL_SLEEP = 0xFF
+_EPOCH = date(1970, 1, 1).toordinal()
+_MAX_ORDINAL = date.max.toordinal()
+LEAF_BYTES = 8
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise ValueError(f"Cannot varint-encode negative value {value}")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated health delta")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+        if shift > 63:
+            raise ValueError("Health delta varint exceeds 64 bits")
+
+
+def _encode_fields(out: bytearray, aggregate: HealthAggregate) -> None:
+    _write_varint(out, aggregate.steps)
+    code = _SLEEP_CODES.get(aggregate.sleep_quality.lower())
+    if code is None:
+        text = aggregate.sleep_quality.encode("utf-8")
+        out.append(_LITERAL_SLEEP)
+        _write_varint(out, len(text))
+        out += text
+    else:
+        out.append(code)
+    _write_varint(out, aggregate.activity_minutes)
+
+
+def leaf_hash(aggregate: HealthAggregate) -> bytes:
+    """Hash of one day's canonical encoding (the date is part of the hash)."""
+    out = bytearray()
+    _write_varint(out, aggregate.date.toordinal() - _EPOCH)
+    _encode_fields(out, aggregate)
+    return hashlib.blake2b(out, digest_size=LEAF_BYTES).digest()
+
+
+def month_key(day: date) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def month_digests(aggregates: Iterable[HealthAggregate]) -> Dict[str, str]:
+    """Compute the per-month digests a device sends in the first round trip."""
+    months: Dict[str, Dict[int, bytes]] = {}
+    for aggregate in aggregates:
+        months.setdefault(month_key(aggregate.date), {})[aggregate.date.day] = leaf_hash(aggregate)
+    return {month: _digest(leaves) for month, leaves in months.items()}
+
+
+def _digest(leaves: Mapping[int, bytes]) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    for day in sorted(leaves):
+        hasher.update(bytes((day,)))
+        hasher.update(leaves[day])
+    return hasher.hexdigest()
+
+
+def encode_delta(aggregates: Iterable[HealthAggregate]) -> str:
+    out = bytearray()
+    records = sorted(aggregates, key=lambda aggregate: aggregate.date)
+    _write_varint(out, len(records))
+    previous = _EPOCH
+    for aggregate in records:
+        ordinal = aggregate.date.toordinal()
+        _write_varint(out, ordinal - previous)
+        previous = ordinal
+        _encode_fields(out, aggregate)
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode_delta(text: str) -> List[HealthAggregate]:
+    data = base64.b64decode(text, validate=True)
+    count, offset = _read_varint(data, 0)
+    records: List[HealthAggregate] = []
+    ordinal = _EPOCH
+    for _ in range(count):
+        gap, offset = _read_varint(data, offset)
+        ordinal += gap
+        if ordinal > _MAX_ORDINAL:  # date.fromordinal would raise OverflowError
+            raise ValueError("Health delta date out of range")
+        steps, offset = _read_varint(data, offset)
+        if offset >= len(data):
+            raise ValueError("Truncated health delta")
+        code = data[offset]
+        offset += 1
+        if code == _LITERAL_SLEEP:
+            length, offset = _read_varint(data, offset)
+            if offset + length > len(data):
+                raise ValueError("Truncated health delta")
+            sleep_quality = data[offset : offset + length].decode("utf-8")
+            offset += length
+        elif code < len(SLEEP_QUALITIES):
+            sleep_quality = SLEEP_QUALITIES[code]
+        else:
+            raise ValueError(f"Unknown sleep quality code {code}")
+        activity, offset = _read_varint(data, offset)
+        records.append(
+            HealthAggregate(
+                date=date.fromordinal(ordinal),
+                steps=steps,
+                sleep_quality=sleep_quality,
+                activity_minutes=activity,
+            )
+        )
+    return records
+
+
+def encode_leaves(months: Iterable[Mapping[int, bytes]]) -> str:
+    out = bytearray()
+    for leaves in months:
+        _write_varint(out, len(leaves))
+        for day in sorted(leaves):
+            out.append(day)
+            out += leaves[day]
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode_leaves(text: str, months: Iterable[str]) -> Dict[str, Dict[int, bytes]]:
+    data = base64.b64decode(text, validate=True)
+    offset = 0
+    decoded: Dict[str, Dict[int, bytes]] = {}
+    for month in months:
+        count, offset = _read_varint(data, offset)
+        leaves = decoded[month] = {}
+        for _ in range(count):
+            day = data[offset]
+            leaves[day] = bytes(data[offset + 1 : offset + 1 + LEAF_BYTES])
+            offset += 1 + LEAF_BYTES
+    return decoded
+
+
+def changed_records(
+    aggregates: Iterable[HealthAggregate], server_leaves: Mapping[str, Mapping[int, bytes]]
+) -> List[HealthAggregate]:
+    """Client-side helper: the records in stale months whose leaf hash differs."""
+    return [
+        aggregate
+        for aggregate in aggregates
+        if month_key(aggregate.date) in server_leaves
+        and server_leaves[month_key(aggregate.date)].get(aggregate.date.day)
+        != leaf_hash(aggregate)
+    ]
+
+
+class HealthLog:
+    """Server-side per-user daily aggregates with cached month leaves and digests."""
+
+    def __init__(self) -> None:
+        self._records: Dict[str, Dict[date, HealthAggregate]] = {}
+        self._leaves: Dict[str, Dict[str, Dict[int, bytes]]] = {}
+        self._digests: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, user_id: str, aggregates: Iterable[HealthAggregate]) -> Dict[str, str]:
+        """Store ``aggregates`` and return the refreshed digests of the touched months.
+
+        Every leaf is hashed before anything is stored, so an aggregate that
+        cannot be encoded rejects the whole upload.
+        """
+        hashed = [(aggregate, leaf_hash(aggregate)) for aggregate in aggregates]
+        with self._lock:
+            records = self._records.setdefault(user_id, {})
+            leaves = self._leaves.setdefault(user_id, {})
+            touched = set()
+            for aggregate, leaf in hashed:
+                records[aggregate.date] = aggregate
+                month = month_key(aggregate.date)
+                leaves.setdefault(month, {})[aggregate.date.day] = leaf
+                touched.add(month)
+            digests = self._digests.setdefault(user_id, {})
+            for month in touched:
+                digests[month] = _digest(leaves[month])
+            return {month: digests[month] for month in sorted(touched)}
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        with self._lock:
+            purged = 0
+            for user_id in user_ids:
+                purged += len(self._records.pop(user_id, ()))
+                self._leaves.pop(user_id, None)
+                self._digests.pop(user_id, None)
+            return purged
+
+    def records(self, user_id: str) -> List[HealthAggregate]:
+        with self._lock:
+            return sorted(self._records.get(user_id, {}).values(), key=lambda item: item.date)
+
+    def stale_months(self, user_id: str, digests: Mapping[str, str]) -> List[str]:
+        with self._lock:
+            known = self._digests.get(user_id, {})
+            return sorted(month for month, digest in digests.items() if known.get(month) != digest)
+
+    def leaves(self, user_id: str, months: Iterable[str]) -> List[Dict[int, bytes]]:
+        with self._lock:
+            leaves = self._leaves.get(user_id, {})
+            return [dict(leaves.get(month, {})) for month in months]
@@ -0,0 +1,244 @@
+"""Ingredient canonicalisation and allergen / diet-conflict detection.
+
+Every synonym in the term table is compiled into one Aho-Corasick automaton,
+so scanning label text or an ingredient list costs O(text length + matches)
+no matter how many terms there are.  Matches must sit on word boundaries
+and overlapping matches resolve leftmost-longest, so ``cocoa butter`` is not
+reported as ``butter`` and ``coconut milk`` is not reported as ``milk``.
+"""
+
+from __future__ import annotations
+
+import functools
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class IngredientTerm:
+    canonical: str
+    synonyms: Tuple[str, ...]
+    tags: FrozenSet[str] = frozenset()
+
+
+def _term(canonical: str, tags: str, *synonyms: str) -> IngredientTerm:
+    return IngredientTerm(canonical, (canonical, *synonyms), frozenset(tags.split()))
+
+
+ALLERGEN_TAGS = frozenset(
+    {"milk", "egg", "peanut", "tree_nut", "soy", "gluten", "fish", "shellfish", "sesame"}
+)
+
+DEFAULT_TERMS: Tuple[IngredientTerm, ...] = (
+    # Dairy.
+    _term("milk", "milk", "whole milk", "skim milk", "milk powder", "milk solids", "milkfat"),
+    _term("milk chocolate", "milk"),
+    _term("whey protein", "milk", "whey protein isolate", "whey protein concentrate"),
+    _term("whey", "milk", "whey powder"),
+    _term("casein", "milk", "caseinate", "sodium caseinate", "calcium caseinate"),
+    _term("butter", "milk", "buttermilk", "ghee"),
+    _term("cream", "milk", "sour cream"),
+    _term("cheese", "milk", "cheddar", "mozzarella", "parmesan"),
+    _term("yogurt", "milk", "yoghurt"),
+    _term("lactose", "milk"),
+    # Look-alikes that are not dairy.
+    _term("cocoa butter", ""),
+    _term("shea butter", ""),
+    _term("coconut milk", "", "coconut cream"),
+    _term("oat milk", ""),
+    _term("rice milk", ""),
+    _term("almond milk", "tree_nut"),
+    _term("soy milk", "soy", "soya milk"),
+    _term("peanut butter", "peanut"),
+    _term("sugar alcohol", "", "sugar alcohols"),
+    # Eggs.
+    _term("egg", "egg", "eggs", "egg white", "egg yolk", "albumen", "mayonnaise"),
+    # Nuts.
+    _term("peanut", "peanut", "peanuts", "groundnut", "groundnuts", "peanut oil"),
+    _term("almond", "tree_nut", "almonds"),
+    _term("cashew", "tree_nut", "cashews"),
+    _term("walnut", "tree_nut", "walnuts"),
+    _term("pecan", "tree_nut", "pecans"),
+    _term("hazelnut", "tree_nut", "hazelnuts"),
+    _term("pistachio", "tree_nut", "pistachios"),
+    _term("macadamia", "tree_nut", "macadamias"),
+    _term("tree nuts", "tree_nut", "tree nut"),
+    # Soy.
+    _term("soy", "soy", "soya", "soybean", "soybeans", "soy protein"),
+    _term("soy lecithin", "soy", "soya lecithin"),
+    _term("tofu", "soy"),
+    _term("edamame", "soy"),
+    # Gluten.
+    _term("wheat", "gluten", "whole wheat", "wheat flour", "durum", "spelt", "semolina"),
+    _term("barley", "gluten", "barley malt", "malt", "malt extract"),
+    _term("rye", "gluten"),
+    _term("couscous", "gluten"),
+    _term("gluten", "gluten", "wheat gluten"),
+    _term("seitan", "gluten"),
+    # Seafood.
+    _term("fish", "fish", "fish sauce", "fish oil", "anchovy", "anchovies", "cod", "salmon"),
+    _term("tuna", "fish"),
+    _term("shellfish", "shellfish", "shrimp", "prawn", "prawns", "crab", "lobster", "mussels"),
+    # Seeds.
+    _term("sesame", "sesame", "sesame seeds", "sesame oil", "tahini"),
+    # Animal products.
+    _term("beef", "meat", "beef stock", "beef fat"),
+    _term("chicken", "meat", "chicken stock", "chicken broth"),
+    _term("turkey", "meat"),
+    _term("lamb", "meat"),
+    _term("pork", "meat pork", "bacon", "ham", "lard", "pork fat"),
+    _term("gelatin", "gelatin", "gelatine"),
+    _term("honey", "honey"),
+    _term("carmine", "animal", "cochineal"),
+    # Alcohol.
+    _term("alcohol", "alcohol", "ethanol", "wine", "beer", "rum"),
+)
+
+# Dietary flag -> tags it rules out.
+DIET_RULES: Dict[str, FrozenSet[str]] = {
+    "vegan": frozenset({"milk", "egg", "fish", "shellfish", "meat", "gelatin", "honey", "animal"}),
+    "vegetarian": frozenset({"fish", "shellfish", "meat", "gelatin", "animal"}),
+    "pescatarian": frozenset({"meat", "gelatin"}),
+    "halal": frozenset({"pork", "alcohol"}),
+    "kosher": frozenset({"pork", "shellfish"}),
+    "gluten_free": frozenset({"gluten"}),
+    "dairy_free": frozenset({"milk"}),
+    "nut_free": frozenset({"peanut", "tree_nut"}),
+    **{f"{tag}_free": frozenset({tag}) for tag in ALLERGEN_TAGS if tag != "milk"},
+}
+
+
+def normalize_flag(flag: str) -> str:
+    return "_".join(flag.lower().replace("-", " ").split())
+
+
+class _Automaton:
+    """Aho-Corasick automaton reporting ``(start, end, pattern_id)`` matches."""
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        self.lengths = [len(pattern) for pattern in patterns]
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Tuple[int, ...]] = [()]
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                child = goto[node].get(char)
+                if child is None:
+                    child = goto[node][char] = len(goto)
+                    goto.append({})
+                    output.append(())
+                node = child
+            output[node] += (pattern_id,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(char, 0)
+                fail[child] = target if target != child else 0
+                output[child] += output[fail[child]]
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+
+    def matches(self, text: str) -> List[Tuple[int, int, int]]:
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self.lengths
+        found: List[Tuple[int, int, int]] = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern_id in output[node]:
+                end = index + 1
+                found.append((end - lengths[pattern_id], end, pattern_id))
+        return found
+
+
+class IngredientIndex:
+    """Precompiled synonym dictionary plus automaton over a term table."""
+
+    def __init__(
+        self,
+        terms: Sequence[IngredientTerm] = DEFAULT_TERMS,
+        diet_rules: Mapping[str, FrozenSet[str]] = DIET_RULES,
+    ) -> None:
+        self.diet_rules = dict(diet_rules)
+        self._canonical: Dict[str, IngredientTerm] = {}
+        for term in terms:
+            for synonym in term.synonyms:
+                self._canonical.setdefault(" ".join(synonym.lower().split()), term)
+        self._patterns = list(self._canonical)
+        self._automaton = _Automaton(self._patterns)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def canonicalize(self, ingredient: str) -> str:
+        """The canonical name of a known synonym, otherwise the normalised input."""
+        normalized = " ".join(ingredient.lower().split())
+        term = self._canonical.get(normalized)
+        return term.canonical if term is not None else normalized
+
+    def find(self, texts: Iterable[str]) -> List[IngredientTerm]:
+        """Distinct terms mentioned in ``texts``, in order of first appearance."""
+        found: Dict[str, IngredientTerm] = {}
+        patterns = self._patterns
+        for text in texts:
+            text = " ".join(text.lower().split())
+            last_end = 0
+            # Leftmost-longest: sort by start, longer first, then skip overlaps.
+            for start, end, pattern_id in sorted(
+                self._automaton.matches(text), key=lambda match: (match[0], -match[1])
+            ):
+                if start < last_end:
+                    continue
+                if start and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum():
+                    continue
+                last_end = end
+                term = self._canonical[patterns[pattern_id]]
+                found.setdefault(term.canonical, term)
+        return list(found.values())
+
+    @staticmethod
+    def allergens(terms: Iterable[IngredientTerm]) -> List[str]:
+        return sorted({tag for term in terms for tag in term.tags & ALLERGEN_TAGS})
+
+    def conflicts(
+        self, terms: Sequence[IngredientTerm], dietary_flags: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        """Map each violated dietary flag to the canonical ingredients violating it."""
+        conflicts: Dict[str, List[str]] = {}
+        for flag in dietary_flags:
+            excluded = self.diet_rules.get(normalize_flag(flag))
+            if not excluded:
+                continue
+            names = [term.canonical for term in terms if term.tags & excluded]
+            if names:
+                conflicts[normalize_flag(flag)] = names
+        return conflicts
+
+
+@functools.lru_cache(maxsize=1)
+def default_index() -> IngredientIndex:
+    """The process-wide index over :data:`DEFAULT_TERMS`."""
+    return IngredientIndex()
+
+
+__all__ = [
+    "ALLERGEN_TAGS",
+    "DEFAULT_TERMS",
+    "DIET_RULES",
+    "IngredientIndex",
+    "IngredientTerm",
+    "default_index",
+    "normalize_flag",
+]
@@ -0,0 +1,228 @@
+"""Single-pass parser for OCR'd product label text.
+
+:func:`parse_label` walks the label once with a compiled tokenizer and a
+small state machine, pulling out the product name (first non-blank line),
+the top-level ingredients (commas inside parentheses belong to the parent
+ingredient), the allergens listed after ``contains:``/``allergens:`` and the
+nutrition-facts numbers.  Tokens are matched in place; only the short
+strings that end up in the result are materialised.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..barcodes import normalize_barcode
+
+_TOKEN = re.compile(
+    r"""
+    (?P<nl>\n)
+    | (?P<num>\d+(?:[.,]\d+)?)
+    | (?P<word>[^\W\d_]+(?:['’-][^\W\d_]+)*)
+    | (?P<open>[(\[{])
+    | (?P<close>[)\]}])
+    | (?P<sep>[,;])
+    | (?P<colon>:)
+    | (?P<stop>\.)
+    """,
+    re.VERBOSE,
+)
+
+_WORD = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*")
+
+NUTRIENT_WORDS: Dict[str, str] = {
+    "calories": "calories",
+    "calorie": "calories",
+    "energy": "calories",
+    "protein": "protein",
+    "proteins": "protein",
+    "fat": "fat",
+    "fats": "fat",
+    "carbohydrate": "carbs",
+    "carbohydrates": "carbs",
+    "carbs": "carbs",
+    "serving": "serving_size_g",
+}
+# Words that may sit between a nutrient name and its number ("Total Fat 9g").
+_FILLER_WORDS = frozenset({"total", "size", "per"})
+# Unit -> multiplier into the resolver's units (grams, kcal).
+_UNITS: Dict[str, float] = {
+    "g": 1.0,
+    "ml": 1.0,
+    "mg": 0.001,
+    "mcg": 0.000001,
+    "kcal": 1.0,
+    "cal": 1.0,
+    "kj": 1 / 4.184,
+}
+_CONTAINS_WORDS = frozenset({"contains", "contain"})
+_ALLERGEN_WORDS = frozenset({"allergens", "allergen"})
+_CONTAINS_FILLER = frozenset({"may", "traces", "of"})
+_REQUIRED_NUTRIENTS = ("calories", "protein", "fat", "carbs")
+DEFAULT_SERVING_G = 100.0
+
+_BODY, _INGREDIENTS, _CONTAINS = range(3)
+
+
+@dataclass(slots=True)
+class LabelFacts:
+    name: str = ""
+    ingredients: List[str] = field(default_factory=list)
+    allergens: List[str] = field(default_factory=list)
+    nutrients: Dict[str, float] = field(default_factory=dict)
+    barcode: Optional[str] = None
+    words: Set[str] = field(default_factory=set)
+
+    def complete_nutrients(self) -> Optional[Dict[str, float]]:
+        """Resolver-shaped nutrients, or ``None`` unless all four macros were read."""
+        if any(key not in self.nutrients for key in _REQUIRED_NUTRIENTS):
+            return None
+        nutrients = {key: self.nutrients[key] for key in _REQUIRED_NUTRIENTS}
+        nutrients["serving_size_g"] = self.nutrients.get("serving_size_g", DEFAULT_SERVING_G)
+        return nutrients
+
+
+def name_words(text: str) -> Set[str]:
+    """Lowercased words of ``text`` as :func:`parse_label` tokenizes them."""
+    return {match.group().lower() for match in _WORD.finditer(text)}
+
+
+def parse_label(text: str) -> LabelFacts:
+    facts = LabelFacts()
+    words = facts.words
+    nutrients = facts.nutrients
+    state = _BODY
+    depth = 0
+    item: List[str] = []
+    name_start = name_end = -1
+    last_kind = ""
+    after_contains = False
+    pending: Optional[str] = None  # nutrient waiting for its number
+    reading: Optional[Tuple[str, float]] = None  # number waiting for its unit
+    skip_nutrient = False
+
+    def flush(target: List[str]) -> None:
+        if item:
+            target.append(" ".join(item))
+            item.clear()
+
+    for match in _TOKEN.finditer(text):
+        kind = match.lastgroup
+        if name_start < 0 and kind != "nl":
+            name_start = match.start()
+        elif name_start >= 0 > name_end and kind == "nl":
+            name_end = match.start()
+        token = match.group(kind) if kind in ("word", "num") else ""
+        lowered = token.lower() if kind == "word" else ""
+
+        if reading is not None:
+            nutrient, value = reading
+            reading = None
+            scale = _UNITS.get(lowered)
+            if nutrient == "serving_size_g" and scale != 1.0:
+                pass  # "1 bar (60g)": keep waiting for a gram amount
+            else:
+                nutrients.setdefault(nutrient, round(value * (scale or 1.0), 3))
+                pending = None
+            if scale is not None:
+                last_kind = kind
+                continue
+
+        if after_contains:
+            after_contains = False
+            if kind == "colon" or (kind == "word" and (not item or item == ["may"])):
+                if state == _INGREDIENTS and item != ["may"]:
+                    flush(facts.ingredients)
+                item.clear()
+                state, depth = _CONTAINS, 0
+                if kind == "colon":
+                    last_kind = kind
+                    continue
+            elif state == _INGREDIENTS and depth == 0:
+                item.append("contains")
+
+        if kind == "word":
+            words.add(lowered)
+            if lowered in ("ingredients", "ingredient"):
+                flush(facts.allergens if state == _CONTAINS else facts.ingredients)
+                state, depth = _INGREDIENTS, 0
+            elif lowered == "nutrition":
+                if state == _INGREDIENTS:
+                    flush(facts.ingredients)
+                elif state == _CONTAINS:
+                    flush(facts.allergens)
+                state, depth = _BODY, 0
+            elif lowered in _ALLERGEN_WORDS and depth == 0:
+                if state == _INGREDIENTS:
+                    flush(facts.ingredients)
+                state = _CONTAINS
+            elif lowered in _CONTAINS_WORDS and depth == 0 and state != _CONTAINS:
+                after_contains = True
+            elif state == _INGREDIENTS:
+                if depth == 0:
+                    item.append(lowered)
+            elif state == _CONTAINS:
+                if depth:
+                    pass
+                elif lowered in ("and", "or"):
+                    flush(facts.allergens)
+                elif lowered not in _CONTAINS_FILLER:
+                    item.append(lowered)
+            elif lowered == "from":
+                pending, skip_nutrient = None, True
+            elif lowered in NUTRIENT_WORDS:
+                if skip_nutrient:
+                    skip_nutrient = False
+                elif NUTRIENT_WORDS[lowered] not in nutrients:
+                    pending = NUTRIENT_WORDS[lowered]
+            elif lowered not in _FILLER_WORDS and pending != "serving_size_g":
+                pending = None
+        elif kind == "num":
+            if facts.barcode is None and token.isdigit() and 8 <= len(token) <= 14:
+                facts.barcode = normalize_barcode(token)
+            if pending is not None and state == _BODY:
+                reading = (pending, float(token.replace(",", ".")))
+        elif kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth = max(depth - 1, 0)
+        elif kind == "sep":
+            if depth == 0 and state == _INGREDIENTS:
+                flush(facts.ingredients)
+            elif depth == 0 and state == _CONTAINS:
+                flush(facts.allergens)
+        elif kind == "colon":
+            if depth == 0 and state == _INGREDIENTS:
+                item.clear()  # "Ingredients:" / "contains 2% or less of:"
+        elif kind == "stop":
+            if depth == 0 and state == _INGREDIENTS:
+                flush(facts.ingredients)
+                state = _BODY
+            elif depth == 0 and state == _CONTAINS:
+                flush(facts.allergens)
+                state = _BODY
+        elif kind == "nl":
+            if pending == "serving_size_g":
+                pending = None
+            if state == _CONTAINS or (state == _INGREDIENTS and last_kind == "nl"):
+                # Allergen lines end at the line break; ingredients at a blank line.
+                flush(facts.allergens if state == _CONTAINS else facts.ingredients)
+                state, depth = _BODY, 0
+        last_kind = kind
+
+    if reading is not None and reading[0] != "serving_size_g":
+        nutrients.setdefault(reading[0], round(reading[1], 3))
+    if after_contains and state == _INGREDIENTS:
+        item.append("contains")
+    if state == _INGREDIENTS:
+        flush(facts.ingredients)
+    elif state == _CONTAINS:
+        flush(facts.allergens)
+    if name_start >= 0:
+        facts.name = text[name_start : name_end if name_end >= 0 else len(text)].strip()
+    return facts
+
+
+__all__ = ["LabelFacts", "NUTRIENT_WORDS", "name_words", "parse_label"]
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Dict, Iterable, List
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
 
 from ..data_models import ConfidenceLevel, MealItemEstimate, MealScanRequest, MealScanResult
+from .food_index import FoodIndex
 
 # Simplified calorie lookup per 100 g. Values based on common foods.
 CALORIE_TABLE: Dict[str, float] = {
@@ -23,31 +25,28 @@ CALORIE_TABLE: Dict[str, float] = {
 
 DEFAULT_CALORIES_PER_100G = 150.0
 
+# Fuzzy matches at or above this score are trusted as much as exact hits.
+HIGH_CONFIDENCE_MATCH_SCORE = 0.75
+
+_CONFIDENCE_SCORES = {ConfidenceLevel.LOW: 0, ConfidenceLevel.MEDIUM: 1, ConfidenceLevel.HIGH: 2}
+_CONFIDENCE_BY_SCORE = {0: ConfidenceLevel.LOW, 1: ConfidenceLevel.MEDIUM, 2: ConfidenceLevel.HIGH}
+
 
 class MealScanFirstPassAgent:
     """Estimate meal items and calories using lightweight heuristics."""
 
-    def __init__(self, calorie_table: Dict[str, float] | None = None) -> None:
+    def __init__(
+        self,
+        calorie_table: Dict[str, float] | None = None,
+        food_index: FoodIndex | None = None,
+    ) -> None:
         self._calorie_table = calorie_table or CALORIE_TABLE
+        self._food_index = food_index if food_index is not None else FoodIndex(self._calorie_table)
 
     def estimate(self, request: MealScanRequest) -> MealScanResult:
         """Return a calorie estimate based on the provided hints."""
         if not request.hints:
-            clarification = (
-                "No hints were provided. Please capture another angle or add a manual item."
-            )
-            default_item = MealItemEstimate(
-                name="unrecognised item",
-                portion_grams=120.0,
-                calories=(DEFAULT_CALORIES_PER_100G / 100.0) * 120.0,
-                confidence=ConfidenceLevel.LOW,
-            )
-            return MealScanResult(
-                items=[default_item],
-                total_calories=default_item.calories,
-                confidence_message="Unable to confidently recognise the meal",
-                clarification=clarification,
-            )
+            return self._unrecognised_result()
 
         estimates: List[MealItemEstimate] = []
         for hint in request.hints:
@@ -60,14 +59,72 @@ class MealScanFirstPassAgent:
 
         return MealScanResult(items=estimates, total_calories=total, confidence_message=message)
 
+    def estimate_many(self, requests: Sequence[MealScanRequest]) -> List[MealScanResult]:
+        """Estimate a batch of scans, resolving every distinct hint only once.
+
+        Hints are interned across the whole batch and their portion, calories
+        and confidence are stored as columns indexed by slot, so replaying a
+        large offline queue costs one table lookup per *unique* hint.  The
+        results are identical to calling :meth:`estimate` per request.
+        """
+        slots: Dict[str, int] = {}
+        unique_hints: List[str] = []
+        hint_slots = array("l")
+        for request in requests:
+            for hint in request.hints:
+                slot = slots.get(hint)
+                if slot is None:
+                    slot = slots[hint] = len(unique_hints)
+                    unique_hints.append(hint)
+                hint_slots.append(slot)
+
+        portions = array("d")
+        calories = array("d")
+        scores = array("b")
+        confidences: List[ConfidenceLevel] = []
+        for hint in unique_hints:
+            portion, calories_per_100g, confidence = self._resolve_key(hint.lower().strip())
+            portions.append(portion)
+            calories.append(round((calories_per_100g / 100.0) * portion, 2))
+            scores.append(_CONFIDENCE_SCORES[confidence])
+            confidences.append(confidence)
+
+        results: List[MealScanResult] = []
+        cursor = 0
+        for request in requests:
+            count = len(request.hints)
+            if not count:
+                results.append(self._unrecognised_result())
+                continue
+            items: List[MealItemEstimate] = []
+            total = 0.0
+            score_sum = 0
+            for slot in hint_slots[cursor : cursor + count]:
+                item_calories = calories[slot]
+                items.append(
+                    MealItemEstimate(
+                        name=unique_hints[slot],
+                        portion_grams=portions[slot],
+                        calories=item_calories,
+                        confidence=confidences[slot],
+                    )
+                )
+                total += item_calories
+                score_sum += scores[slot]
+            cursor += count
+            level = _CONFIDENCE_BY_SCORE[round(score_sum / count)]
+            results.append(
+                MealScanResult(
+                    items=items,
+                    total_calories=total or 1.0,
+                    confidence_message=self._confidence_message(level),
+                )
+            )
+        return results
+
     def _estimate_for_hint(self, hint: str) -> MealItemEstimate:
-        key = hint.lower().strip()
-        portion = self._portion_for_hint(key)
-        calories_per_100g = self._calorie_table.get(key, DEFAULT_CALORIES_PER_100G)
+        portion, calories_per_100g, confidence = self._resolve_key(hint.lower().strip())
         calories = (calories_per_100g / 100.0) * portion
-        confidence = ConfidenceLevel.HIGH if key in self._calorie_table else ConfidenceLevel.MEDIUM
-        if "fried" in key or "dessert" in key:
-            confidence = ConfidenceLevel.MEDIUM
         return MealItemEstimate(
             name=hint,
             portion_grams=portion,
@@ -75,6 +132,46 @@ class MealScanFirstPassAgent:
             confidence=confidence,
         )
 
+    def _resolve_key(self, key: str) -> Tuple[float, float, ConfidenceLevel]:
+        """Return ``(portion_grams, calories_per_100g, confidence)`` for a normalised hint."""
+        portion = self._portion_for_hint(key)
+        calories_per_100g = self._calorie_table.get(key)
+        if calories_per_100g is not None:
+            confidence = ConfidenceLevel.HIGH
+        else:
+            match = self._food_index.match(key)
+            if match is None:
+                calories_per_100g = DEFAULT_CALORIES_PER_100G
+                confidence = ConfidenceLevel.MEDIUM
+            else:
+                calories_per_100g = match.calories_per_100g
+                confidence = (
+                    ConfidenceLevel.HIGH
+                    if match.score >= HIGH_CONFIDENCE_MATCH_SCORE
+                    else ConfidenceLevel.MEDIUM
+                )
+        if "fried" in key or "dessert" in key:
+            confidence = ConfidenceLevel.MEDIUM
+        return portion, calories_per_100g, confidence
+
+    @staticmethod
+    def _unrecognised_result() -> MealScanResult:
+        clarification = (
+            "No hints were provided. Please capture another angle or add a manual item."
+        )
+        default_item = MealItemEstimate(
+            name="unrecognised item",
+            portion_grams=120.0,
+            calories=(DEFAULT_CALORIES_PER_100G / 100.0) * 120.0,
+            confidence=ConfidenceLevel.LOW,
+        )
+        return MealScanResult(
+            items=[default_item],
+            total_calories=default_item.calories,
+            confidence_message="Unable to confidently recognise the meal",
+            clarification=clarification,
+        )
+
     @staticmethod
     def _portion_for_hint(hint: str) -> float:
         if "bowl" in hint:
@@ -87,13 +184,12 @@ class MealScanFirstPassAgent:
 
     @staticmethod
     def _average_confidence(estimates: Iterable[MealItemEstimate]) -> ConfidenceLevel:
-        score_map = {ConfidenceLevel.LOW: 0, ConfidenceLevel.MEDIUM: 1, ConfidenceLevel.HIGH: 2}
-        reverse_map = {0: ConfidenceLevel.LOW, 1: ConfidenceLevel.MEDIUM, 2: ConfidenceLevel.HIGH}
         estimates_list = list(estimates)
         if not estimates_list:
             return ConfidenceLevel.LOW
-        avg = sum(score_map[item.confidence] for item in estimates_list) / len(estimates_list)
-        return reverse_map[round(avg)]
+        total = sum(_CONFIDENCE_SCORES[item.confidence] for item in estimates_list)
+        avg = total / len(estimates_list)
+        return _CONFIDENCE_BY_SCORE[round(avg)]
 
     @staticmethod
     def _confidence_message(level: ConfidenceLevel) -> str:
@@ -2,43 +2,56 @@
 
 from __future__ import annotations
 
+import warnings
+from dataclasses import dataclass
 from datetime import timedelta
-from typing import Dict, List, Tuple
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
+from ..barcodes import BarcodeLookup, normalize_barcode
+from ..cache import TTLCache
 from ..data_models import NutrientInfo, NutritionResolverRequest, ProductScore
+from ..storage.alternatives import AlternativesIndex
+from ..storage.catalogue import CatalogueRecord, ProductCatalogue
+from .ingredients import IngredientIndex, default_index
+from .label_parser import LabelFacts, name_words, parse_label
+from .reference_products import (
+    PRODUCT_DATA,
+    ProductData,
+    ProductEntry,
+    legacy_lookup,
+    reference_lookup,
+)
+
+
+__all__ = [
+    "IncompleteDataError",
+    "NutritionResolverAgent",
+    "PRODUCT_DATA",
+    "ProductData",
+    "ProductEntry",
+    "score_from_macros",
+]
+
+
+# Products whose name contains a word, each with its name's word count.
+Postings = Tuple[Tuple[str, int], ...]
 
 
 class IncompleteDataError(RuntimeError):
     """Raised when the simulated data source cannot produce a full answer."""
 
 
-ProductData = Dict[str, Tuple[str, Dict[str, float], List[str]]]
-
-PRODUCT_DATA: ProductData = {
-    "012345678905": (
-        "InfyFit Protein Bar",
-        {
-            "calories": 210.0,
-            "protein": 20.0,
-            "fat": 8.0,
-            "carbs": 18.0,
-            "serving_size_g": 60.0,
-        },
-        ["InfyFit Crunch Bar", "InfyFit Nutri Square", "Greek Yogurt"],
-    ),
-    "5012345678900": (
-        "Whole Grain Pita",
-        {
-            "calories": 170.0,
-            "protein": 6.0,
-            "fat": 2.0,
-            "carbs": 32.0,
-            "serving_size_g": 64.0,
-        },
-        ["Sprouted Wheat Wrap", "InfyFit Protein Bar"],
-    ),
-}
-
 DEFAULT_PRODUCT = (
     "Unresolved Product",
     {
@@ -52,8 +65,10 @@ DEFAULT_PRODUCT = (
 )
 
 
-def _score_from_macros(calories: float, protein: float, fat: float, carbs: float) -> int:
-    density = calories / (protein + fat + carbs)
+def score_from_macros(calories: float, protein: float, fat: float, carbs: float) -> int:
+    macros = protein + fat + carbs
+    # Water and diet drinks carry no macros; only the protein rule reads density.
+    density = calories / macros if macros > 0 else 0.0
     if protein >= 15 and fat <= 10 and density <= 12:
         return 9
     if protein >= 10 and fat <= 15:
@@ -63,25 +78,119 @@ def _score_from_macros(calories: float, protein: float, fat: float, carbs: float
     return 6
 
 
+@dataclass
+class CachedScore:
+    """Cache entry holding a resolved score and, once requested, its JSON payload."""
+
+    score: ProductScore
+    payload: Optional[bytes] = None
+
+
 class NutritionResolverAgent:
-    """Resolve a barcode or OCR text into product facts and a health score."""
+    """Resolve a barcode or OCR text into product facts and a health score.
+
+    When a :class:`~infyfit.cache.TTLCache` is supplied, resolved scores are
+    kept for :meth:`cache_ttl`.  Cached :class:`ProductScore` objects and
+    payloads are shared between callers and must be treated as read-only.
+
+    OCR labels are matched to products by the words of their header line
+    only; a label that carries its own complete nutrition facts keeps them
+    unless its header names a product exactly.
+    """
+
+    NAME_POSTINGS_ENTRIES = 4096
+    NAME_POSTINGS_TTL_S = 3600.0
+
+    def __init__(
+        self,
+        lookup: BarcodeLookup | None = None,
+        cache: TTLCache[CachedScore] | None = None,
+        ingredients: IngredientIndex | None = None,
+        alternatives: AlternativesIndex | None = None,
+        *,
+        product_data: Mapping[str, ProductEntry] | None = None,
+    ) -> None:
+        """``product_data`` (also accepted positionally) is deprecated; pass ``lookup``."""
+        if isinstance(lookup, Mapping):
+            lookup, product_data = None, lookup
+        if product_data is not None:
+            warnings.warn(
+                "product_data is deprecated; pass lookup=BarcodeLookup(...) instead",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            if lookup is None and product_data:
+                lookup = legacy_lookup(product_data=product_data)
+        self._lookup = lookup if lookup is not None else reference_lookup()
+        self._ingredients = ingredients if ingredients is not None else default_index()
+        self._alternatives = alternatives
+        self._cache = cache
+        self._postings: TTLCache[Postings] = TTLCache(max_entries=self.NAME_POSTINGS_ENTRIES)
 
-    def __init__(self, product_data: ProductData | None = None) -> None:
-        self._product_data = product_data or PRODUCT_DATA
+    @property
+    def lookup(self) -> BarcodeLookup:
+        return self._lookup
+
+    @property
+    def cache(self) -> TTLCache[CachedScore] | None:
+        return self._cache
 
     def resolve(self, request: NutritionResolverRequest) -> ProductScore:
-        key = request.barcode or self._infer_from_ocr(request.ocr_text)
+        if self._cache is None:
+            return self._resolve_uncached(request)
+        return self._cached_entry(request).score
+
+    def resolve_json(self, request: NutritionResolverRequest) -> bytes:
+        """Return ``resolve(request)`` as JSON bytes, serialising each cached score once."""
+        if self._cache is None:
+            return self._resolve_uncached(request).to_json_bytes()
+        entry = self._cached_entry(request)
+        if entry.payload is None:
+            entry.payload = entry.score.to_json_bytes()
+        return entry.payload
+
+    @staticmethod
+    def cache_key(request: NutritionResolverRequest) -> Hashable:
+        if request.barcode:
+            # Equivalent spellings (UPC-A vs EAN-13 padding) share one entry.
+            source: Tuple[str, str] = (
+                "barcode",
+                normalize_barcode(request.barcode) or request.barcode,
+            )
+        else:
+            source = ("ocr", " ".join((request.ocr_text or "").lower().split()))
+        return source, request.locale, tuple(sorted(request.dietary_flags))
+
+    def _cached_entry(self, request: NutritionResolverRequest) -> CachedScore:
+        key = self.cache_key(request)
+        entry = self._cache.get(key)
+        if entry is None:
+            score = self._resolve_uncached(request)
+            entry = CachedScore(score=score)
+            self._cache.put(key, entry, self.cache_ttl(score).total_seconds())
+        return entry
+
+    def _resolve_uncached(self, request: NutritionResolverRequest) -> ProductScore:
         try:
-            name, nutrients_raw, alternatives = self._lookup_product(key)
+            if request.barcode:
+                entry, texts = self._lookup_product(request.barcode)
+            else:
+                entry, texts = self._resolve_ocr(request.ocr_text)
         except IncompleteDataError:
-            name, nutrients_raw, alternatives = DEFAULT_PRODUCT
-        score = _score_from_macros(
+            entry, texts = DEFAULT_PRODUCT, ()
+        name, nutrients_raw, alternatives = entry
+        score = score_from_macros(
             calories=nutrients_raw["calories"],
             protein=nutrients_raw["protein"],
             fat=nutrients_raw["fat"],
             carbs=nutrients_raw["carbs"],
         )
-        reason = self._build_reason(score, nutrients_raw, request.dietary_flags)
+        conflicts = (
+            self._ingredients.conflicts(self._ingredients.find(texts), request.dietary_flags)
+            if texts and request.dietary_flags
+            else {}
+        )
+        reason = self._build_reason(score, nutrients_raw, conflicts)
         nutrients = NutrientInfo(**nutrients_raw)
         return ProductScore(
             name=name,
@@ -92,30 +201,100 @@ class NutritionResolverAgent:
             nutrients=nutrients,
         )
 
-    def _lookup_product(self, key: str) -> Tuple[str, Dict[str, float], List[str]]:
-        if key in self._product_data:
-            return self._product_data[key]
+    def _lookup_product(self, key: str) -> Tuple[ProductEntry, Sequence[str]]:
+        """Return the product entry and the ingredient texts known for it."""
+        record = self._lookup.lookup(key) if key else None
+        if record is not None:
+            entry = record.name, record.nutrients, self._alternatives_for(record)
+            return entry, record.ingredients
         if key == "missing" or not key:
             raise IncompleteDataError("Missing product data")
-        return DEFAULT_PRODUCT
+        return DEFAULT_PRODUCT, ()
 
-    @staticmethod
-    def _infer_from_ocr(ocr_text: str | None) -> str:
-        if not ocr_text:
-            return ""
-        if "protein bar" in ocr_text.lower():
-            return "012345678905"
-        return ""
+    def _alternatives_for(self, record: CatalogueRecord) -> List[str]:
+        """Nearest healthier same-category products, else the record's curated list."""
+        if self._alternatives is not None:
+            nutrients = record.nutrients
+            score = score_from_macros(
+                nutrients["calories"], nutrients["protein"], nutrients["fat"], nutrients["carbs"]
+            )
+            nearest = self._alternatives.better_for(record.barcode, nutrients, score)
+            if nearest:
+                return nearest
+        return list(record.alternatives)
+
+    def _resolve_ocr(self, ocr_text: str | None) -> Tuple[ProductEntry, Sequence[str]]:
+        """Match OCR text to a known product, else score the label's own nutrition facts."""
+        facts = parse_label(ocr_text or "")
+        key, exact = self._infer_from_ocr(facts)
+        nutrients = facts.complete_nutrients()
+        if key and (exact or nutrients is None):
+            entry, ingredients = self._lookup_product(key)
+            return entry, (*ingredients, ocr_text)
+        if nutrients is None:
+            raise IncompleteDataError("Missing product data")
+        return (facts.name or DEFAULT_PRODUCT[0], nutrients, []), (ocr_text,)
+
+    def _name_postings(self, words: Iterable[str]) -> Dict[str, Postings]:
+        """Postings for ``words``; words not yet cached share one pass over product names."""
+        found: Dict[str, Postings] = {}
+        missing: Set[str] = set()
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                missing.add(word)
+            else:
+                found[word] = postings
+        if missing:
+            fresh: Dict[str, List[Tuple[str, int]]] = {word: [] for word in missing}
+            for barcode, name in self._product_names():
+                product_words = name_words(name)
+                for word in missing & product_words:
+                    fresh[word].append((barcode, len(product_words)))
+            for word, hits in fresh.items():
+                found[word] = tuple(hits)
+                self._postings.put(word, found[word], self.NAME_POSTINGS_TTL_S)
+        return found
+
+    def _product_names(self) -> Iterator[Tuple[str, str]]:
+        records = self._lookup.records
+        if isinstance(records, ProductCatalogue):
+            return records.names()  # decodes only the name column
+        return ((barcode, record.name) for barcode, record in records.items())
+
+    def _infer_from_ocr(self, facts: LabelFacts) -> Tuple[str, bool]:
+        """Return ``(barcode, exact)`` for the product the label names, else ``("", False)``."""
+        if facts.barcode and self._lookup.lookup(facts.barcode) is not None:
+            return facts.barcode, True
+        # Best product whose name words mostly (at least two thirds) appear in the header.
+        header = name_words(facts.name)
+        matched: Dict[str, int] = {}
+        sizes: Dict[str, int] = {}
+        for postings in self._name_postings(header).values():
+            for barcode, size in postings:
+                matched[barcode] = matched.get(barcode, 0) + 1
+                sizes[barcode] = size
+        best, best_rank = "", (0.0, 0)
+        for barcode, count in matched.items():
+            total = sizes[barcode]
+            if count < min(total, 2) or 3 * count < 2 * total:
+                continue
+            rank = (count / total, count)
+            if rank > best_rank:
+                best, best_rank = barcode, rank
+        exact = bool(best) and matched[best] == sizes[best] == len(header)
+        return best, exact
 
     @staticmethod
-    def _build_reason(score: int, nutrients: Dict[str, float], dietary_flags: List[str]) -> str:
-        high_protein = nutrients["protein"] >= 15
+    def _build_reason(
+        score: int, nutrients: Dict[str, float], conflicts: Mapping[str, List[str]]
+    ) -> str:
         low_sugar = nutrients["carbs"] <= 15
         reasons: List[str] = []
         if score >= 8:
             reasons.append("Rich in protein for muscle recovery")
-        if high_protein and "vegan" in dietary_flags:
-            reasons.append("Contains dairy protein sources")
+        for flag, ingredients in conflicts.items():
+            reasons.append(f"Not {flag.replace('_', '-')}: contains {', '.join(ingredients)}")
         if low_sugar:
             reasons.append("Low sugar compared to similar products")
         if not reasons:
@@ -1,20 +1,343 @@
-"""Offline sync agent simulation."""
+"""Offline sync engine that drains device queues within a latency budget."""
 
 from __future__ import annotations
 
-from ..data_models import OfflineSyncRequest, OfflineSyncResult
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from ..data_models import (
+    HealthSyncRequest,
+    HealthSyncResult,
+    OfflineSyncRequest,
+    OfflineSyncResult,
+    SyncAction,
+    SyncOperation,
+)
+from ..storage.timeseries import HealthTimeSeries
+from ..storage.wal import WriteAheadLog
+from .health_delta import HealthLog, decode_delta, encode_leaves
+
+EntityKey = Tuple[str, str]
+
+
+class SyncStore:
+    """Per-user entity state with an idempotency log of operation ids.
+
+    With a :class:`WriteAheadLog` attached, every batch is logged and made
+    durable (sharing fsyncs with concurrent batches through group commit)
+    before it is applied, and the state is checkpointed every
+    ``CHECKPOINT_RECORDS`` batches so restarts only replay the log tail.
+    """
+
+    # Operation ids remembered per user; older ids fall out first.
+    MAX_TRACKED_OPS = 1 << 17
+    CHECKPOINT_RECORDS = 10_000
+
+    def __init__(self, wal: WriteAheadLog | None = None) -> None:
+        self.wal = wal
+        self._entities: Dict[str, Dict[EntityKey, Dict[str, Any]]] = {}
+        self._applied: Dict[str, OrderedDict[str, None]] = {}
+        # Checkpoints wait for in-flight batches so the snapshot matches its LSN.
+        self._gate = threading.Condition()
+        self._inflight = 0
+        self._checkpointing = False
+        if wal is not None:
+            self._replay(wal)
+
+    @classmethod
+    def open(cls, directory: str | os.PathLike[str], **wal_options: Any) -> "SyncStore":
+        """Open (or recover) a durable store backed by a WAL in ``directory``."""
+        return cls(wal=WriteAheadLog(directory, **wal_options))
+
+    def get(self, user_id: str, entity: str, key: str) -> Dict[str, Any] | None:
+        return self._entities.get(user_id, {}).get((entity, key))
+
+    def entities(self, user_id: str) -> Dict[EntityKey, Dict[str, Any]]:
+        return dict(self._entities.get(user_id, {}))
+
+    def is_applied(self, user_id: str, op_id: str) -> bool:
+        return op_id in self._applied.get(user_id, ())
+
+    def apply_batch(
+        self,
+        user_id: str,
+        writes: Sequence[Tuple[EntityKey, SyncOperation]],
+        op_ids: Sequence[str],
+    ) -> None:
+        """Apply coalesced ``writes`` and mark every contributing ``op_ids`` as applied."""
+        rows = [(key, op.action.value, op.payload) for key, op in writes]
+        if self.wal is None:
+            self._apply(user_id, rows, op_ids)
+            return
+        record = {
+            "u": user_id,
+            "w": [[*key, action, payload] for key, action, payload in rows],
+            "o": list(op_ids),
+        }
+        with self._gate:
+            while self._checkpointing:
+                self._gate.wait()
+            self._inflight += 1
+        try:
+            self.wal.append(json.dumps(record, separators=(",", ":")).encode("utf-8"))
+            self._apply(user_id, rows, op_ids)
+        finally:
+            with self._gate:
+                self._inflight -= 1
+                self._gate.notify_all()
+        if self.wal.last_lsn - self.wal.checkpoint_lsn >= self.CHECKPOINT_RECORDS:
+            self.checkpoint()
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        """Drop all state of ``user_ids``; return how many entities were removed.
+
+        The purge is logged like a batch and followed by a checkpoint, so the
+        segments that still hold the users' writes become obsolete and are
+        deleted by compaction.
+        """
+        ids = list(user_ids)
+        if self.wal is not None:
+            with self._gate:
+                while self._checkpointing:
+                    self._gate.wait()
+                self._inflight += 1
+            try:
+                self.wal.append(json.dumps({"p": ids}, separators=(",", ":")).encode("utf-8"))
+                purged = self._purge(ids)
+            finally:
+                with self._gate:
+                    self._inflight -= 1
+                    self._gate.notify_all()
+            self.checkpoint()
+            return purged
+        return self._purge(ids)
+
+    def checkpoint(self) -> None:
+        """Snapshot the state into the WAL checkpoint and drop obsolete segments.
+
+        Concurrent callers may each take a snapshot; the WAL keeps the newest
+        and discards any that arrive after it.
+        """
+        if self.wal is None:
+            return
+        with self._gate:
+            if self._checkpointing:
+                return
+            self._checkpointing = True
+            try:
+                while self._inflight:
+                    self._gate.wait()
+                lsn = self.wal.last_lsn
+                state = json.dumps(self._dump(), separators=(",", ":")).encode("utf-8")
+            finally:
+                self._checkpointing = False
+                self._gate.notify_all()
+        self.wal.checkpoint(state, lsn)
+
+    def _apply(
+        self,
+        user_id: str,
+        rows: Sequence[Tuple[EntityKey, str, Dict[str, Any]]],
+        op_ids: Sequence[str],
+    ) -> None:
+        state = self._entities.setdefault(user_id, {})
+        for entity_key, action, payload in rows:
+            if action == SyncAction.DELETE.value:
+                state.pop(entity_key, None)
+            else:
+                state[entity_key] = dict(payload)
+        applied = self._applied.setdefault(user_id, OrderedDict())
+        for op_id in op_ids:
+            applied[op_id] = None
+        while len(applied) > self.MAX_TRACKED_OPS:
+            applied.popitem(last=False)
+
+    def _purge(self, user_ids: Sequence[str]) -> int:
+        purged = 0
+        for user_id in user_ids:
+            purged += len(self._entities.pop(user_id, ()))
+            self._applied.pop(user_id, None)
+        return purged
+
+    def _dump(self) -> Dict[str, Any]:
+        return {
+            user_id: {
+                "entities": [[*key, payload] for key, payload in entities.items()],
+                "applied": list(self._applied.get(user_id, ())),
+            }
+            for user_id, entities in self._entities.items()
+        }
+
+    def _replay(self, wal: WriteAheadLog) -> None:
+        state, records = wal.replay()
+        if state is not None:
+            for user_id, data in json.loads(state).items():
+                self._entities[user_id] = {
+                    (entity, key): payload for entity, key, payload in data["entities"]
+                }
+                self._applied[user_id] = OrderedDict.fromkeys(data["applied"])
+        # Later records overwrite earlier ones, so replaying in LSN order is exact.
+        for _, payload in records:
+            record = json.loads(payload)
+            if "p" in record:
+                self._purge(record["p"])
+                continue
+            rows = [((entity, key), action, data) for entity, key, action, data in record["w"]]
+            self._apply(record["u"], rows, record["o"])
 
 
 class OfflineSyncAgent:
-    """Flush queued operations respecting latency guardrails."""
+    """Apply queued device operations in adaptively sized batches.
+
+    Operations are deduplicated by ``op_id`` and coalesced per entity (the
+    last write wins) before they are applied.  Batch sizes follow an
+    exponentially weighted estimate of the per-operation cost so that each
+    batch takes roughly ``TARGET_BATCH_MS``; a request keeps applying
+    batches while the next one is predicted to fit ``latency_budget_ms``.
+    Whatever does not fit is reported as pending together with the batch
+    size the device should upload on its next round trip.
+    """
+
+    TARGET_BATCH_MS = 150.0
+    MIN_BATCH = 16
+    MAX_BATCH = 8192
+    MAX_UPLOAD = 50_000
+    # Starting guess before any batch has been timed.
+    INITIAL_OP_COST_MS = 0.05
+    SMOOTHING = 0.3
+    RETRY_PENDING_S = 1
+
+    def __init__(
+        self,
+        store: SyncStore | None = None,
+        clock: Callable[[], float] = time.perf_counter,
+        health_log: HealthLog | None = None,
+        health_series: HealthTimeSeries | None = None,
+    ) -> None:
+        self.store = store if store is not None else SyncStore()
+        self.health_log = health_log if health_log is not None else HealthLog()
+        self.health_series = health_series
+        self._clock = clock
+        self._op_cost_ms = self.INITIAL_OP_COST_MS
+        self._user_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def batch_size(self) -> int:
+        size = int(self.TARGET_BATCH_MS / max(self._op_cost_ms, 1e-6))
+        return min(max(size, self.MIN_BATCH), self.MAX_BATCH)
 
     def flush(self, request: OfflineSyncRequest) -> OfflineSyncResult:
-        if request.queue_size == 0:
-            return OfflineSyncResult(flushed=True, batches_uploaded=0, next_retry_s=None)
-        batches = min(max(request.queue_size // 5, 1), 5)
-        meets_budget = batches * 150 <= request.latency_budget_ms
+        if not request.operations:
+            return OfflineSyncResult(
+                flushed=request.queue_size == 0,
+                batches_uploaded=0,
+                next_retry_s=None if request.queue_size == 0 else self.RETRY_PENDING_S,
+                operations_pending=request.queue_size,
+                next_batch_size=self._upload_size(request.latency_budget_ms),
+            )
+        with self._user_lock(request.user_id):
+            return self._drain(request)
+
+    def sync_health(self, request: HealthSyncRequest) -> HealthSyncResult:
+        """Delta sync for daily health aggregates (see :mod:`.health_delta`).
+
+        Uploaded ``aggregates`` and ``delta`` records are applied first; when
+        the device also sends month ``digests`` the result lists the months
+        that still differ together with the server's per-day leaf hashes.
+        """
+        records = list(request.aggregates)
+        if request.delta:
+            records.extend(decode_delta(request.delta))
+        with self._user_lock(request.user_id):
+            # Validate before either write so a rejected upload changes neither store.
+            if records and self.health_series is not None:
+                self.health_series.check(request.user_id, records)
+            digests = self.health_log.upsert(request.user_id, records) if records else {}
+            if records and self.health_series is not None:
+                self.health_series.append(request.user_id, records)
+        stale = self.health_log.stale_months(request.user_id, request.digests)
+        return HealthSyncResult(
+            applied=len(records),
+            stale_months=stale,
+            leaves=encode_leaves(self.health_log.leaves(request.user_id, stale)) if stale else "",
+            digests=digests,
+        )
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        """Remove synced entities and health aggregates of ``user_ids``."""
+        ids = list(user_ids)
+        purged = self.store.purge_users(ids) + self.health_log.purge_users(ids)
+        if self.health_series is not None:
+            self.health_series.purge_users(ids)
+        with self._locks_guard:
+            for user_id in ids:
+                self._user_locks.pop(user_id, None)
+        return purged
+
+    def _drain(self, request: OfflineSyncRequest) -> OfflineSyncResult:
+        groups = self._coalesce(request.user_id, request.operations)
+        budget_ms = float(request.latency_budget_ms)
+        elapsed_ms = 0.0
+        batches = position = 0
+        while position < len(groups):
+            affordable = int((budget_ms - elapsed_ms) / max(self._op_cost_ms, 1e-6))
+            size = min(self.batch_size, affordable)
+            if size < 1:
+                if batches:
+                    break
+                size = 1  # Always make progress, even on a tiny budget.
+            chunk = groups[position : position + size]
+            writes = [(entity_key, ops[-1]) for entity_key, ops in chunk]
+            op_ids = [op.op_id for _, ops in chunk for op in ops]
+            started = self._clock()
+            self.store.apply_batch(request.user_id, writes, op_ids)
+            batch_ms = (self._clock() - started) * 1000.0
+            self._observe(batch_ms, len(chunk))
+            elapsed_ms += batch_ms
+            batches += 1
+            position += len(chunk)
+        pending = sum(len(ops) for _, ops in groups[position:])
+        # Duplicates of already applied operations are acknowledged as applied;
+        # ``queue_size`` counts operations still waiting on the device.
         return OfflineSyncResult(
-            flushed=meets_budget,
-            batches_uploaded=batches if meets_budget else 0,
-            next_retry_s=None if meets_budget else 30,
+            flushed=pending == 0 and request.queue_size == 0,
+            batches_uploaded=batches,
+            next_retry_s=None if pending == 0 else self.RETRY_PENDING_S,
+            operations_applied=len(request.operations) - pending,
+            operations_pending=pending + request.queue_size,
+            next_batch_size=self._upload_size(request.latency_budget_ms),
         )
+
+    def _coalesce(
+        self, user_id: str, operations: Sequence[SyncOperation]
+    ) -> List[Tuple[EntityKey, List[SyncOperation]]]:
+        """Group unseen operations per entity, preserving first-seen entity order."""
+        groups: Dict[EntityKey, List[SyncOperation]] = {}
+        seen = set()
+        for operation in operations:
+            if operation.op_id in seen or self.store.is_applied(user_id, operation.op_id):
+                continue
+            seen.add(operation.op_id)
+            groups.setdefault((operation.entity, operation.key), []).append(operation)
+        return list(groups.items())
+
+    def _observe(self, batch_ms: float, writes: int) -> None:
+        cost = batch_ms / max(writes, 1)
+        self._op_cost_ms += self.SMOOTHING * (cost - self._op_cost_ms)
+
+    def _upload_size(self, latency_budget_ms: int) -> int:
+        """Operations a device should send so one round trip fits its budget."""
+        size = int(latency_budget_ms / max(self._op_cost_ms, 1e-6))
+        return min(max(size, self.MIN_BATCH), self.MAX_UPLOAD)
+
+    def _user_lock(self, user_id: str) -> threading.Lock:
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._user_locks.setdefault(user_id, threading.Lock())
+        return lock
@@ -3,24 +3,59 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Optional
 
 from ..data_models import PrivacyIntent, PrivacyRequest, PrivacyResponse
 
+if TYPE_CHECKING:
+    from ..exports import ExportRunner
+    from ..storage import TombstoneStore
+
 
 class PrivacyOpsAgent:
-    """Handle export and delete flows with clear messaging."""
+    """Handle export and delete flows with clear messaging.
+
+    With an :class:`~infyfit.exports.ExportRunner` an export request also
+    queues the archive build; its link is served by the export status route.
+    With a :class:`~infyfit.storage.TombstoneStore` a delete request hides
+    the account immediately and a cancel request lifts it within the window.
+    """
+
+    def __init__(
+        self,
+        exports: Optional["ExportRunner"] = None,
+        tombstones: Optional["TombstoneStore"] = None,
+    ) -> None:
+        self.exports = exports
+        self.tombstones = tombstones
 
     def handle(self, request: PrivacyRequest) -> PrivacyResponse:
         if request.intent is PrivacyIntent.EXPORT:
+            if self.tombstones is not None and self.tombstones.is_deleted(request.user_id):
+                return PrivacyResponse(
+                    message="This account is scheduled for deletion. Cancel it to export data."
+                )
             expires = datetime.now(timezone.utc) + timedelta(hours=24)
+            if self.exports is not None:
+                self.exports.submit(request.user_id)
             return PrivacyResponse(
                 message=f"Export for {request.user_id} scheduled. We'll email you when it's ready.",
                 expires_at=expires,
             )
         if request.intent is PrivacyIntent.DELETE:
-            expires = datetime.now(timezone.utc) + timedelta(days=30)
+            if self.tombstones is not None:
+                if not request.user_id:
+                    raise ValueError("user_id is required for account deletion")
+                purge_after = self.tombstones.mark(request.user_id)
+                expires = datetime.fromtimestamp(purge_after, timezone.utc)
+            else:
+                expires = datetime.now(timezone.utc) + timedelta(days=30)
             return PrivacyResponse(
                 message="Account deletion window started. Sign in within 30 days to cancel.",
                 expires_at=expires,
             )
+        if request.intent is PrivacyIntent.CANCEL_DELETE:
+            if self.tombstones is not None and not self.tombstones.cancel(request.user_id):
+                return PrivacyResponse(message="There is no pending account deletion to cancel.")
+            return PrivacyResponse(message="Account deletion cancelled. Welcome back!")
         return PrivacyResponse(message="Unsupported request")
@@ -2,62 +2,72 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict
+import warnings
+from typing import Mapping, Sequence
 
+from ..barcodes import BarcodeLookup
 from ..data_models import (
     ConfidenceLevel,
     ProductCandidate,
     ProductScanRequest,
     ProductScanResult,
 )
+from .ingredients import IngredientIndex, default_index
+from .label_parser import parse_label
+from .reference_products import BARCODE_DB, ProductRecord, legacy_lookup, reference_lookup
 
-
-@dataclass(frozen=True)
-class ProductRecord:
-    name: str
-    brand: str
-    ingredients: tuple[str, ...]
-
-
-BARCODE_DB: Dict[str, ProductRecord] = {
-    "012345678905": ProductRecord(
-        name="InfyFit Protein Bar",
-        brand="InfyFit Labs",
-        ingredients=("almonds", "whey protein", "honey", "sea salt"),
-    ),
-    "5012345678900": ProductRecord(
-        name="Whole Grain Pita",
-        brand="Whole Hearth",
-        ingredients=("whole wheat", "yeast", "olive oil", "sea salt"),
-    ),
-}
+__all__ = ["BARCODE_DB", "ProductRecord", "ProductScannerAgent"]
 
 
 class ProductScannerAgent:
     """Lookup products by barcode or fallback to OCR text."""
 
-    def __init__(self, barcode_db: Dict[str, ProductRecord] | None = None) -> None:
-        self._barcode_db = barcode_db or BARCODE_DB
+    def __init__(
+        self,
+        lookup: BarcodeLookup | None = None,
+        ingredients: IngredientIndex | None = None,
+        *,
+        barcode_db: Mapping[str, ProductRecord] | None = None,
+    ) -> None:
+        """``barcode_db`` (also accepted positionally) is deprecated; pass ``lookup``."""
+        if isinstance(lookup, Mapping):
+            lookup, barcode_db = None, lookup
+        if barcode_db is not None:
+            warnings.warn(
+                "barcode_db is deprecated; pass lookup=BarcodeLookup(...) instead",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            if lookup is None and barcode_db:
+                lookup = legacy_lookup(barcode_db=barcode_db)
+        self._lookup = lookup if lookup is not None else reference_lookup()
+        self._ingredients = ingredients if ingredients is not None else default_index()
+
+    @property
+    def lookup(self) -> BarcodeLookup:
+        return self._lookup
 
     def scan(self, request: ProductScanRequest) -> ProductScanResult:
         request.one_of_required()
-        if request.barcode and request.barcode in self._barcode_db:
-            record = self._barcode_db[request.barcode]
+        record = self._lookup.lookup(request.barcode) if request.barcode else None
+        if record is not None:
             candidate = ProductCandidate(
                 name=record.name,
                 brand=record.brand,
                 barcode=request.barcode,
-                ingredients=list(record.ingredients),
+                ingredients=self._canonical(record.ingredients),
+                allergens=self._allergens(record.ingredients),
             )
             return ProductScanResult(
                 candidate=candidate, confidence=ConfidenceLevel.HIGH, lookup_strategy="barcode"
             )
 
         if request.label_text:
+            facts = parse_label(request.label_text)
             candidate = ProductCandidate(
-                name=self._infer_name_from_label(request.label_text),
-                ingredients=self._extract_ingredients(request.label_text),
+                name=facts.name or "Unknown Product",
+                ingredients=self._canonical(facts.ingredients[:10]),
+                allergens=self._allergens((request.label_text,)),
             )
             confidence = ConfidenceLevel.MEDIUM if candidate.ingredients else ConfidenceLevel.LOW
             return ProductScanResult(
@@ -73,16 +83,8 @@ class ProductScannerAgent:
             lookup_strategy="fallback",
         )
 
-    @staticmethod
-    def _infer_name_from_label(text: str) -> str:
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        return lines[0] if lines else "Unknown Product"
+    def _canonical(self, ingredients: Sequence[str]) -> list[str]:
+        return [self._ingredients.canonicalize(item) for item in ingredients]
 
-    @staticmethod
-    def _extract_ingredients(text: str) -> list[str]:
-        lowered = text.lower()
-        if "ingredients" not in lowered:
-            return []
-        _, _, tail = lowered.partition("ingredients")
-        parts = tail.replace(":", " ").replace(".", " ").split(",")
-        return [part.strip() for part in parts if part.strip()][:10]
+    def _allergens(self, texts: Sequence[str]) -> list[str]:
+        return self._ingredients.allergens(self._ingredients.find(texts))
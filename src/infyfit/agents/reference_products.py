@@ -0,0 +1,110 @@
+"""Bundled reference products shared by the scanner and the resolver.
+
+The scanner's label facts and the resolver's nutrition facts used to live in
+two separate tables; :func:`reference_records` merges them into unified
+:class:`~infyfit.storage.CatalogueRecord` rows and :func:`reference_lookup`
+serves those rows through one shared :class:`~infyfit.barcodes.BarcodeLookup`.
+"""
+
+from __future__ import annotations
+
+import functools
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Tuple
+
+from ..barcodes import BarcodeLookup
+from ..storage.catalogue import CatalogueRecord
+
+
+@dataclass(frozen=True)
+class ProductRecord:
+    name: str
+    brand: str
+    ingredients: tuple[str, ...]
+
+
+BARCODE_DB: Dict[str, ProductRecord] = {
+    "012345678905": ProductRecord(
+        name="InfyFit Protein Bar",
+        brand="InfyFit Labs",
+        ingredients=("almonds", "whey protein", "honey", "sea salt"),
+    ),
+    "5012345678900": ProductRecord(
+        name="Whole Grain Pita",
+        brand="Whole Hearth",
+        ingredients=("whole wheat", "yeast", "olive oil", "sea salt"),
+    ),
+}
+
+
+ProductEntry = Tuple[str, Dict[str, float], List[str]]
+ProductData = Dict[str, ProductEntry]
+
+PRODUCT_DATA: ProductData = {
+    "012345678905": (
+        "InfyFit Protein Bar",
+        {
+            "calories": 210.0,
+            "protein": 20.0,
+            "fat": 8.0,
+            "carbs": 18.0,
+            "serving_size_g": 60.0,
+        },
+        ["InfyFit Crunch Bar", "InfyFit Nutri Square", "Greek Yogurt"],
+    ),
+    "5012345678900": (
+        "Whole Grain Pita",
+        {
+            "calories": 170.0,
+            "protein": 6.0,
+            "fat": 2.0,
+            "carbs": 32.0,
+            "serving_size_g": 64.0,
+        },
+        ["Sprouted Wheat Wrap", "InfyFit Protein Bar"],
+    ),
+}
+
+
+def reference_records() -> Iterator[CatalogueRecord]:
+    """Merge the bundled scanner and resolver tables into catalogue rows."""
+    for barcode, (name, nutrients, alternatives) in PRODUCT_DATA.items():
+        scanned = BARCODE_DB.get(barcode)
+        yield CatalogueRecord(
+            barcode=barcode,
+            name=name,
+            brand=scanned.brand if scanned else None,
+            ingredients=scanned.ingredients if scanned else (),
+            nutrients=dict(nutrients),
+            alternatives=tuple(alternatives),
+        )
+
+
+def legacy_lookup(
+    barcode_db: Mapping[str, ProductRecord] | None = None,
+    product_data: Mapping[str, ProductEntry] | None = None,
+) -> BarcodeLookup:
+    """Serve tables shaped like :data:`BARCODE_DB` / :data:`PRODUCT_DATA` as a lookup.
+
+    Backs the deprecated ``barcode_db=`` and ``product_data=`` agent arguments.
+    """
+    barcode_db, product_data = barcode_db or {}, product_data or {}
+    records: Dict[str, CatalogueRecord] = {}
+    for barcode in {**barcode_db, **product_data}:
+        scanned, entry = barcode_db.get(barcode), product_data.get(barcode)
+        name, nutrients, alternatives = entry if entry is not None else (scanned.name, {}, [])
+        records[barcode] = CatalogueRecord(
+            barcode=barcode,
+            name=name,
+            brand=scanned.brand if scanned else None,
+            ingredients=scanned.ingredients if scanned else (),
+            nutrients=dict(nutrients),
+            alternatives=tuple(alternatives),
+        )
+    return BarcodeLookup(records)
+
+
+@functools.lru_cache(maxsize=1)
+def reference_lookup() -> BarcodeLookup:
+    """The process-wide lookup over the bundled products."""
+    return BarcodeLookup({record.barcode: record for record in reference_records()})
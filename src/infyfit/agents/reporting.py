@@ -0,0 +1,234 @@
+"""Date-range reports over per-user daily meal and workout rollups.
+
+Every meal scan and workout plan served to a signed-in user adds its totals
+to that user's calendar: one bucket per day of the year plus a Fenwick tree
+over those buckets for each metric.  A report reads day rows straight from
+the buckets and answers each week (and the grand total) with two prefix-sum
+queries, so a year-long report costs O(days) for its daily rows and
+O(log days) per aggregate; the raw request logs are never rescanned.
+
+Rendered CSV files are tracked per user: each build deletes the files whose
+link has expired, and a user's files go with their rollups when the account
+is purged.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import tempfile
+import threading
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from ..data_models import MealScanResult, ReportLink, ReportRequest, WorkoutPlanResult
+
+METRICS: Tuple[str, ...] = (
+    "meals",
+    "meal_calories",
+    "workouts",
+    "workout_minutes",
+    "workout_burn_calories",
+)
+MEAL_METRICS = (0, 1)
+WORKOUT_METRICS = (2, 3, 4)
+REPORT_TTL = timedelta(hours=24)
+# Longest accepted range; keeps one request from rendering decades of rows.
+MAX_REPORT_DAYS = 3 * 366
+
+_DAYS = 366
+_WIDTH = len(METRICS)
+
+
+class _YearBuckets:
+    """Daily buckets of one calendar year with a Fenwick tree per metric."""
+
+    __slots__ = ("days", "tree")
+
+    def __init__(self) -> None:
+        self.days = array("d", bytes(8 * _DAYS * _WIDTH))
+        self.tree = array("d", bytes(8 * (_DAYS + 1) * _WIDTH))
+
+    def add(self, index: int, values: Sequence[float]) -> None:
+        base = index * _WIDTH
+        for metric, value in enumerate(values):
+            self.days[base + metric] += value
+        position = index + 1
+        while position <= _DAYS:
+            base = position * _WIDTH
+            for metric, value in enumerate(values):
+                self.tree[base + metric] += value
+            position += position & -position
+
+    def prefix(self, index: int) -> List[float]:
+        """Per-metric sums of days ``0 .. index - 1``."""
+        totals = [0.0] * _WIDTH
+        position = index
+        while position > 0:
+            base = position * _WIDTH
+            for metric in range(_WIDTH):
+                totals[metric] += self.tree[base + metric]
+            position -= position & -position
+        return totals
+
+
+class DailyRollups:
+    """Per-user calendar of daily metric totals with range sums."""
+
+    def __init__(self) -> None:
+        self._users: Dict[str, Dict[int, _YearBuckets]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, user_id: str, day: date, values: Sequence[float]) -> None:
+        with self._lock:
+            years = self._users.setdefault(user_id, {})
+            buckets = years.get(day.year)
+            if buckets is None:
+                buckets = years[day.year] = _YearBuckets()
+            buckets.add(day.timetuple().tm_yday - 1, values)
+
+    def day(self, user_id: str, day: date) -> Tuple[float, ...]:
+        with self._lock:
+            buckets = self._users.get(user_id, {}).get(day.year)
+            if buckets is None:
+                return (0.0,) * _WIDTH
+            base = (day.timetuple().tm_yday - 1) * _WIDTH
+            return tuple(buckets.days[base : base + _WIDTH])
+
+    def total(self, user_id: str, first: date, last: date) -> List[float]:
+        """Per-metric sums over ``first .. last`` inclusive."""
+        totals = [0.0] * _WIDTH
+        with self._lock:
+            years = self._users.get(user_id, {})
+            for year in range(first.year, last.year + 1):
+                buckets = years.get(year)
+                if buckets is None:
+                    continue
+                start = first.timetuple().tm_yday - 1 if year == first.year else 0
+                end = last.timetuple().tm_yday if year == last.year else _DAYS
+                upper, lower = buckets.prefix(end), buckets.prefix(start)
+                for metric in range(_WIDTH):
+                    totals[metric] += upper[metric] - lower[metric]
+        return totals
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        with self._lock:
+            return sum(self._users.pop(user_id, None) is not None for user_id in user_ids)
+
+
+class ReportingAgent:
+    """Maintain rollups as results are served and render range reports to CSV."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str] | None = None,
+        rollups: DailyRollups | None = None,
+        ttl: timedelta = REPORT_TTL,
+        base_url: Optional[str] = None,
+        today: Callable[[], date] = date.today,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        # Without a directory, a private temporary one is made on the first build.
+        self.directory = Path(directory) if directory is not None else None
+        self.rollups = rollups if rollups is not None else DailyRollups()
+        self.ttl = ttl
+        self.base_url = base_url
+        self.today = today
+        self._clock = clock
+        self._reports: Dict[str, List[Tuple[Path, datetime]]] = {}
+        self._lock = threading.Lock()
+
+    def record_meal(self, user_id: str, result: MealScanResult, day: date | None = None) -> None:
+        values = (1.0, result.total_calories, 0.0, 0.0, 0.0)
+        self.rollups.add(user_id, day if day is not None else self.today(), values)
+
+    def record_workout(
+        self, user_id: str, result: WorkoutPlanResult, day: date | None = None
+    ) -> None:
+        """Count a plan using its headline (first) option."""
+        if not result.options:
+            return
+        option = result.options[0]
+        values = (0.0, 0.0, 1.0, option.duration_minutes, option.estimated_burn_calories)
+        self.rollups.add(user_id, day if day is not None else self.today(), values)
+
+    def build(self, request: ReportRequest) -> ReportLink:
+        """Stream the report for ``request`` into a CSV file and link to it."""
+        if not request.user_id:
+            raise ValueError("user_id is required for a report")
+        if request.to_date < request.from_date:
+            raise ValueError("to_date must not be before from_date")
+        if (request.to_date - request.from_date).days >= MAX_REPORT_DAYS:
+            raise ValueError(f"Reports cover at most {MAX_REPORT_DAYS} days")
+        self.expire()
+        with self._lock:
+            if self.directory is None:
+                self.directory = Path(tempfile.mkdtemp(prefix="infyfit-reports-"))
+            directory = self.directory
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"report-{uuid4().hex}.csv"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8", newline="") as handle:
+            csv.writer(handle).writerows(self._rows(request))
+        os.replace(tmp_path, path)
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            self._reports.setdefault(request.user_id, []).append((path, expires_at))
+        if self.base_url:
+            url = f"{self.base_url.rstrip('/')}/{path.name}"
+        else:
+            url = path.resolve().as_uri()
+        return ReportLink(url=url, expires_at=expires_at)
+
+    def expire(self) -> int:
+        """Delete every report whose link has expired; return how many were removed."""
+        now, removed = self._clock(), 0
+        with self._lock:
+            for user_id in list(self._reports):
+                reports = self._reports[user_id]
+                live = [(path, expires_at) for path, expires_at in reports if expires_at > now]
+                for path, expires_at in reports:
+                    if expires_at <= now:
+                        path.unlink(missing_ok=True)
+                        removed += 1
+                if live:
+                    self._reports[user_id] = live
+                else:
+                    del self._reports[user_id]
+        return removed
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        """Drop the rollups of ``user_ids`` and delete their rendered reports."""
+        ids = list(user_ids)
+        with self._lock:
+            for user_id in ids:
+                for path, _ in self._reports.pop(user_id, ()):
+                    path.unlink(missing_ok=True)
+        return self.rollups.purge_users(ids)
+
+    def _rows(self, request: ReportRequest) -> Iterator[Sequence[object]]:
+        metrics = (MEAL_METRICS if request.include_meals else ()) + (
+            WORKOUT_METRICS if request.include_workouts else ()
+        )
+        user_id, first, last = request.user_id, request.from_date, request.to_date
+        yield ("period", "start", "end", *(METRICS[metric] for metric in metrics))
+
+        def row(period: str, start: date, end: date, values: Sequence[float]):
+            return (period, start.isoformat(), end.isoformat(), *(values[m] for m in metrics))
+
+        day = first
+        while day <= last:
+            yield row("day", day, day, self.rollups.day(user_id, day))
+            day += timedelta(days=1)
+        week = first - timedelta(days=first.weekday())
+        while week <= last:
+            start, end = max(week, first), min(week + timedelta(days=6), last)
+            yield row("week", start, end, self.rollups.total(user_id, start, end))
+            week += timedelta(days=7)
+        yield row("total", first, last, self.rollups.total(user_id, first, last))
+
+
+__all__ = ["DailyRollups", "METRICS", "ReportingAgent"]
@@ -2,17 +2,230 @@
 
 from __future__ import annotations
 
-from ..data_models import TelemetryEvent, TelemetryResponse
+import json
+import math
+import threading
+import time
+from array import array
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from ..data_models import (
+    LatencySummary,
+    TelemetryBatchResponse,
+    TelemetryEvent,
+    TelemetryPercentilesRequest,
+    TelemetryPercentilesResponse,
+    TelemetryResponse,
+)
+from ..sketches import SketchSnapshot, WindowedSketch
+from ..storage.spans import SpanBuffer
+
+# Name id recorded for event names that fail validation.
+_REJECTED = -1
 
 
 class TelemetryAgent:
-    """Accepts spans and enforces minimal validation to mimic collector guardrails."""
+    """Accepts spans and enforces minimal validation to mimic collector guardrails.
+
+    Accepted spans are appended to a columnar :class:`SpanBuffer`.  The bulk
+    entry points validate whole batches against a per-name verdict cache and
+    never build a :class:`TelemetryEvent` per span.
+
+    Every accepted span also lands in a per-name :class:`WindowedSketch`, so
+    rolling-window percentiles and success rates are answered from histogram
+    buckets rather than raw spans.
+    """
 
     MAX_DURATION_MS = 5_000.0
+    MAX_EVENT_NAMES = 1 << 16
+    STREAM_CHUNK = 4096
+    SKETCH_SLOT_SECONDS = 10
+    SKETCH_SLOTS = 360
+
+    def __init__(
+        self, buffer: SpanBuffer | None = None, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.buffer = buffer if buffer is not None else SpanBuffer()
+        self._clock = clock
+        self._verdicts: Dict[str, int] = {}
+        self._sketches: Dict[int, WindowedSketch] = {}
+        self._sketch_lock = threading.Lock()
+
+    @property
+    def max_window_s(self) -> int:
+        return self.SKETCH_SLOT_SECONDS * self.SKETCH_SLOTS
 
     def ingest(self, event: TelemetryEvent) -> TelemetryResponse:
-        if event.duration_ms > self.MAX_DURATION_MS:
+        # The chained comparison is False for NaN, so non-finite durations are refused.
+        if not -math.inf < event.duration_ms <= self.MAX_DURATION_MS:
             return TelemetryResponse(accepted=False)
         if not event.event_name.startswith("infyfit"):
             return TelemetryResponse(accepted=False)
+        name_id = self._name_id(event.event_name)
+        if name_id == _REJECTED:
+            return TelemetryResponse(accepted=False)
+        self.buffer.append(name_id, event.duration_ms, event.success)
+        with self._sketch_lock:
+            self._sketch(name_id).record(event.duration_ms, event.success, self._clock())
         return TelemetryResponse(accepted=True)
+
+    def record_span(self, event_name: str, duration_ms: float, success: bool) -> None:
+        """Record a trusted server-side span, bypassing the client duration cap."""
+        name_id = self._name_id(event_name)
+        if name_id == _REJECTED or not math.isfinite(duration_ms):
+            return
+        self.buffer.append(name_id, duration_ms, success)
+        with self._sketch_lock:
+            self._sketch(name_id).record(duration_ms, success, self._clock())
+
+    def ingest_columns(
+        self,
+        names: Sequence[str],
+        durations_ms: Sequence[float],
+        successes: Sequence[bool],
+        kept: List[int] | None = None,
+    ) -> TelemetryBatchResponse:
+        """Validate and buffer spans supplied as parallel columns.
+
+        When ``kept`` is given, the row index of every accepted span is appended to it.
+        """
+        ids, durations, flags = array("I"), array("d"), array("B")
+        verdicts = self._verdicts
+        limit = self.MAX_DURATION_MS
+        for row, (name, duration, success) in enumerate(zip(names, durations_ms, successes)):
+            name_id = verdicts.get(name)
+            if name_id is None:
+                name_id = self._name_id(name)
+            if name_id == _REJECTED or not -math.inf < duration <= limit:
+                continue
+            if kept is not None:
+                kept.append(row)
+            ids.append(name_id)
+            durations.append(duration)
+            flags.append(success)
+        self.buffer.extend(ids, durations, flags)
+        self._record_columns(ids, durations, flags)
+        accepted = len(ids)
+        return TelemetryBatchResponse(accepted=accepted, rejected=len(names) - accepted)
+
+    def ingest_batch(self, events: Iterable[Mapping[str, Any]]) -> TelemetryBatchResponse:
+        """Validate raw span dictionaries in bulk; malformed spans count as rejected."""
+        return self.ingest_events(events)[0]
+
+    def ingest_events(
+        self, events: Iterable[Mapping[str, Any]]
+    ) -> Tuple[TelemetryBatchResponse, List[Mapping[str, Any]]]:
+        """Like :meth:`ingest_batch`, also returning the spans that were accepted."""
+        parsed: List[Mapping[str, Any]] = []
+        names, durations, successes = [], array("d"), array("B")
+        malformed = 0
+        for event in events:
+            try:
+                name = str(event.get("event_name", ""))
+                duration = float(event.get("duration_ms", 0.0))
+                success = bool(event.get("success", True))
+            except (AttributeError, TypeError, ValueError):
+                malformed += 1
+                continue
+            parsed.append(event)
+            names.append(name)
+            durations.append(duration)
+            successes.append(success)
+        kept: List[int] = []
+        result = self.ingest_columns(names, durations, successes, kept)
+        result.rejected += malformed
+        return result, [parsed[row] for row in kept]
+
+    def ingest_stream(self, lines: Iterable[str | bytes]) -> TelemetryBatchResponse:
+        """Ingest newline-delimited JSON spans in fixed-size chunks."""
+        accepted = rejected = 0
+        events = (json.loads(line) for line in lines if line.strip())
+        while True:
+            chunk = list(islice(events, self.STREAM_CHUNK))
+            if not chunk:
+                break
+            result = self.ingest_batch(chunk)
+            accepted += result.accepted
+            rejected += result.rejected
+        return TelemetryBatchResponse(accepted=accepted, rejected=rejected)
+
+    def snapshot(self, window_s: float) -> SketchSnapshot:
+        """Merge each event's sketch slots for the last ``window_s`` seconds.
+
+        Snapshots from other worker processes can be merged into the result
+        with :meth:`SketchSnapshot.merge` at a cost proportional to buckets.
+        Raises ``ValueError`` unless ``0 < window_s <= max_window_s``.
+        """
+        if not 0 < window_s <= self.max_window_s:
+            raise ValueError(f"window_s must be between 1 and {self.max_window_s}")
+        now = self._clock()
+        names = self.buffer.names
+        snapshot = SketchSnapshot(window_s=window_s)
+        with self._sketch_lock:
+            for name_id, sketch in self._sketches.items():
+                histogram, successes, failures = sketch.snapshot(window_s, now)
+                if histogram.count:
+                    snapshot.add(names[name_id], histogram, successes, failures)
+        return snapshot
+
+    def percentiles(
+        self, request: TelemetryPercentilesRequest, peers: Iterable[SketchSnapshot] = ()
+    ) -> TelemetryPercentilesResponse:
+        """Summarise the rolling window, optionally merged with peer snapshots."""
+        snapshot = self.snapshot(request.window_s)
+        for peer in peers:
+            snapshot.merge(peer)
+        return summarise(snapshot, request.event_name)
+
+    def _sketch(self, name_id: int) -> WindowedSketch:
+        sketch = self._sketches.get(name_id)
+        if sketch is None:
+            sketch = self._sketches[name_id] = WindowedSketch(
+                slot_seconds=self.SKETCH_SLOT_SECONDS, max_slots=self.SKETCH_SLOTS
+            )
+        return sketch
+
+    def _record_columns(self, ids: array, durations: array, flags: array) -> None:
+        grouped: Dict[int, List[Tuple[float, bool]]] = {}
+        for name_id, duration, success in zip(ids, durations, flags):
+            spans = grouped.get(name_id)
+            if spans is None:
+                spans = grouped[name_id] = []
+            spans.append((duration, success))
+        now = self._clock()
+        with self._sketch_lock:
+            for name_id, spans in grouped.items():
+                self._sketch(name_id).record_many(spans, now)
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._verdicts.get(name)
+        if name_id is not None:
+            return name_id
+        if not name.startswith("infyfit") or len(self._verdicts) >= self.MAX_EVENT_NAMES:
+            # Unknown names past the cap are rejected without being cached.
+            return _REJECTED
+        name_id = self._verdicts[name] = self.buffer.name_id(name)
+        return name_id
+
+
+def summarise(
+    snapshot: SketchSnapshot, event_name: str | None = None
+) -> TelemetryPercentilesResponse:
+    """Turn a (possibly merged) snapshot into per-event percentile summaries."""
+    events = []
+    for name in sorted(snapshot.events):
+        if event_name is not None and name != event_name:
+            continue
+        histogram, successes, failures = snapshot.events[name]
+        events.append(
+            LatencySummary(
+                event_name=name,
+                count=histogram.count,
+                success_rate=round(successes / max(successes + failures, 1), 4),
+                p50_ms=round(histogram.quantile(0.50), 3),
+                p95_ms=round(histogram.quantile(0.95), 3),
+                p99_ms=round(histogram.quantile(0.99), 3),
+            )
+        )
+    return TelemetryPercentilesResponse(window_s=int(snapshot.window_s), events=events)
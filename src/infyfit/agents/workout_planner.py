@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
-from typing import List
+from dataclasses import replace
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 from ..data_models import WorkoutPlanOption, WorkoutPlanRequest, WorkoutPlanResult
+from ..storage.timeseries import HealthTimeSeries
 
 
 INTENSITY_FACTORS = {
@@ -16,20 +19,142 @@ INTENSITY_FACTORS = {
 BASE_DURATION = {"short": 20.0, "standard": 40.0, "recovery": 25.0}
 
 
+# Plans are tabulated for intake up to 2000 + MAX_INTAKE_STEPS * 500 kcal.
+INTAKE_STEP_KCAL = 500
+INTAKE_BASELINE_KCAL = 2000
+MAX_INTAKE_STEPS = 16
+LOW_SLEEP = frozenset({"poor", "fair"})
+ACTIVE_STEPS = 10000
+
+_LABELS = ("short", "standard", "recovery")
+_GOALS = tuple(INTENSITY_FACTORS)
+_GOAL_INDEX = {goal: index for index, goal in enumerate(_GOALS)}
+_DEFAULT_GOAL = _GOAL_INDEX["maintenance"]
+
+PlanCell = Tuple[Tuple[str, float, str, float], ...]
+
+
 class WorkoutPlannerAgent:
-    """Generate short, standard, and recovery plans based on user context."""
+    """Generate short, standard, and recovery plans based on user context.
+
+    Every plan depends only on the goal, a low-sleep flag, a >10k-steps flag
+    and how many 500 kcal steps intake exceeds 2000 kcal.  Those cells are
+    computed once at construction; requests that fall between intake steps
+    or beyond the table take the exact path.
+
+    With a :class:`HealthTimeSeries`, requests from a known user that leave
+    ``steps_today`` or ``sleep_quality`` unset take them from the synced
+    health history instead.
+    """
+
+    def __init__(
+        self,
+        health: HealthTimeSeries | None = None,
+        today: Callable[[], date] = date.today,
+    ) -> None:
+        self.health = health
+        self.today = today
+        self._table: List[PlanCell] = [
+            self._cell(goal, low_sleep, active, step)
+            for goal in _GOALS
+            for low_sleep in (False, True)
+            for active in (False, True)
+            for step in range(MAX_INTAKE_STEPS + 1)
+        ]
 
     def build_plan(self, request: WorkoutPlanRequest) -> WorkoutPlanResult:
+        if self.health is not None:
+            request = self._with_health(request)
+        index = self._index(request)
+        if index is None:
+            return self._build_exact(request)
+        return self._result(self._table[index])
+
+    def build_plans(self, requests: Sequence[WorkoutPlanRequest]) -> List[WorkoutPlanResult]:
+        """Plan a batch, normalising each distinct goal and sleep string only once."""
+        if self.health is not None:
+            requests = [self._with_health(request) for request in requests]
+        table = self._table
+        width = MAX_INTAKE_STEPS + 1
+        goals: Dict[str, int] = {}
+        sleeps: Dict[str, bool] = {}
+        results: List[WorkoutPlanResult] = []
+        append = results.append
+        for request in requests:
+            excess = request.recent_intake - INTAKE_BASELINE_KCAL
+            step = 0
+            if excess > 0:
+                step, remainder = divmod(excess, INTAKE_STEP_KCAL)
+                if remainder or step > MAX_INTAKE_STEPS:
+                    append(self._build_exact(request))
+                    continue
+            goal = goals.get(request.goal)
+            if goal is None:
+                goal = goals[request.goal] = _GOAL_INDEX.get(request.goal.lower(), _DEFAULT_GOAL)
+            low_sleep = sleeps.get(request.sleep_quality)
+            if low_sleep is None:
+                low_sleep = sleeps[request.sleep_quality] = (
+                    request.sleep_quality.lower() in LOW_SLEEP
+                )
+            active = request.steps_today > ACTIVE_STEPS
+            cell = table[((goal * 2 + low_sleep) * 2 + active) * width + int(step)]
+            append(WorkoutPlanResult(options=[WorkoutPlanOption(*row) for row in cell]))
+        return results
+
+    def _with_health(self, request: WorkoutPlanRequest) -> WorkoutPlanRequest:
+        if not request.user_id or (request.steps_today and request.sleep_quality != "unknown"):
+            return request
+        steps, sleep = self.health.recent(request.user_id, self.today())
+        if request.sleep_quality != "unknown" or sleep is None:
+            sleep = request.sleep_quality
+        return replace(request, steps_today=request.steps_today or steps or 0, sleep_quality=sleep)
+
+    @staticmethod
+    def _index(request: WorkoutPlanRequest) -> Optional[int]:
+        excess = request.recent_intake - INTAKE_BASELINE_KCAL
+        if excess <= 0:
+            step = 0
+        else:
+            step, remainder = divmod(excess, INTAKE_STEP_KCAL)
+            if remainder or step > MAX_INTAKE_STEPS:
+                return None
+        goal = _GOAL_INDEX.get(request.goal.lower(), _DEFAULT_GOAL)
+        low_sleep = request.sleep_quality.lower() in LOW_SLEEP
+        active = request.steps_today > ACTIVE_STEPS
+        return ((goal * 2 + low_sleep) * 2 + active) * (MAX_INTAKE_STEPS + 1) + int(step)
+
+    @staticmethod
+    def _result(cell: PlanCell) -> WorkoutPlanResult:
+        return WorkoutPlanResult(options=[WorkoutPlanOption(*row) for row in cell])
+
+    def _cell(self, goal: str, low_sleep: bool, active: bool, step: int) -> PlanCell:
+        request = WorkoutPlanRequest(
+            goal=goal,
+            recent_intake=INTAKE_BASELINE_KCAL + step * INTAKE_STEP_KCAL,
+            steps_today=ACTIVE_STEPS + 1 if active else 0,
+            sleep_quality="poor" if low_sleep else "good",
+        )
+        return tuple(
+            (
+                option.label,
+                option.duration_minutes,
+                option.intensity,
+                option.estimated_burn_calories,
+            )
+            for option in self._build_exact(request).options
+        )
+
+    def _build_exact(self, request: WorkoutPlanRequest) -> WorkoutPlanResult:
         goal = request.goal.lower()
         goal = goal if goal in INTENSITY_FACTORS else "maintenance"
         intensity_map = INTENSITY_FACTORS[goal]
 
-        sleep_penalty = 0.8 if request.sleep_quality.lower() in {"poor", "fair"} else 1.0
-        activity_bonus = 0.9 if request.steps_today > 10000 else 1.0
-        caloric_delta = max(request.recent_intake - 2000, 0) / 500.0
+        sleep_penalty = 0.8 if request.sleep_quality.lower() in LOW_SLEEP else 1.0
+        activity_bonus = 0.9 if request.steps_today > ACTIVE_STEPS else 1.0
+        caloric_delta = max(request.recent_intake - INTAKE_BASELINE_KCAL, 0) / 500.0
 
         options: List[WorkoutPlanOption] = []
-        for label in ("short", "standard", "recovery"):
+        for label in _LABELS:
             factor = intensity_map[label] * sleep_penalty * activity_bonus
             duration = BASE_DURATION[label] * (1 + caloric_delta * 0.1 if label != "recovery" else 1)
             burn = 6.0 * duration * factor
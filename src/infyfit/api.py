@@ -3,23 +3,30 @@
 The real project uses FastAPI, but to keep the tests runnable without
 third-party packages we expose the same contract through a tiny
 framework-compatible surface.  Routes receive dictionaries from the test
-client and return serialisable payloads.
+client and return serialisable payloads, or pre-encoded JSON bytes on the
+hottest routes.
 """
 
 from __future__ import annotations
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 
 from .data_models import (
     CoachRequest,
+    HealthSyncRequest,
+    MealScanBatchRequest,
     MealScanRequest,
     NutritionResolverRequest,
     OfflineSyncRequest,
     PrivacyRequest,
     ProductScanRequest,
+    ReportRequest,
     TelemetryEvent,
+    TelemetryPercentilesRequest,
     WorkoutPlanRequest,
 )
+from .exports import ExportState
 from .services import ServiceContainer
 
 
@@ -30,11 +37,21 @@ def _ensure_payload(data: dict | None) -> dict:
 def create_app(container: ServiceContainer | None = None) -> FastAPI:
     container = container or ServiceContainer.default()
     app = FastAPI(title="InfyFit Reference Backend", version="0.2.0")
+    if container.compactor is not None:
+        # Purge expired tombstones in the background for as long as the server runs.
+        app.on_event("startup")(container.compactor.start)
+        app.on_event("shutdown")(container.compactor.stop)
 
     @app.post("/scan/meal")
     def scan_meal(payload: dict | None = None):
         request = MealScanRequest.from_dict(_ensure_payload(payload))
         result = container.estimate_meal(request)
+        return result.to_json_bytes()
+
+    @app.post("/scan/meal/batch")
+    def scan_meal_batch(payload: dict | None = None):
+        request = MealScanBatchRequest.from_dict(_ensure_payload(payload))
+        result = container.estimate_meals(request)
         return result.to_dict()
 
     @app.post("/scan/product")
@@ -49,8 +66,18 @@ def create_app(container: ServiceContainer | None = None) -> FastAPI:
     @app.post("/product/resolve")
     def resolve_product(payload: dict | None = None):
         request = NutritionResolverRequest.from_dict(_ensure_payload(payload))
-        result = container.resolve_product(request)
-        return result.to_dict()
+        return container.resolve_product_json(request)
+
+    @app.get("/product/{barcode}")
+    def lookup_product(barcode: str, params: dict | None = None):
+        query = _ensure_payload(params)
+        flags = query.get("dietary_flags", "")
+        request = NutritionResolverRequest(
+            barcode=barcode,
+            locale=str(query.get("locale", "en_US")),
+            dietary_flags=[flag for flag in flags.split(",") if flag] if flags else [],
+        )
+        return container.resolve_product_json(request)
 
     @app.post("/workout/plan")
     def workout_plan(payload: dict | None = None):
@@ -61,19 +88,58 @@ def create_app(container: ServiceContainer | None = None) -> FastAPI:
     @app.post("/coach/card")
     def coach_card(payload: dict | None = None):
         request = CoachRequest.from_dict(_ensure_payload(payload))
-        result = container.generate_coach_card(request)
-        return result.to_dict()
+        return container.coach_card_json(request)
 
     @app.post("/sync/offline")
     def offline_sync(payload: dict | None = None):
         request = OfflineSyncRequest.from_dict(_ensure_payload(payload))
-        result = container.flush_offline_queue(request)
+        try:
+            result = container.flush_offline_queue(request)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return result.to_dict()
+
+    @app.post("/sync/health")
+    def health_sync(payload: dict | None = None):
+        try:
+            request = HealthSyncRequest.from_dict(_ensure_payload(payload))
+            result = container.sync_health(request)
+        except KeyError as exc:
+            raise HTTPException(status_code=400, detail=f"Missing field {exc}") from exc
+        except (TypeError, ValueError) as exc:  # binascii.Error is a ValueError too
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
         return result.to_dict()
 
     @app.post("/privacy")
     def privacy(payload: dict | None = None):
         request = PrivacyRequest.from_dict(_ensure_payload(payload))
-        result = container.handle_privacy(request)
+        try:
+            result = container.handle_privacy(request)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return result.to_dict()
+
+    @app.get("/privacy/export/{user_id}")
+    def privacy_export(user_id: str, params: dict | None = None):
+        # 200 with the download link once ready; 202 {"state": ...} while queued or running.
+        job = container.export_status(user_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"No export for {user_id}")
+        if job.state == ExportState.FAILED:
+            raise HTTPException(status_code=500, detail=f"Export failed: {job.error}")
+        if job.state != ExportState.READY:
+            return JSONResponse({"state": job.state}, status_code=202)
+        return container.export_link(job).to_dict()
+
+    @app.post("/report")
+    def report(payload: dict | None = None):
+        try:
+            request = ReportRequest.from_dict(_ensure_payload(payload))
+            result = container.build_report(request)
+        except KeyError as exc:
+            raise HTTPException(status_code=400, detail=f"Missing field {exc}") from exc
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
         return result.to_dict()
 
     @app.post("/telemetry")
@@ -82,6 +148,38 @@ def create_app(container: ServiceContainer | None = None) -> FastAPI:
         result = container.ingest_telemetry(event)
         return result.to_dict()
 
+    @app.post("/telemetry/batch")
+    def telemetry_batch(payload: dict | None = None):
+        # Spans stay raw dictionaries; the agent validates them column-wise.
+        events = _ensure_payload(payload).get("events", [])
+        if not isinstance(events, list):
+            raise HTTPException(status_code=400, detail="events must be a list")
+        result = container.ingest_telemetry_batch(events)
+        return result.to_dict()
+
+    @app.get("/telemetry/percentiles")
+    def telemetry_percentiles(params: dict | None = None):
+        try:
+            request = TelemetryPercentilesRequest.from_dict(_ensure_payload(params))
+            result = container.telemetry_percentiles(request)
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return result.to_json_bytes()
+
+    @app.get("/telemetry/sketches")
+    def telemetry_sketches(params: dict | None = None):
+        # Raw per-process sketches for an aggregator to merge across workers.
+        try:
+            window_s = float(_ensure_payload(params).get("window_s", 300))
+            result = container.telemetry_sketches(window_s)
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return result.to_dict()
+
+    @app.get("/metrics")
+    def metrics(params: dict | None = None):
+        return container.metrics()
+
     return app
 
 
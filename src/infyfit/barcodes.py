@@ -0,0 +1,143 @@
+"""Shared barcode normalisation and product lookup.
+
+Barcodes arrive as EAN-8, UPC-A, EAN-13 or GTIN-14 strings, sometimes with
+spaces or hyphens.  :func:`normalize_barcode` validates the GS1 check digit
+and zero-pads to GTIN-14, so ``012345678905`` and ``0012345678905`` name the
+same product.
+
+:class:`BarcodeLookup` fronts a product mapping (an in-memory dict or a
+memory-mapped :class:`~infyfit.storage.ProductCatalogue`) with a Bloom
+filter over the canonical keys and a bounded negative cache for the Bloom
+filter's false positives, so unknown barcodes rarely touch the source.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, Mapping, Optional
+
+from .cache import TTLCache
+
+if TYPE_CHECKING:  # storage imports this module for barcode normalisation
+    from .storage.catalogue import CatalogueRecord
+
+GTIN_LENGTHS = (8, 12, 13, 14)
+GTIN_WIDTH = 14
+
+
+def check_digit(body: str) -> int:
+    """GS1 mod-10 check digit for the digits preceding it."""
+    total = sum(
+        int(digit) * (3 if position % 2 == 0 else 1)
+        for position, digit in enumerate(reversed(body))
+    )
+    return (10 - total % 10) % 10
+
+
+def normalize_barcode(raw: str) -> Optional[str]:
+    """Return the zero-padded GTIN-14 for ``raw`` or ``None`` when it is not valid."""
+    digits = raw.strip().replace(" ", "").replace("-", "")
+    if len(digits) not in GTIN_LENGTHS or not (digits.isascii() and digits.isdigit()):
+        return None
+    if check_digit(digits[:-1]) != int(digits[-1]):
+        return None
+    return digits.zfill(GTIN_WIDTH)
+
+
+def _source_keys(gtin: str) -> Iterator[str]:
+    """Spellings under which a source may store ``gtin``, longest first."""
+    yield gtin
+    for length in GTIN_LENGTHS[-2::-1]:
+        prefix = gtin[: GTIN_WIDTH - length]
+        if prefix.strip("0"):
+            return
+        yield gtin[GTIN_WIDTH - length :]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one BLAKE2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode("ascii"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] >> (position & 7) & 1 for position in self._positions(key))
+
+
+class BarcodeLookup:
+    """Normalising, Bloom-filtered lookup over a ``Mapping[str, CatalogueRecord]``."""
+
+    NEGATIVE_CACHE_ENTRIES = 1 << 16
+    NEGATIVE_TTL_S = 300.0
+
+    def __init__(
+        self,
+        records: Mapping[str, CatalogueRecord],
+        negative_cache: TTLCache[bool] | None = None,
+        error_rate: float = 0.01,
+    ) -> None:
+        self.records = records
+        self.negative_cache = (
+            negative_cache
+            if negative_cache is not None
+            else TTLCache(max_entries=self.NEGATIVE_CACHE_ENTRIES)
+        )
+        self.bloom = BloomFilter(len(records), error_rate)
+        for key in records:
+            canonical = normalize_barcode(key)
+            if canonical is not None:
+                self.bloom.add(canonical)
+        self._counters: Dict[str, int] = dict.fromkeys(
+            ("lookups", "hits", "invalid", "bloom_rejects", "negative_hits", "false_positives"), 0
+        )
+        self._lock = threading.Lock()
+
+    def lookup(self, barcode: str) -> Optional[CatalogueRecord]:
+        canonical = normalize_barcode(barcode)
+        if canonical is None:
+            self._count("invalid")
+            return None
+        if canonical not in self.bloom:
+            self._count("bloom_rejects")
+            return None
+        if self.negative_cache.get(canonical):
+            self._count("negative_hits")
+            return None
+        records = self.records
+        for key in _source_keys(canonical):
+            record = records.get(key)
+            if record is not None:
+                self._count("hits")
+                return record
+        self._count("false_positives")
+        self.negative_cache.put(canonical, True, self.NEGATIVE_TTL_S)
+        return None
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self._counters["lookups"] += 1
+            self._counters[outcome] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+__all__ = ["BarcodeLookup", "BloomFilter", "check_digit", "normalize_barcode"]
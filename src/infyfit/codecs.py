@@ -0,0 +1,216 @@
+"""Schema-compiled ``from_dict``/``to_dict`` codecs for the data models.
+
+Decorating a dataclass with :func:`codec` reads its fields and type hints
+once and generates three specialised functions with :func:`exec`:
+
+* ``to_dict`` - build the JSON-compatible dictionary for an instance,
+* ``from_dict`` - coerce a decoded JSON object into the dataclass,
+* ``to_json_bytes`` - write compact JSON (``separators=(",", ":")``)
+  straight from the attributes without an intermediate dictionary.
+
+Fields that the constructor requires but the wire format treats as
+optional declare their default with :func:`wire_default`.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import math
+import typing
+from datetime import date, datetime
+from enum import Enum
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, List, Union
+
+_MISSING = dataclasses.MISSING
+_WIRE_DEFAULT = "infyfit.wire_default"
+_WIRE_DEFAULT_FACTORY = "infyfit.wire_default_factory"
+
+_JSON_ENCODERS: Dict[type, Callable[[Any], str]] = {}
+
+
+def wire_default(value: Any = _MISSING, *, factory: Callable[[], Any] | Any = _MISSING) -> Any:
+    """Declare a field required by the constructor but optional in ``from_dict``."""
+    if (value is _MISSING) == (factory is _MISSING):
+        raise TypeError("wire_default() takes exactly one of value or factory")
+    if factory is not _MISSING:
+        return dataclasses.field(metadata={_WIRE_DEFAULT_FACTORY: factory})
+    return dataclasses.field(metadata={_WIRE_DEFAULT: value})
+
+
+def _json_float(value: Any) -> str:
+    number = float(value)
+    if math.isfinite(number):
+        return float.__repr__(number)
+    return json.dumps(number)
+
+
+def _json_any(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class _Compiler:
+    """Turn type hints into Python expressions inside one generated module."""
+
+    def __init__(self, cls: type) -> None:
+        self.cls = cls
+        self.namespace: Dict[str, Any] = {
+            "_MISSING": _MISSING,
+            "_str": encode_basestring_ascii,
+            "_float": _json_float,
+            "_any": _json_any,
+        }
+        self._depth = 0
+
+    def ref(self, obj: Any) -> str:
+        name = f"_ref{len(self.namespace)}"
+        self.namespace[name] = obj
+        return name
+
+    def _loop_var(self) -> str:
+        self._depth += 1
+        return f"_item{self._depth}"
+
+    @staticmethod
+    def _optional_inner(tp: Any) -> Any:
+        if typing.get_origin(tp) is Union:
+            args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+            if len(args) == 1 and len(typing.get_args(tp)) == 2:
+                return args[0]
+        return None
+
+    def encode(self, tp: Any, expr: str) -> str:
+        inner = self._optional_inner(tp)
+        if inner is not None:
+            encoded = self.encode(inner, expr)
+            return expr if encoded == expr else f"(None if {expr} is None else {encoded})"
+        if tp in (str, Any):
+            return expr
+        if tp in (float, int, bool):
+            return f"{tp.__name__}({expr})"
+        if isinstance(tp, type) and issubclass(tp, Enum):
+            return f"{expr}.value"
+        if tp in (date, datetime):
+            return f"{expr}.isoformat()"
+        if dataclasses.is_dataclass(tp):
+            return f"{self.ref(tp.to_dict)}({expr})"
+        origin = typing.get_origin(tp)
+        if origin in (list, List):
+            var = self._loop_var()
+            item = self.encode(typing.get_args(tp)[0], var)
+            return f"list({expr})" if item == var else f"[{item} for {var} in {expr}]"
+        if origin in (dict, Dict):
+            return f"dict({expr})"
+        raise TypeError(f"{self.cls.__name__}: unsupported field type {tp!r}")
+
+    def decode(self, tp: Any, expr: str, top_level: bool = True) -> str:
+        inner = self._optional_inner(tp)
+        if inner is not None:
+            return f"(None if {expr} is None else {self.decode(inner, expr, top_level)})"
+        if tp is Any or (tp is str and not top_level):
+            return expr
+        if tp in (str, float, int, bool):
+            return f"{tp.__name__}({expr})"
+        if isinstance(tp, type) and issubclass(tp, Enum):
+            return f"{self.ref(tp)}({expr})"
+        if tp in (date, datetime):
+            return f"{self.ref(tp.fromisoformat)}({expr})"
+        if dataclasses.is_dataclass(tp):
+            return f"{self.ref(tp.from_dict)}({expr})"
+        origin = typing.get_origin(tp)
+        if origin in (list, List):
+            var = self._loop_var()
+            item = self.decode(typing.get_args(tp)[0], var, top_level=False)
+            return f"list({expr})" if item == var else f"[{item} for {var} in {expr}]"
+        if origin in (dict, Dict):
+            return f"dict({expr})"
+        raise TypeError(f"{self.cls.__name__}: unsupported field type {tp!r}")
+
+    def to_json(self, tp: Any, expr: str) -> str:
+        inner = self._optional_inner(tp)
+        if inner is not None:
+            return f'("null" if {expr} is None else {self.to_json(inner, expr)})'
+        if tp is str:
+            return f"_str({expr})"
+        if tp is float:
+            return f"_float({expr})"
+        if tp is int:
+            return f"str(int({expr}))"
+        if tp is bool:
+            return f'("true" if {expr} else "false")'
+        if isinstance(tp, type) and issubclass(tp, Enum):
+            return f"_str({expr}.value)" if issubclass(tp, str) else f"_any({expr}.value)"
+        if tp in (date, datetime):
+            return f'(\'"\' + {expr}.isoformat() + \'"\')'
+        if dataclasses.is_dataclass(tp) and tp in _JSON_ENCODERS:
+            return f"{self.ref(_JSON_ENCODERS[tp])}({expr})"
+        origin = typing.get_origin(tp)
+        if origin in (list, List):
+            var = self._loop_var()
+            item = self.to_json(typing.get_args(tp)[0], var)
+            return f'("[" + ",".join([{item} for {var} in {expr}]) + "]")'
+        return f"_any({expr})"
+
+    def compile(self, name: str, source: str) -> Callable[..., Any]:
+        exec(compile(source, f"<codec {self.cls.__qualname__}.{name}>", "exec"), self.namespace)
+        function = self.namespace[name]
+        function.__qualname__ = f"{self.cls.__qualname__}.{name}"
+        return function
+
+
+def codec(cls: type) -> type:
+    """Attach generated ``to_dict``, ``from_dict`` and ``to_json_bytes`` to ``cls``."""
+    hints = typing.get_type_hints(cls)
+    fields = dataclasses.fields(cls)
+    compiler = _Compiler(cls)
+
+    entries = ", ".join(
+        f"{field.name!r}: {compiler.encode(hints[field.name], f'self.{field.name}')}"
+        for field in fields
+    )
+    to_dict = compiler.compile("to_dict", f"def to_dict(self):\n    return {{{entries}}}\n")
+
+    lines = ["def from_dict(cls, data=None):", "    data = data or {}"]
+    for field in fields:
+        value = compiler.decode(hints[field.name], "_value")
+        if field.default is not _MISSING:
+            default = compiler.ref(field.default)
+        elif field.default_factory is not _MISSING:
+            default = f"{compiler.ref(field.default_factory)}()"
+        elif _WIRE_DEFAULT in field.metadata:
+            default = compiler.ref(field.metadata[_WIRE_DEFAULT])
+        elif _WIRE_DEFAULT_FACTORY in field.metadata:
+            default = f"{compiler.ref(field.metadata[_WIRE_DEFAULT_FACTORY])}()"
+        else:
+            lines.append(f"    _value = data[{field.name!r}]")
+            lines.append(f"    f_{field.name} = {value}")
+            continue
+        lines.append(f"    _value = data.get({field.name!r}, _MISSING)")
+        lines.append(f"    f_{field.name} = {default} if _value is _MISSING else {value}")
+    arguments = ", ".join(f"{field.name}=f_{field.name}" for field in fields)
+    lines.append(f"    return cls({arguments})")
+    from_dict = compiler.compile("from_dict", "\n".join(lines) + "\n")
+
+    parts: List[str] = []
+    for position, field in enumerate(fields):
+        prefix = "{" if position == 0 else ","
+        parts.append(repr(f"{prefix}{json.dumps(field.name)}:"))
+        parts.append(compiler.to_json(hints[field.name], f"self.{field.name}"))
+    parts.append(repr("}" if fields else "{}"))
+    to_json = compiler.compile(
+        "to_json", f"def to_json(self):\n    return ''.join(({', '.join(parts)},))\n"
+    )
+    _JSON_ENCODERS[cls] = to_json
+
+    def to_json_bytes(self: Any) -> bytes:
+        """Serialise to compact JSON bytes without building a dictionary."""
+        return to_json(self).encode("ascii")
+
+    cls.to_dict = to_dict
+    cls.from_dict = classmethod(from_dict)
+    cls.to_json_bytes = to_json_bytes
+    return cls
+
+
+__all__ = ["codec", "wire_default"]
@@ -0,0 +1,92 @@
+"""Account deletion: tombstone now, purge in bulk after the cancel window.
+
+A delete request only writes a tombstone (see
+:class:`~infyfit.storage.TombstoneStore`), which hides the user from reads
+straight away and can be lifted until the window ends.  The
+:class:`DeletionCompactor` later collects every expired tombstone in key
+order and hands each store the whole batch at once, so a purge wave costs
+one transaction per store per batch instead of one per user.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Protocol, Sequence
+
+from .storage import TombstoneStore
+
+logger = logging.getLogger(__name__)
+
+
+class Purgeable(Protocol):
+    def purge_users(self, user_ids: Iterable[str]) -> int: ...
+
+
+class DeletionCompactor:
+    """Purge users whose tombstones have expired, ``batch_size`` at a time."""
+
+    def __init__(
+        self,
+        tombstones: TombstoneStore,
+        stores: Sequence[Purgeable],
+        batch_size: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.tombstones = tombstones
+        self.stores: List[Purgeable] = list(stores)
+        self.batch_size = batch_size
+        self.purged_users = 0
+        self._clock = clock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """Purge one batch of due users; return how many were purged."""
+        user_ids = self.tombstones.due(self._clock(), self.batch_size)
+        if not user_ids:
+            return 0
+        for store in self.stores:
+            store.purge_users(user_ids)
+        # Tombstones go last: a crash mid-batch leaves them to retry the purge.
+        self.tombstones.clear(user_ids)
+        self.purged_users += len(user_ids)
+        return len(user_ids)
+
+    def run(self) -> int:
+        """Purge batches until no expired tombstone is left."""
+        total = 0
+        while not self._stop.is_set():
+            purged = self.run_once()
+            if not purged:
+                break
+            total += purged
+        return total
+
+    def start(self, interval_s: float = 3600.0) -> None:
+        """Run :meth:`run` every ``interval_s`` seconds on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval_s,), name="deletion-compactor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self, interval_s: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run()
+            except Exception:  # keep compacting on the next tick
+                logger.exception("Deletion compaction failed")
+            self._stop.wait(interval_s)
+
+
+__all__ = ["DeletionCompactor", "Purgeable"]
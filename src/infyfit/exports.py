@@ -0,0 +1,176 @@
+"""Background privacy exports streamed into compressed archives.
+
+An export walks a user's history kind by kind and writes each record as one
+JSON line into a ``<kind>.jsonl`` member of a deflated zip archive.  Records
+flow from SQLite chunks through a generator straight into the compressor, so
+memory use does not grow with the size of the history.  Archives are written
+to a temporary name, fsynced and renamed into place, and a bounded thread
+pool keeps concurrent exports from competing with request handling.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+from uuid import uuid4
+
+from .data_models import ReportLink
+from .storage import RECORD_KINDS, CoachCardStore, UserRecordStore
+
+EXPORT_TTL = timedelta(hours=24)
+
+
+class ExportState:
+    PENDING = "pending"
+    RUNNING = "running"
+    READY = "ready"
+    FAILED = "failed"
+
+
+@dataclass
+class ExportJob:
+    job_id: str
+    user_id: str
+    path: Path
+    state: str = ExportState.PENDING
+    expires_at: Optional[datetime] = None
+    records: int = 0
+    error: Optional[str] = None
+
+
+class ExportRunner:
+    """Run at most ``max_workers`` exports at once; one live job per user.
+
+    Submitting while a user's export is pending or running returns that job,
+    and a finished archive is served until it expires, so repeated requests
+    never queue duplicate work.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        records: Optional[UserRecordStore] = None,
+        coach_cards: Optional[CoachCardStore] = None,
+        max_workers: int = 2,
+        ttl: timedelta = EXPORT_TTL,
+        base_url: Optional[str] = None,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.records = records
+        self.coach_cards = coach_cards
+        self.ttl = ttl
+        self.base_url = base_url
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: str) -> ExportJob:
+        if not user_id:
+            raise ValueError("user_id is required for an export")
+        with self._lock:
+            job = self._live_job(user_id)
+            if job is not None and job.state != ExportState.FAILED:
+                return job
+            job_id = uuid4().hex
+            job = ExportJob(job_id, user_id, self.directory / f"export-{job_id}.zip")
+            self._jobs[user_id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def status(self, user_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._live_job(user_id)
+
+    def link(self, job: ExportJob) -> ReportLink:
+        if job.state != ExportState.READY or job.expires_at is None:
+            raise ValueError(f"Export {job.job_id} is {job.state}")
+        if self.base_url:
+            url = f"{self.base_url.rstrip('/')}/{job.path.name}"
+        else:
+            url = job.path.resolve().as_uri()
+        return ReportLink(url=url, expires_at=job.expires_at)
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        """Forget the jobs of ``user_ids`` and delete their archives."""
+        purged = 0
+        with self._lock:
+            for user_id in user_ids:
+                job = self._jobs.pop(user_id, None)
+                if job is not None:
+                    job.path.unlink(missing_ok=True)
+                    purged += 1
+        return purged
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _live_job(self, user_id: str) -> Optional[ExportJob]:
+        """Return the user's job, dropping it (and its archive) once expired."""
+        job = self._jobs.get(user_id)
+        if job is not None and job.expires_at is not None and job.expires_at <= self._clock():
+            del self._jobs[user_id]
+            job.path.unlink(missing_ok=True)
+            return None
+        return job
+
+    def _run(self, job: ExportJob) -> None:
+        job.state = ExportState.RUNNING
+        tmp_path = job.path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "wb") as handle:
+                job.records = self._write_archive(handle, job.user_id)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, job.path)
+        except Exception as exc:  # surfaced through status(); the pool must keep running
+            tmp_path.unlink(missing_ok=True)
+            job.error = str(exc)
+            job.state = ExportState.FAILED
+            return
+        with self._lock:
+            if self._jobs.get(job.user_id) is not job:  # purged while running
+                job.path.unlink(missing_ok=True)
+                return
+            job.expires_at = self._clock() + self.ttl
+            job.state = ExportState.READY
+
+    def _write_archive(self, handle, user_id: str) -> int:
+        counts: Dict[str, int] = {}
+        with zipfile.ZipFile(handle, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for kind in RECORD_KINDS:
+                # force_zip64 because the member size is unknown while streaming.
+                with archive.open(f"{kind}.jsonl", "w", force_zip64=True) as member:
+                    written = 0
+                    for line in self._lines(user_id, kind):
+                        member.write(line)
+                        written += 1
+                counts[kind] = written
+            manifest = {
+                "user_id": user_id,
+                "exported_at": self._clock().isoformat(),
+                "records": counts,
+            }
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        return sum(counts.values())
+
+    def _lines(self, user_id: str, kind: str) -> Iterator[bytes]:
+        if self.records is not None:
+            for _, recorded_at, payload in self.records.iter_user(user_id, kind):
+                stamp = datetime.fromtimestamp(recorded_at, timezone.utc).isoformat()
+                yield b'{"recorded_at":"%s","data":%s}\n' % (stamp.encode("ascii"), payload)
+        if kind == "coach_cards" and self.coach_cards is not None:
+            for day, card in self.coach_cards.cards_for(user_id):
+                yield b'{"day":"%s","data":%s}\n' % (day.encode("ascii"), card)
+
+
+__all__ = ["EXPORT_TTL", "ExportJob", "ExportRunner", "ExportState"]
@@ -0,0 +1,116 @@
+"""Opt-in per-agent call instrumentation.
+
+:class:`AgentInstrumentation` replaces selected bound methods on agent
+instances with timing wrappers.  Nothing is wrapped unless instrumentation
+is enabled, so the disabled path keeps the plain method call.  Each call
+records wall time, thread CPU time and the net change in allocated memory
+blocks, and is forwarded to the :class:`TelemetryAgent` as an
+``infyfit.agent.<agent>.<method>`` span.
+"""
+
+from __future__ import annotations
+
+import functools
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+from .agents import TelemetryAgent
+from .sketches import LatencyHistogram
+
+SPAN_PREFIX = "infyfit.agent."
+
+
+class CallStats:
+    """Aggregated measurements for one instrumented method."""
+
+    __slots__ = ("calls", "errors", "wall_ms", "cpu_ms", "allocated_blocks")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.wall_ms = LatencyHistogram()
+        self.cpu_ms = LatencyHistogram()
+        self.allocated_blocks = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wall_ms": _summary(self.wall_ms),
+            "cpu_ms": _summary(self.cpu_ms),
+            "allocated_blocks": self.allocated_blocks,
+        }
+
+
+def _summary(histogram: LatencyHistogram) -> Dict[str, float]:
+    if not histogram.count:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {
+        "mean": round(histogram.total / histogram.count, 4),
+        "p50": round(histogram.quantile(0.50), 4),
+        "p95": round(histogram.quantile(0.95), 4),
+        "p99": round(histogram.quantile(0.99), 4),
+    }
+
+
+class AgentInstrumentation:
+    """Wrap agent methods and keep per-method :class:`CallStats`."""
+
+    def __init__(self, telemetry: TelemetryAgent | None = None) -> None:
+        self.telemetry = telemetry
+        self._stats: Dict[str, CallStats] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, agent_name: str, agent: Any, methods: Iterable[str]) -> None:
+        """Shadow ``methods`` on the ``agent`` instance with timing wrappers."""
+        for method_name in methods:
+            span_name = f"{SPAN_PREFIX}{agent_name}.{method_name}"
+            stats = self._stats.setdefault(span_name, CallStats())
+            wrapper = self._wrap(getattr(agent, method_name), span_name, stats)
+            setattr(agent, method_name, wrapper)
+
+    def _wrap(
+        self, method: Callable[..., Any], span_name: str, stats: CallStats
+    ) -> Callable[..., Any]:
+        lock = self._lock
+        telemetry = self.telemetry
+        perf_counter, thread_time, allocated = (
+            time.perf_counter,
+            time.thread_time,
+            sys.getallocatedblocks,
+        )
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            blocks = allocated()
+            cpu = thread_time()
+            start = perf_counter()
+            success = False
+            try:
+                result = method(*args, **kwargs)
+                success = True
+                return result
+            finally:
+                wall_ms = (perf_counter() - start) * 1000.0
+                cpu_ms = (thread_time() - cpu) * 1000.0
+                # Interpreter-wide, so concurrent calls can blur each other.
+                delta = allocated() - blocks
+                with lock:
+                    stats.calls += 1
+                    stats.errors += not success
+                    stats.wall_ms.add(wall_ms)
+                    stats.cpu_ms.add(cpu_ms)
+                    stats.allocated_blocks += delta
+                if telemetry is not None:
+                    telemetry.record_span(span_name, wall_ms, success)
+
+        return wrapper
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._stats.items())}
+
+
+__all__ = ["AgentInstrumentation", "CallStats", "SPAN_PREFIX"]
@@ -0,0 +1 @@
+"""Offline batch jobs and build commands for the InfyFit reference stack."""
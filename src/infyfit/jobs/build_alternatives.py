@@ -0,0 +1,49 @@
+"""Build the nearest-neighbour index used for ``better_alternatives``.
+
+Usage::
+
+    python -m infyfit.jobs.build_alternatives alternatives.ifalt [products.jsonl]
+
+Input lines use the :mod:`infyfit.jobs.build_catalogue` layout plus a
+``category`` key; products without one share the empty category.  Without an
+input file the bundled reference products are indexed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Iterator, List, Optional, Tuple
+
+from ..agents.nutrition_resolver import score_from_macros
+from ..agents.reference_products import reference_records
+from ..storage.alternatives import write_alternatives
+from ..storage.catalogue import CatalogueRecord
+from .build_catalogue import record_from_dict
+
+
+def read_products(path: str) -> Iterator[Tuple[CatalogueRecord, str]]:
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            yield record_from_dict(item), str(item.get("category") or "")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build an InfyFit alternatives index.")
+    parser.add_argument("output", help="Index file to write")
+    parser.add_argument("source", nargs="?", help="JSONL product dump (defaults to bundled data)")
+    args = parser.parse_args(argv)
+
+    if args.source:
+        products = read_products(args.source)
+    else:
+        products = ((record, "") for record in reference_records())
+    count = write_alternatives(args.output, products, score_from_macros)
+    print(f"Indexed {count} products in {args.output}")
+
+
+if __name__ == "__main__":  # pragma: no cover - manual execution only
+    main()
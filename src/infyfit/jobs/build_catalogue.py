@@ -0,0 +1,53 @@
+"""Build a memory-mapped product catalogue.
+
+Usage::
+
+    python -m infyfit.jobs.build_catalogue catalogue.ifcat [products.jsonl]
+
+Each JSONL line holds ``barcode``, ``name``, ``brand``, ``ingredients``,
+``nutrients`` and ``alternatives``.  Without an input file the bundled
+reference products are written, which is handy for local testing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..agents.reference_products import reference_records
+from ..storage.catalogue import CatalogueRecord, write_catalogue
+
+
+def read_records(path: str) -> Iterator[CatalogueRecord]:
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            yield record_from_dict(json.loads(line))
+
+
+def record_from_dict(item: Dict[str, Any]) -> CatalogueRecord:
+    return CatalogueRecord(
+        barcode=str(item["barcode"]),
+        name=str(item["name"]),
+        brand=item.get("brand"),
+        ingredients=tuple(item.get("ingredients", ())),
+        nutrients={key: float(value) for key, value in item["nutrients"].items()},
+        alternatives=tuple(item.get("alternatives", ())),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build an InfyFit product catalogue file.")
+    parser.add_argument("output", help="Catalogue file to write")
+    parser.add_argument("source", nargs="?", help="JSONL product dump (defaults to bundled data)")
+    args = parser.parse_args(argv)
+
+    records = read_records(args.source) if args.source else reference_records()
+    count = write_catalogue(args.output, records)
+    print(f"Wrote {count} products to {args.output}")
+
+
+if __name__ == "__main__":  # pragma: no cover - manual execution only
+    main()
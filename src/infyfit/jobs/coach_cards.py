@@ -0,0 +1,118 @@
+"""Precompute tomorrow's coach cards for every user.
+
+Usage::
+
+    python -m infyfit.jobs.coach_cards requests.jsonl cards.sqlite [--workers 8]
+
+Each JSONL line is a ``CoachRequest`` with a ``user_id``.  The input is cut
+into byte ranges aligned to line boundaries; worker processes read their
+own range, classify it with :meth:`CoachInsightsAgent.generate_many` and
+return encoded cards, which the parent writes to a
+:class:`~infyfit.storage.card_store.CoachCardStore` one transaction per
+range.  Only a bounded number of ranges is in flight, so memory stays flat
+regardless of the input size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterator, List, Optional, Tuple
+
+from ..agents.coach import CoachInsightsAgent
+from ..data_models import CoachRequest
+from ..storage.card_store import CardRow, CoachCardStore
+
+DEFAULT_CHUNK_BYTES = 8 << 20
+
+_AGENT = CoachInsightsAgent()
+
+
+def byte_ranges(path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[Tuple[int, int]]:
+    size = os.path.getsize(path)
+    for start in range(0, size, chunk_bytes):
+        yield start, min(start + chunk_bytes, size)
+
+
+def classify_range(path: str, start: int, stop: int) -> Tuple[List[CardRow], int]:
+    """Return the cards for lines starting in ``[start, stop)`` and the skipped count."""
+    requests: List[CoachRequest] = []
+    skipped = 0
+    with open(path, "rb") as handle:
+        if start:
+            # Finish the line that straddles the boundary; its owner is the previous range.
+            handle.seek(start - 1)
+            handle.readline()
+        while handle.tell() < stop:
+            line = handle.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            request = CoachRequest.from_dict(json.loads(line))
+            if not request.user_id:
+                skipped += 1
+                continue
+            requests.append(request)
+    cards = _AGENT.generate_many(requests)
+    rows = [
+        (request.user_id, request.day.isoformat(), card.to_json_bytes())
+        for request, card in zip(requests, cards)
+    ]
+    return rows, skipped
+
+
+def run(
+    source: str,
+    store_path: str,
+    workers: Optional[int] = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> Tuple[int, int]:
+    """Generate and store cards for ``source``; return ``(written, skipped)``."""
+    store = CoachCardStore(store_path)
+    written = skipped = 0
+    ranges = byte_ranges(source, chunk_bytes)
+    if workers == 0:
+        for start, stop in ranges:
+            rows, missing = classify_range(source, start, stop)
+            written += store.put_many(rows)
+            skipped += missing
+        store.close()
+        return written, skipped
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        for start, stop in ranges:
+            pending.append(pool.submit(classify_range, source, start, stop))
+            if len(pending) < max_in_flight:
+                continue
+            rows, missing = pending.popleft().result()
+            written += store.put_many(rows)
+            skipped += missing
+        while pending:
+            rows, missing = pending.popleft().result()
+            written += store.put_many(rows)
+            skipped += missing
+    store.close()
+    return written, skipped
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute InfyFit coach cards.")
+    parser.add_argument("source", help="JSONL file of CoachRequest objects with user_id")
+    parser.add_argument("store", help="SQLite card store to write")
+    parser.add_argument("--workers", type=int, default=None, help="0 runs in-process")
+    parser.add_argument("--chunk-bytes", type=int, default=DEFAULT_CHUNK_BYTES)
+    args = parser.parse_args(argv)
+
+    written, skipped = run(args.source, args.store, args.workers, args.chunk_bytes)
+    print(f"Wrote {written} coach cards to {args.store} ({skipped} requests without user_id)")
+
+
+if __name__ == "__main__":  # pragma: no cover - manual execution only
+    main()
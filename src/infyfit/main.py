@@ -6,7 +6,7 @@ from .api import create_app
 
 
 def main() -> None:
-    """Launch the app via uvicorn if the package is available."""
+    """Serve the app's ASGI interface via uvicorn if the package is available."""
 
     try:
         import uvicorn  # type: ignore
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from .agents import (
     CoachInsightsAgent,
@@ -11,19 +14,58 @@ from .agents import (
     OfflineSyncAgent,
     PrivacyOpsAgent,
     ProductScannerAgent,
+    ReportingAgent,
     TelemetryAgent,
     WorkoutPlannerAgent,
 )
 from .data_models import (
     CoachRequest,
+    HealthSyncRequest,
+    MealScanBatchRequest,
+    MealScanBatchResult,
     MealScanRequest,
     NutritionResolverRequest,
     OfflineSyncRequest,
     PrivacyRequest,
     ProductScanRequest,
+    ReportRequest,
     TelemetryEvent,
+    TelemetryPercentilesRequest,
     WorkoutPlanRequest,
 )
+from .agents.offline_sync import SyncStore
+from .agents.reference_products import reference_lookup
+from .barcodes import BarcodeLookup
+from .cache import TTLCache
+from .deletion import DeletionCompactor
+from .exports import ExportJob, ExportRunner
+from .instrumentation import AgentInstrumentation
+from .singleflight import SingleFlight
+from .storage import (
+    AlternativesIndex,
+    CoachCardStore,
+    HealthTimeSeries,
+    ProductCatalogue,
+    TombstoneStore,
+    UserRecordStore,
+)
+
+# Popular products dominate resolver traffic, so keep a generous working set.
+RESOLVER_CACHE_ENTRIES = 10_000
+
+# Setting this environment variable to "1" instruments the default container.
+INSTRUMENT_ENV = "INFYFIT_INSTRUMENT"
+
+# Container field -> agent methods wrapped when instrumentation is enabled.
+INSTRUMENTED_METHODS: Dict[str, Tuple[str, ...]] = {
+    "meal_scan": ("estimate", "estimate_many"),
+    "product_scanner": ("scan",),
+    "nutrition_resolver": ("resolve", "resolve_json"),
+    "workout_planner": ("build_plan",),
+    "coach": ("generate",),
+    "offline_sync": ("flush",),
+    "privacy_ops": ("handle",),
+}
 
 
 @dataclass
@@ -36,40 +78,234 @@ class ServiceContainer:
     offline_sync: OfflineSyncAgent
     privacy_ops: PrivacyOpsAgent
     telemetry: TelemetryAgent
+    instrumentation: Optional[AgentInstrumentation] = None
+    coach_cards: Optional[CoachCardStore] = None
+    user_records: Optional[UserRecordStore] = None
+    compactor: Optional[DeletionCompactor] = None
+    reporting: Optional[ReportingAgent] = None
+    # Concurrent identical product lookups share one computation.
+    flights: SingleFlight = field(default_factory=SingleFlight)
 
     @classmethod
-    def default(cls) -> "ServiceContainer":
-        return cls(
+    def default(
+        cls,
+        catalogue_path: str | None = None,
+        instrument: bool | None = None,
+        sync_log_dir: str | None = None,
+        coach_card_store: str | None = None,
+        alternatives_path: str | None = None,
+        user_records_path: str | None = None,
+        export_dir: str | None = None,
+        tombstone_path: str | None = None,
+        report_dir: str | None = None,
+    ) -> "ServiceContainer":
+        """Build the stub stack, optionally serving products from a catalogue file.
+
+        The catalogue is memory-mapped once here, before any worker fork, so
+        all workers share its pages.  ``instrument`` defaults to the
+        ``INFYFIT_INSTRUMENT`` environment variable.  With ``sync_log_dir``
+        offline sync batches are made durable in a write-ahead log there and
+        recovered from it on startup.  ``coach_card_store`` points at the
+        SQLite file written by :mod:`infyfit.jobs.coach_cards` and
+        ``alternatives_path`` at the index from :mod:`infyfit.jobs.build_alternatives`.
+        With ``user_records_path`` every result served to a signed-in user is
+        kept in a SQLite record log, and ``export_dir`` enables privacy exports
+        of that log (plus stored coach cards) as zip archives.  With
+        ``tombstone_path`` account deletion hides the user at once and
+        ``container.compactor`` purges every store once the window has ended.
+        Range reports are written to ``report_dir``; without one, a private
+        temporary directory is created when the first report is built.
+        """
+        # One lookup (and one Bloom filter / negative cache) serves both agents.
+        if catalogue_path:
+            lookup = BarcodeLookup(ProductCatalogue(catalogue_path))
+        else:
+            lookup = reference_lookup()
+        product_scanner = ProductScannerAgent(lookup=lookup)
+        nutrition_resolver = NutritionResolverAgent(
+            lookup=lookup,
+            cache=TTLCache(max_entries=RESOLVER_CACHE_ENTRIES),
+            alternatives=AlternativesIndex(alternatives_path) if alternatives_path else None,
+        )
+        sync_store = SyncStore.open(sync_log_dir) if sync_log_dir else None
+        coach_cards = CoachCardStore(coach_card_store) if coach_card_store else None
+        user_records = UserRecordStore(user_records_path) if user_records_path else None
+        exports = None
+        if export_dir:
+            exports = ExportRunner(export_dir, records=user_records, coach_cards=coach_cards)
+        tombstones = TombstoneStore(tombstone_path) if tombstone_path else None
+        # Synced health aggregates feed the planner's and coach's context.
+        health = HealthTimeSeries()
+        offline_sync = OfflineSyncAgent(store=sync_store, health_series=health)
+        reporting = ReportingAgent(report_dir)
+        container = cls(
             meal_scan=MealScanFirstPassAgent(),
-            product_scanner=ProductScannerAgent(),
-            nutrition_resolver=NutritionResolverAgent(),
-            workout_planner=WorkoutPlannerAgent(),
-            coach=CoachInsightsAgent(),
-            offline_sync=OfflineSyncAgent(),
-            privacy_ops=PrivacyOpsAgent(),
+            product_scanner=product_scanner,
+            nutrition_resolver=nutrition_resolver,
+            workout_planner=WorkoutPlannerAgent(health=health),
+            coach=CoachInsightsAgent(health=health),
+            offline_sync=offline_sync,
+            privacy_ops=PrivacyOpsAgent(exports=exports, tombstones=tombstones),
             telemetry=TelemetryAgent(),
+            coach_cards=coach_cards,
+            user_records=user_records,
+            reporting=reporting,
         )
+        if tombstones is not None:
+            stores = [offline_sync, coach_cards, user_records, exports, reporting]
+            container.compactor = DeletionCompactor(
+                tombstones, [store for store in stores if store is not None]
+            )
+        if instrument is None:
+            instrument = os.environ.get(INSTRUMENT_ENV) == "1"
+        if instrument:
+            container.enable_instrumentation()
+        return container
+
+    def enable_instrumentation(self) -> AgentInstrumentation:
+        """Wrap the agent methods in :data:`INSTRUMENTED_METHODS` (idempotent)."""
+        if self.instrumentation is None:
+            self.instrumentation = AgentInstrumentation(self.telemetry)
+            for field_name, methods in INSTRUMENTED_METHODS.items():
+                self.instrumentation.instrument(field_name, getattr(self, field_name), methods)
+        return self.instrumentation
+
+    def metrics(self) -> Dict[str, Any]:
+        cache = self.nutrition_resolver.cache
+        return {
+            "instrumented": self.instrumentation is not None,
+            "agents": self.instrumentation.snapshot() if self.instrumentation else {},
+            "resolver_cache": cache.stats() if cache is not None else None,
+            "barcodes": self.nutrition_resolver.lookup.stats(),
+            "singleflight": self.flights.stats(),
+        }
+
+    def is_hidden(self, user_id: Optional[str]) -> bool:
+        """Whether ``user_id`` has a pending deletion and must be filtered out."""
+        tombstones = self.privacy_ops.tombstones
+        return bool(user_id) and tombstones is not None and tombstones.is_deleted(user_id)
+
+    def _record(self, user_id: Optional[str], kind: str, request: Any, result: Any) -> None:
+        """Append a served request/result pair to the user's record log."""
+        if not user_id or self.user_records is None or self.is_hidden(user_id):
+            return
+        self.user_records.append(user_id, kind, _record_payload(request, result))
 
     def estimate_meal(self, request: MealScanRequest):
-        return self.meal_scan.estimate(request)
+        result = self.meal_scan.estimate(request)
+        self._record(request.user_id, "meal_scans", request, result)
+        if self.reporting is not None and request.user_id and not self.is_hidden(request.user_id):
+            self.reporting.record_meal(request.user_id, result)
+        return result
+
+    def estimate_meals(self, request: MealScanBatchRequest) -> MealScanBatchResult:
+        results = self.meal_scan.estimate_many(request.requests)
+        if self.reporting is not None:
+            for item, result in zip(request.requests, results):
+                if item.user_id and not self.is_hidden(item.user_id):
+                    self.reporting.record_meal(item.user_id, result)
+        if self.user_records is not None:
+            self.user_records.put_many(
+                (item.user_id, "meal_scans", _record_payload(item, result))
+                for item, result in zip(request.requests, results)
+                if item.user_id and not self.is_hidden(item.user_id)
+            )
+        return MealScanBatchResult(results=results)
 
     def scan_product(self, request: ProductScanRequest):
-        return self.product_scanner.scan(request)
+        # Scan results echo the barcode as sent, so spellings are not merged.
+        key = ("scan", request.barcode, request.label_text)
+        return self.flights.do(key, lambda: self.product_scanner.scan(request))
 
     def resolve_product(self, request: NutritionResolverRequest):
-        return self.nutrition_resolver.resolve(request)
+        key = ("resolve", self.nutrition_resolver.cache_key(request))
+        result = self.flights.do(key, lambda: self.nutrition_resolver.resolve(request))
+        self._record(request.user_id, "product_scores", request, result)
+        return result
+
+    def resolve_product_json(self, request: NutritionResolverRequest) -> bytes:
+        key = ("resolve_json", self.nutrition_resolver.cache_key(request))
+        result = self.flights.do(key, lambda: self.nutrition_resolver.resolve_json(request))
+        self._record(request.user_id, "product_scores", request, result)
+        return result
 
     def build_workout_plan(self, request: WorkoutPlanRequest):
-        return self.workout_planner.build_plan(request)
+        result = self.workout_planner.build_plan(request)
+        self._record(request.user_id, "workout_plans", request, result)
+        if self.reporting is not None and request.user_id and not self.is_hidden(request.user_id):
+            self.reporting.record_workout(request.user_id, result)
+        return result
+
+    def build_report(self, request: ReportRequest):
+        if self.reporting is None:
+            raise ValueError("Reporting is not configured")
+        self._check_visible(request.user_id)
+        return self.reporting.build(request)
 
     def generate_coach_card(self, request: CoachRequest):
-        return self.coach.generate(request)
+        result = self.coach.generate(request)
+        self._record(request.user_id, "coach_cards", request, result)
+        return result
+
+    def coach_card_json(self, request: CoachRequest) -> bytes:
+        """Serve the precomputed card for the user's day, generating it on a miss."""
+        if request.user_id and self.coach_cards is not None and not self.is_hidden(request.user_id):
+            card = self.coach_cards.get(request.user_id, request.day)
+            if card is not None:
+                return card
+        return self.generate_coach_card(request).to_json_bytes()
 
     def flush_offline_queue(self, request: OfflineSyncRequest):
+        self._check_visible(request.user_id)
         return self.offline_sync.flush(request)
 
+    def sync_health(self, request: HealthSyncRequest):
+        self._check_visible(request.user_id)
+        return self.offline_sync.sync_health(request)
+
+    def _check_visible(self, user_id: str) -> None:
+        if self.is_hidden(user_id):
+            raise ValueError(f"Account {user_id} is scheduled for deletion")
+
     def handle_privacy(self, request: PrivacyRequest):
         return self.privacy_ops.handle(request)
 
+    def export_status(self, user_id: str) -> Optional[ExportJob]:
+        exports = self.privacy_ops.exports
+        if exports is None or self.is_hidden(user_id):
+            return None
+        return exports.status(user_id)
+
+    def export_link(self, job: ExportJob):
+        return self.privacy_ops.exports.link(job)
+
     def ingest_telemetry(self, event: TelemetryEvent):
-        return self.telemetry.ingest(event)
+        result = self.telemetry.ingest(event)
+        self._record(event.user_id, "telemetry", event, result)
+        return result
+
+    def ingest_telemetry_batch(self, events: Iterable[Mapping[str, Any]]):
+        result, accepted = self.telemetry.ingest_events(events)
+        if self.user_records is not None:
+            # Only spans the agent accepted are kept in the user's record log.
+            rows: List[Tuple[str, str, bytes]] = [
+                (event["user_id"], "telemetry", json.dumps({"request": event}).encode("utf-8"))
+                for event in accepted
+                if isinstance(event.get("user_id"), str)
+                and event["user_id"]
+                and not self.is_hidden(event["user_id"])
+            ]
+            self.user_records.put_many(rows)
+        return result
+
+    def telemetry_percentiles(self, request: TelemetryPercentilesRequest):
+        return self.telemetry.percentiles(request)
+
+    def telemetry_sketches(self, window_s: float):
+        return self.telemetry.snapshot(window_s)
+
+
+def _record_payload(request: Any, result: Any) -> bytes:
+    if not isinstance(result, (bytes, bytearray)):
+        result = result.to_json_bytes()
+    return b'{"request":%s,"result":%s}' % (request.to_json_bytes(), bytes(result))
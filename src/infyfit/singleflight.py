@@ -0,0 +1,116 @@
+"""Coalesce concurrent identical computations into one in-flight call.
+
+The first caller for a key becomes the leader and runs the computation.
+Callers that arrive with the same key while it is running wait on the
+leader's :class:`concurrent.futures.Future` and receive the same result,
+or the same exception.  The future is thread-safe and can be awaited
+through :func:`asyncio.wrap_future`, so threaded handlers and coroutines
+share flights with each other.  A key is forgotten as soon as its call
+finishes; this layer coalesces, it does not cache.
+
+The shared future is marked running as soon as a leader registers, so a
+follower that gives up cannot cancel it for everyone else.  A leader that
+is itself cancelled abandons the flight instead of failing it: waiting
+callers rejoin and one of them becomes the new leader.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import concurrent.futures
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_CANCELLED = (asyncio.CancelledError, concurrent.futures.CancelledError)
+
+
+class _Abandoned(Exception):
+    """The leader was cancelled; followers should retry the flight."""
+
+
+class SingleFlight(Generic[V]):
+    """Thread-safe registry of in-flight calls keyed by request."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "Future[V]"] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, compute: Callable[[], V]) -> V:
+        """Return ``compute()``, sharing one call among concurrent callers of ``key``."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except _Abandoned:
+                continue
+        try:
+            result = compute()
+        except BaseException as exc:
+            self._finish(key, future, exc=exc)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def do_async(self, key: Hashable, compute: Callable[[], Awaitable[V]]) -> V:
+        """Coroutine flavour of :meth:`do`; waiting followers do not block the loop."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return await asyncio.wrap_future(future)
+            except _Abandoned:
+                continue
+        try:
+            result = await compute()
+        except BaseException as exc:
+            self._finish(key, future, exc=exc)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+    def _join(self, key: Hashable) -> Tuple["Future[V]", bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            future.set_running_or_notify_cancel()
+            self.executed += 1
+            return future, True
+
+    def _finish(
+        self,
+        key: Hashable,
+        future: "Future[V]",
+        result: V | None = None,
+        exc: BaseException | None = None,
+    ) -> None:
+        # Unregister first so no caller joins a flight that has already landed.
+        with self._lock:
+            del self._calls[key]
+        if isinstance(exc, _CANCELLED):
+            future.set_exception(_Abandoned())
+        elif exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+
+__all__ = ["SingleFlight"]
@@ -0,0 +1,199 @@
+"""Mergeable streaming latency sketches.
+
+:class:`LatencyHistogram` is a sparse log-bucketed histogram in the style of
+DDSketch: every bucket covers values within ``RELATIVE_ACCURACY`` of its
+representative, so quantiles carry a bounded relative error and two
+histograms merge by adding bucket counts.  :class:`WindowedSketch` keeps one
+histogram plus success/failure counters per time slot to answer
+rolling-window queries.  Both serialise to plain dictionaries so per-process
+sketches can be shipped and merged in O(buckets).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+# Durations at or below this many milliseconds share the zero bucket.
+MIN_TRACKED_MS = 1e-3
+
+
+class LatencyHistogram:
+    """Sparse log-bucketed histogram with ~1% relative quantile error."""
+
+    __slots__ = ("bins", "zero_count", "count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        if value <= MIN_TRACKED_MS:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / _LOG_GAMMA)
+        bins = self.bins
+        bins[index] = bins.get(index, 0) + 1
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        bins = self.bins
+        for index, count in other.bins.items():
+            bins[index] = bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the ``q`` quantile (``0 <= q <= 1``) or ``None`` when empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.minimum, 0.0)
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                value = 2.0 * _GAMMA**index / (_GAMMA + 1.0)
+                return min(max(value, self.minimum), self.maximum)
+        return self.maximum
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bins": {str(index): count for index, count in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "total": self.total,
+            "minimum": self.minimum if self.count else None,
+            "maximum": self.maximum if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.bins = {int(index): int(count) for index, count in data["bins"].items()}
+        histogram.zero_count = int(data["zero_count"])
+        histogram.count = int(data["count"])
+        histogram.total = float(data["total"])
+        if histogram.count:
+            histogram.minimum = float(data["minimum"])
+            histogram.maximum = float(data["maximum"])
+        return histogram
+
+
+class WindowedSketch:
+    """Per-slot histograms and success counters covering a rolling window."""
+
+    __slots__ = ("slot_seconds", "max_slots", "_slots")
+
+    def __init__(self, slot_seconds: int = 10, max_slots: int = 360) -> None:
+        self.slot_seconds = slot_seconds
+        self.max_slots = max_slots
+        # slot number -> [histogram, successes, failures]
+        self._slots: Dict[int, List[Any]] = {}
+
+    def _slot(self, now: float) -> List[Any]:
+        number = int(now // self.slot_seconds)
+        slot = self._slots.get(number)
+        if slot is None:
+            slot = self._slots[number] = [LatencyHistogram(), 0, 0]
+            if len(self._slots) > self.max_slots:
+                cutoff = number - self.max_slots
+                for stale in [key for key in self._slots if key <= cutoff]:
+                    del self._slots[stale]
+        return slot
+
+    def record(self, duration_ms: float, success: bool, now: float) -> None:
+        slot = self._slot(now)
+        slot[0].add(duration_ms)
+        if success:
+            slot[1] += 1
+        else:
+            slot[2] += 1
+
+    def record_many(self, spans: Iterable[Tuple[float, bool]], now: float) -> None:
+        slot = self._slot(now)
+        add = slot[0].add
+        failures = 0
+        recorded = 0
+        for duration_ms, success in spans:
+            add(duration_ms)
+            recorded += 1
+            if not success:
+                failures += 1
+        slot[1] += recorded - failures
+        slot[2] += failures
+
+    def snapshot(self, window_s: float, now: float) -> Tuple[LatencyHistogram, int, int]:
+        """Merge the slots overlapping the last ``window_s`` seconds."""
+        first = int((now - window_s) // self.slot_seconds) + 1
+        merged = LatencyHistogram()
+        successes = failures = 0
+        for number, (histogram, ok, failed) in self._slots.items():
+            if number >= first:
+                merged.merge(histogram)
+                successes += ok
+                failures += failed
+        return merged, successes, failures
+
+
+class SketchSnapshot:
+    """Per-event-name window aggregates that merge across processes."""
+
+    __slots__ = ("window_s", "events")
+
+    def __init__(self, window_s: float) -> None:
+        self.window_s = window_s
+        # event name -> [histogram, successes, failures]
+        self.events: Dict[str, List[Any]] = {}
+
+    def add(self, name: str, histogram: LatencyHistogram, successes: int, failures: int) -> None:
+        entry = self.events.get(name)
+        if entry is None:
+            self.events[name] = [LatencyHistogram().merge(histogram), successes, failures]
+        else:
+            entry[0].merge(histogram)
+            entry[1] += successes
+            entry[2] += failures
+
+    def merge(self, other: "SketchSnapshot") -> "SketchSnapshot":
+        for name, (histogram, successes, failures) in other.events.items():
+            self.add(name, histogram, successes, failures)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window_s": self.window_s,
+            "events": {
+                name: {"histogram": histogram.to_dict(), "successes": ok, "failures": failed}
+                for name, (histogram, ok, failed) in self.events.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SketchSnapshot":
+        snapshot = cls(window_s=float(data["window_s"]))
+        for name, entry in data["events"].items():
+            snapshot.add(
+                name,
+                LatencyHistogram.from_dict(entry["histogram"]),
+                int(entry["successes"]),
+                int(entry["failures"]),
+            )
+        return snapshot
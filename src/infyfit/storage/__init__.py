@@ -0,0 +1,28 @@
+"""Local storage formats used by the InfyFit reference stack."""
+
+from .alternatives import AlternativesIndex, write_alternatives
+from .card_store import CoachCardStore
+from .catalogue import CatalogueRecord, ProductCatalogue, write_catalogue
+from .spans import SpanBuffer, SpanSegmentWriter, read_segment
+from .user_records import RECORD_KINDS, UserRecordStore
+from .timeseries import HealthTimeSeries, HealthWindow
+from .tombstones import TombstoneStore
+from .wal import WriteAheadLog
+
+__all__ = [
+    "AlternativesIndex",
+    "CatalogueRecord",
+    "CoachCardStore",
+    "HealthTimeSeries",
+    "HealthWindow",
+    "RECORD_KINDS",
+    "ProductCatalogue",
+    "SpanBuffer",
+    "SpanSegmentWriter",
+    "TombstoneStore",
+    "UserRecordStore",
+    "WriteAheadLog",
+    "read_segment",
+    "write_alternatives",
+    "write_catalogue",
+]
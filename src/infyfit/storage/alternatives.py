@@ -0,0 +1,309 @@
+"""Memory-mapped nearest-neighbour index for healthier product alternatives.
+
+Each product becomes a macro vector (calories, protein, fat, carbs per
+serving) scaled by the catalogue-wide 99th percentile of each macro and
+clipped to ``[0, 1]``.  Rows are partitioned by (category, health score) and
+each partition is stored as an implicit KD-tree: the median row of a range
+splits it on axis ``depth % 4``, recursively, so the tree needs no node
+storage.  A query only searches the partitions of its own category that
+score higher, pruning subtrees whose splitting plane is farther away than
+the current ``k``-th best::
+
+    header      magic, counts and section offsets
+    scales      four float32 normalisation divisors
+    partitions  (name offset, name length, score, first row, end row) uint32
+    vectors     four float32 per row, normalised, in KD order
+    names       (offset, length) uint32 pairs into the string pool
+    keys        sorted GTIN-14 barcodes padded to KEY_WIDTH bytes
+    key_rows    row of each key, uint32
+    pool        UTF-8 strings
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import mmap
+import os
+import struct
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from ..barcodes import normalize_barcode
+from .catalogue import KEY_WIDTH, CatalogueRecord
+
+MAGIC = b"IFYALT01"
+DIMENSIONS: Tuple[str, ...] = ("calories", "protein", "fat", "carbs")
+SCALE_QUANTILE = 0.99
+LEAF_ROWS = 8
+
+_HEADER = struct.Struct("<8s2I7Q")
+_PARTITION = struct.Struct("<5I")
+
+ScoreFunction = Callable[[float, float, float, float], int]
+Vector = Tuple[float, ...]
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _normalise(raw: Sequence[float], scales: Sequence[float]) -> Vector:
+    return tuple(min(max(value / scale, 0.0), 1.0) for value, scale in zip(raw, scales))
+
+
+def _kd_order(items: List[Tuple[Vector, int]]) -> List[Tuple[Vector, int]]:
+    """Reorder ``(vector, id)`` items so every range's median row splits it."""
+    stack = [(0, len(items), 0)]
+    while stack:
+        low, high, depth = stack.pop()
+        if high - low <= LEAF_ROWS:
+            continue
+        axis = depth % len(DIMENSIONS)
+        items[low:high] = sorted(items[low:high], key=lambda item: item[0][axis])
+        middle = (low + high) // 2
+        stack.append((low, middle, depth + 1))
+        stack.append((middle + 1, high, depth + 1))
+    return items
+
+
+def write_alternatives(
+    path: str | os.PathLike[str],
+    products: Iterable[Tuple[CatalogueRecord, str]],
+    score: ScoreFunction,
+) -> int:
+    """Index ``(record, category)`` pairs at ``path`` atomically; return the row count."""
+    rows: List[Tuple[str, int, str, str, Vector]] = []
+    for record, category in products:
+        key = normalize_barcode(record.barcode)
+        if key is None:
+            raise ValueError(f"Invalid barcode {record.barcode!r}")
+        raw = tuple(float(record.nutrients[name]) for name in DIMENSIONS)
+        rows.append((category, score(*raw), key, record.name, raw))
+    count = len(rows)
+
+    scales = []
+    for position in range(len(DIMENSIONS)):
+        values = sorted(row[4][position] for row in rows)
+        quantile = values[min(int(count * SCALE_QUANTILE), count - 1)] if values else 0.0
+        scales.append(quantile if quantile > 0 else 1.0)
+    scales_bytes = struct.pack("<4f", *scales)
+    # Round-trip through float32 so stored vectors match what the reader computes.
+    scales = list(struct.unpack("<4f", scales_bytes))
+    rows.sort(key=lambda row: (row[0], row[1]))
+
+    pool = bytearray()
+    interned: Dict[str, Tuple[int, int]] = {}
+
+    def intern(text: str) -> Tuple[int, int]:
+        ref = interned.get(text)
+        if ref is None:
+            encoded = text.encode("utf-8")
+            ref = interned[text] = (len(pool), len(encoded))
+            pool.extend(encoded)
+        return ref
+
+    partitions = bytearray()
+    vectors = bytearray()
+    names = bytearray()
+    keyed: List[Tuple[str, int]] = []
+    for (category, health), group in itertools.groupby(rows, key=lambda row: row[:2]):
+        members = list(group)
+        first = len(keyed)
+        items = [(_normalise(row[4], scales), index) for index, row in enumerate(members)]
+        for vector, index in _kd_order(items):
+            _, _, key, name, _ = members[index]
+            vectors.extend(struct.pack("<4f", *vector))
+            names.extend(struct.pack("<2I", *intern(name)))
+            keyed.append((key, len(keyed)))
+        partitions.extend(_PARTITION.pack(*intern(category), health, first, len(keyed)))
+
+    keyed.sort()
+    for (previous, _), (key, _) in zip(keyed, keyed[1:]):
+        if previous == key:
+            raise ValueError(f"Duplicate barcode {key!r}")
+    keys = b"".join(key.encode("ascii").ljust(KEY_WIDTH, b"\0") for key, _ in keyed)
+    key_rows = struct.pack(f"<{count}I", *(row for _, row in keyed))
+
+    sections = [scales_bytes, partitions, vectors, names, keys, key_rows, pool]
+    offsets = []
+    position = _align(_HEADER.size)
+    for section in sections:
+        offsets.append(position)
+        position = _align(position + len(section))
+    header = _HEADER.pack(MAGIC, count, len(partitions) // _PARTITION.size, *offsets)
+
+    tmp_path = f"{os.fspath(path)}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(header)
+        for offset, section in zip(offsets, sections):
+            handle.write(b"\0" * (offset - handle.tell()))
+            handle.write(section)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+class AlternativesIndex:
+    """Read-only view of a file written by :func:`write_alternatives`."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, partition_count, *offsets = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not an InfyFit alternatives index")
+        (
+            scales_offset,
+            partitions_offset,
+            vectors_offset,
+            names_offset,
+            self._keys_offset,
+            key_rows_offset,
+            self._pool_offset,
+        ) = offsets
+        count = self._count
+        view = memoryview(self._mmap)
+        self._views = [
+            view[vectors_offset : vectors_offset + 16 * count].cast("f"),
+            view[names_offset : names_offset + 8 * count].cast("I"),
+            view[key_rows_offset : key_rows_offset + 4 * count].cast("I"),
+        ]
+        self._vectors, self._names, self._key_rows = self._views
+        view.release()
+        self.scales = struct.unpack_from("<4f", self._mmap, scales_offset)
+        # Category -> [(score, first row, end row)] for each of its partitions.
+        self.categories: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._partition_rows: List[int] = []
+        self._partition_names: List[str] = []
+        for index in range(partition_count):
+            name_offset, name_length, health, first, end = _PARTITION.unpack_from(
+                self._mmap, partitions_offset + index * _PARTITION.size
+            )
+            name = self._string(name_offset, name_length)
+            self.categories.setdefault(name, []).append((health, first, end))
+            self._partition_rows.append(first)
+            self._partition_names.append(name)
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self) -> "AlternativesIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def category_of(self, barcode: str) -> Optional[str]:
+        row = self._row_of(barcode)
+        return None if row < 0 else self._category_at(row)
+
+    def better_for(
+        self, barcode: str, nutrients: Mapping[str, float], score: int, k: int = 3
+    ) -> List[str]:
+        """Names of the ``k`` nearest same-category products scoring above ``score``."""
+        row = self._row_of(barcode)
+        if row < 0:
+            return []
+        return self.better(nutrients, self._category_at(row), score, k, exclude_row=row)
+
+    def better(
+        self,
+        nutrients: Mapping[str, float],
+        category: str,
+        score: int,
+        k: int = 3,
+        exclude_row: int = -1,
+    ) -> List[str]:
+        if k <= 0:
+            return []
+        # Best-first frontier of (squared-distance lower bound, first row, end row, depth).
+        pending = [
+            (0.0, first, end, 0)
+            for health, first, end in self.categories.get(category, ())
+            if health > score
+        ]
+        query = _normalise([float(nutrients[name]) for name in DIMENSIONS], self.scales)
+        q0, q1, q2, q3 = query
+        vectors = self._vectors
+        best: List[Tuple[float, int]] = []  # max-heap of (-distance, row)
+
+        def offer(row: int) -> None:
+            if row == exclude_row:
+                return
+            base = 4 * row
+            distance = (
+                (vectors[base] - q0) ** 2
+                + (vectors[base + 1] - q1) ** 2
+                + (vectors[base + 2] - q2) ** 2
+                + (vectors[base + 3] - q3) ** 2
+            )
+            if len(best) < k:
+                heapq.heappush(best, (-distance, row))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, row))
+
+        heapq.heapify(pending)
+        while pending:
+            bound, low, high, depth = heapq.heappop(pending)
+            if len(best) == k and bound >= -best[0][0]:
+                continue
+            if high - low <= LEAF_ROWS:
+                for row in range(low, high):
+                    offer(row)
+                continue
+            middle = (low + high) // 2
+            axis = depth % 4
+            gap = query[axis] - vectors[4 * middle + axis]
+            offer(middle)
+            if gap < 0:
+                near, far = (low, middle), (middle + 1, high)
+            else:
+                near, far = (middle + 1, high), (low, middle)
+            heapq.heappush(pending, (max(bound, gap * gap), *far, depth + 1))
+            heapq.heappush(pending, (bound, *near, depth + 1))
+
+        names: List[str] = []
+        for _, row in sorted(best, reverse=True):
+            name = self._string(self._names[2 * row], self._names[2 * row + 1])
+            if name not in names:
+                names.append(name)
+        return names
+
+    def _category_at(self, row: int) -> str:
+        return self._partition_names[bisect_right(self._partition_rows, row) - 1]
+
+    def _row_of(self, barcode: str) -> int:
+        key = normalize_barcode(barcode)
+        if key is None:
+            return -1
+        probe = key.encode("ascii").ljust(KEY_WIDTH, b"\0")
+        data, base = self._mmap, self._keys_offset
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            start = base + middle * KEY_WIDTH
+            found = data[start : start + KEY_WIDTH]
+            if found < probe:
+                low = middle + 1
+            elif found > probe:
+                high = middle
+            else:
+                return self._key_rows[middle]
+        return -1
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._pool_offset + offset
+        return self._mmap[start : start + length].decode("utf-8")
+
+
+__all__ = ["AlternativesIndex", "DIMENSIONS", "write_alternatives"]
@@ -0,0 +1,98 @@
+"""SQLite-backed store of precomputed coach cards keyed by user and day.
+
+Cards are stored as the compact JSON bytes the API serves, so a read is a
+single primary-key lookup with no re-encoding.  The database runs in WAL
+journal mode so the API can read while the nightly job writes.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from datetime import date
+from typing import Iterable, Iterator, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS coach_cards (
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    card BLOB NOT NULL,
+    PRIMARY KEY (user_id, day)
+) WITHOUT ROWID
+"""
+
+CardRow = Tuple[str, str, bytes]
+
+
+class CoachCardStore:
+    """Keyed card store; each thread gets its own SQLite connection."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(_SCHEMA)
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path)
+        return connection
+
+    def put_many(self, rows: Iterable[CardRow]) -> int:
+        """Upsert ``(user_id, iso_day, card_json)`` rows in one transaction."""
+        connection = self._connection()
+        with connection:
+            cursor = connection.executemany(
+                "INSERT OR REPLACE INTO coach_cards (user_id, day, card) VALUES (?, ?, ?)", rows
+            )
+        return cursor.rowcount
+
+    def get(self, user_id: str, day: date) -> Optional[bytes]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT card FROM coach_cards WHERE user_id = ? AND day = ?",
+                (user_id, day.isoformat()),
+            )
+            .fetchone()
+        )
+        return bytes(row[0]) if row else None
+
+    def cards_for(self, user_id: str, chunk_rows: int = 256) -> Iterator[Tuple[str, bytes]]:
+        """Yield ``(iso_day, card_json)`` for one user in day order, a chunk at a time."""
+        connection = self._connection()
+        last = ""
+        while True:
+            rows = connection.execute(
+                "SELECT day, card FROM coach_cards WHERE user_id = ? AND day > ?"
+                " ORDER BY day LIMIT ?",
+                (user_id, last, chunk_rows),
+            ).fetchall()
+            for day, card in rows:
+                yield day, bytes(card)
+            if len(rows) < chunk_rows:
+                return
+            last = rows[-1][0]
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        """Delete every card of ``user_ids`` in one transaction, in primary-key order."""
+        connection = self._connection()
+        with connection:
+            cursor = connection.executemany(
+                "DELETE FROM coach_cards WHERE user_id = ?",
+                ((user_id,) for user_id in sorted(user_ids)),
+            )
+        return cursor.rowcount
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM coach_cards").fetchone()[0]
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
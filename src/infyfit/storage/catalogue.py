@@ -0,0 +1,272 @@
+"""Memory-mapped columnar product catalogue.
+
+The in-memory ``PRODUCT_DATA``/``BARCODE_DB`` dictionaries are fine for the
+reference data set but a national barcode catalogue does not fit in every
+worker.  This module defines a compact read-only file format that is opened
+with :mod:`mmap`, so forked workers share the same page cache and a lookup
+only touches the pages it needs::
+
+    header   magic, record count and section offsets
+    keys     count * KEY_WIDTH bytes, sorted ASCII barcodes padded with NUL
+    macros   five float32 columns (calories, protein, fat, carbs, serving)
+    refs     count * 4 (offset, length) uint32 pairs into the string pool
+    pool     de-duplicated UTF-8 strings; lists are joined with US (0x1f)
+
+Lookups binary search the key section and decode a single row.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"IFYCAT01"
+KEY_WIDTH = 14
+MACRO_FIELDS: Tuple[str, ...] = ("calories", "protein", "fat", "carbs", "serving_size_g")
+LIST_SEPARATOR = "\x1f"
+
+_HEADER = struct.Struct("<8sII5Q")
+_REFS = struct.Struct("<8I")
+_FLOAT_SIZE = 4
+
+
+@dataclass(frozen=True)
+class CatalogueRecord:
+    """A single catalogue row.
+
+    The attribute names match :class:`~infyfit.agents.reference_products.ProductRecord`
+    so records can be served wherever the scanner expects one.
+    """
+
+    barcode: str
+    name: str
+    brand: Optional[str]
+    ingredients: Tuple[str, ...]
+    nutrients: Dict[str, float]
+    alternatives: Tuple[str, ...] = ()
+
+
+def _encode_key(barcode: str) -> bytes:
+    key = barcode.encode("ascii")
+    if not key or len(key) > KEY_WIDTH:
+        raise ValueError(f"Barcode {barcode!r} does not fit the {KEY_WIDTH}-byte key column")
+    return key.ljust(KEY_WIDTH, b"\0")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_catalogue(path: str | os.PathLike[str], records: Iterable[CatalogueRecord]) -> int:
+    """Write ``records`` to ``path`` atomically and return the number of rows."""
+    rows = sorted(records, key=lambda record: _encode_key(record.barcode))
+    count = len(rows)
+
+    pool = bytearray()
+    interned: Dict[str, Tuple[int, int]] = {}
+
+    def intern(text: str) -> Tuple[int, int]:
+        ref = interned.get(text)
+        if ref is None:
+            encoded = text.encode("utf-8")
+            ref = interned[text] = (len(pool), len(encoded))
+            pool.extend(encoded)
+        return ref
+
+    keys = bytearray()
+    columns = [bytearray() for _ in MACRO_FIELDS]
+    refs = bytearray()
+    previous = None
+    for record in rows:
+        key = _encode_key(record.barcode)
+        if key == previous:
+            raise ValueError(f"Duplicate barcode {record.barcode!r}")
+        previous = key
+        keys.extend(key)
+        for column, field_name in zip(columns, MACRO_FIELDS):
+            column.extend(struct.pack("<f", float(record.nutrients[field_name])))
+        refs.extend(
+            _REFS.pack(
+                *intern(record.name),
+                *intern(record.brand or ""),
+                *intern(LIST_SEPARATOR.join(record.ingredients)),
+                *intern(LIST_SEPARATOR.join(record.alternatives)),
+            )
+        )
+
+    keys_offset = _align(_HEADER.size)
+    macros_offset = _align(keys_offset + len(keys))
+    refs_offset = _align(macros_offset + sum(len(column) for column in columns))
+    pool_offset = _align(refs_offset + len(refs))
+    header = _HEADER.pack(
+        MAGIC, count, KEY_WIDTH, keys_offset, macros_offset, refs_offset, pool_offset, len(pool)
+    )
+
+    tmp_path = f"{os.fspath(path)}.tmp"
+    with open(tmp_path, "wb") as handle:
+        for offset, chunk in (
+            (0, header),
+            (keys_offset, keys),
+            (macros_offset, b"".join(columns)),
+            (refs_offset, refs),
+            (pool_offset, pool),
+        ):
+            handle.write(b"\0" * (offset - handle.tell()))
+            handle.write(chunk)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+class ProductCatalogue(Mapping):
+    """Read-only ``Mapping[str, CatalogueRecord]`` backed by an mmapped file.
+
+    Float32 macros are rounded to three decimals on read so JSON payloads do
+    not leak single-precision noise such as ``8.300000190734863``.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            self._count,
+            key_width,
+            self._keys_offset,
+            macros_offset,
+            self._refs_offset,
+            self._pool_offset,
+            _pool_size,
+        ) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or key_width != KEY_WIDTH:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not an InfyFit product catalogue")
+        view = memoryview(self._mmap)
+        column_bytes = self._count * _FLOAT_SIZE
+        self._columns = []
+        for position in range(len(MACRO_FIELDS)):
+            start = macros_offset + position * column_bytes
+            self._columns.append(view[start : start + column_bytes].cast("f"))
+        view.release()
+
+    def close(self) -> None:
+        for column in self._columns:
+            column.release()
+        self._columns = []
+        self._mmap.close()
+
+    def __enter__(self) -> "ProductCatalogue":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._count):
+            yield self._key_at(index)
+
+    def __contains__(self, barcode: object) -> bool:
+        return isinstance(barcode, str) and self._find(barcode) >= 0
+
+    def __getitem__(self, barcode: str) -> CatalogueRecord:
+        index = self._find(barcode) if isinstance(barcode, str) else -1
+        if index < 0:
+            raise KeyError(barcode)
+        return self._record_at(index, barcode)
+
+    def names(self) -> Iterator[Tuple[str, str]]:
+        """Yield ``(barcode, name)`` for every row, decoding only the name column."""
+        for index in range(self._count):
+            refs = _REFS.unpack_from(self._mmap, self._refs_offset + index * _REFS.size)
+            yield self._key_at(index), self._string(refs[0], refs[1])
+
+    def nutrients_at(self, index: int) -> Dict[str, float]:
+        return {
+            field_name: round(column[index], 3)
+            for field_name, column in zip(MACRO_FIELDS, self._columns)
+        }
+
+    def nutrition_view(self) -> "NutritionView":
+        """Return the ``(name, nutrients, alternatives)`` view used by the resolver."""
+        return NutritionView(self)
+
+    def _key_at(self, index: int) -> str:
+        start = self._keys_offset + index * KEY_WIDTH
+        return self._mmap[start : start + KEY_WIDTH].rstrip(b"\0").decode("ascii")
+
+    def _find(self, barcode: str) -> int:
+        try:
+            key = _encode_key(barcode)
+        except (UnicodeEncodeError, ValueError):
+            return -1
+        data = self._mmap
+        base = self._keys_offset
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            start = base + middle * KEY_WIDTH
+            probe = data[start : start + KEY_WIDTH]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return middle
+        return -1
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._pool_offset + offset
+        return self._mmap[start : start + length].decode("utf-8")
+
+    def _list(self, offset: int, length: int) -> Tuple[str, ...]:
+        return tuple(self._string(offset, length).split(LIST_SEPARATOR)) if length else ()
+
+    def _row(self, index: int) -> Tuple[str, Optional[str], Tuple[str, ...], Tuple[str, ...]]:
+        refs = _REFS.unpack_from(self._mmap, self._refs_offset + index * _REFS.size)
+        brand = self._string(refs[2], refs[3])
+        return (
+            self._string(refs[0], refs[1]),
+            brand or None,
+            self._list(refs[4], refs[5]),
+            self._list(refs[6], refs[7]),
+        )
+
+    def _record_at(self, index: int, barcode: str) -> CatalogueRecord:
+        name, brand, ingredients, alternatives = self._row(index)
+        return CatalogueRecord(
+            barcode=barcode,
+            name=name,
+            brand=brand,
+            ingredients=ingredients,
+            nutrients=self.nutrients_at(index),
+            alternatives=alternatives,
+        )
+
+
+class NutritionView(Mapping):
+    """Expose a catalogue in the ``ProductData`` shape expected by the resolver."""
+
+    def __init__(self, catalogue: ProductCatalogue) -> None:
+        self._catalogue = catalogue
+
+    def __len__(self) -> int:
+        return len(self._catalogue)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._catalogue)
+
+    def __contains__(self, barcode: object) -> bool:
+        return barcode in self._catalogue
+
+    def __getitem__(self, barcode: str) -> Tuple[str, Dict[str, float], List[str]]:
+        record = self._catalogue[barcode]
+        return record.name, record.nutrients, list(record.alternatives)
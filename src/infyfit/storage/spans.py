@@ -0,0 +1,238 @@
+"""Columnar ring buffer for accepted telemetry spans.
+
+Spans are stored as three preallocated typed arrays (event-name id,
+duration and success flag) instead of one object per span.  When the
+buffer fills up it either spills its contents to size-bounded segment
+files through :class:`SpanSegmentWriter` or, without a writer, wraps
+around and overwrites the oldest spans.
+
+Segment file layout::
+
+    header   magic, row count, name-table length (``<8sII``)
+    names    JSON list of event names, indexed by name id
+    ids      row count * uint32
+    durations row count * float32 (milliseconds)
+    success  row count * uint8
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import struct
+import threading
+import uuid
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SEGMENT_MAGIC = b"IFYSPAN1"
+_SEGMENT_HEADER = struct.Struct("<8sII")
+# uint32 name id + float32 duration + uint8 success flag.
+ROW_BYTES = 4 + 4 + 1
+_SEGMENT_NAME = re.compile(r"spans-(\d+)(?:-[0-9a-f]+)?\.seg$")
+
+
+class SpanSegmentWriter:
+    """Write span columns to numbered segment files of at most ``segment_bytes``.
+
+    Numbering continues after the highest segment already in the directory,
+    and every name carries a per-writer token, so several worker processes
+    can share a directory.  Files are published with a hard link, which
+    never replaces an existing segment.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], segment_bytes: int = 8 << 20) -> None:
+        self.directory = os.fspath(directory)
+        self.segment_bytes = segment_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        numbers = [
+            int(match.group(1))
+            for match in map(_SEGMENT_NAME.match, os.listdir(self.directory))
+            if match is not None
+        ]
+        self._sequence = max(numbers, default=-1) + 1
+        self._token = uuid.uuid4().hex[:12]
+
+    def write(
+        self, names: Sequence[str], ids: array, durations: array, successes: array
+    ) -> List[str]:
+        """Persist the columns and return the paths of the files written."""
+        names_blob = json.dumps(list(names), separators=(",", ":")).encode("utf-8")
+        overhead = _SEGMENT_HEADER.size + len(names_blob)
+        rows_per_file = max((self.segment_bytes - overhead) // ROW_BYTES, 1)
+        paths: List[str] = []
+        for start in range(0, len(ids), rows_per_file):
+            stop = min(start + rows_per_file, len(ids))
+            paths.append(
+                self._write_file(
+                    names_blob,
+                    ids[start:stop],
+                    array("f", durations[start:stop]),
+                    successes[start:stop],
+                )
+            )
+        return paths
+
+    def _write_file(self, names_blob: bytes, ids: array, durations: array, successes: array) -> str:
+        tmp_path = os.path.join(self.directory, f".spans-{self._token}.tmp")
+        with open(tmp_path, "wb") as handle:
+            handle.write(_SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(ids), len(names_blob)))
+            handle.write(names_blob)
+            ids.tofile(handle)
+            durations.tofile(handle)
+            successes.tofile(handle)
+        try:
+            while True:
+                path = os.path.join(
+                    self.directory, f"spans-{self._sequence:08d}-{self._token}.seg"
+                )
+                self._sequence += 1
+                try:
+                    os.link(tmp_path, path)
+                except FileExistsError:
+                    continue
+                return path
+        finally:
+            os.remove(tmp_path)
+
+
+def read_segment(path: str | os.PathLike[str]) -> Tuple[List[str], array, array, array]:
+    """Load a segment file back into ``(names, ids, durations, successes)``."""
+    with open(path, "rb") as handle:
+        magic, rows, names_length = _SEGMENT_HEADER.unpack(handle.read(_SEGMENT_HEADER.size))
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not a span segment")
+        names = json.loads(handle.read(names_length))
+        ids, durations, successes = array("I"), array("f"), array("B")
+        ids.fromfile(handle, rows)
+        durations.fromfile(handle, rows)
+        successes.fromfile(handle, rows)
+    return names, ids, durations, successes
+
+
+class SpanBuffer:
+    """Fixed-capacity columnar ring buffer of spans.
+
+    Event names are interned to small integer ids once, so appending a span
+    costs three array stores and no allocation.
+    """
+
+    def __init__(self, capacity: int = 1 << 16, writer: Optional[SpanSegmentWriter] = None) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.writer = writer
+        self._ids = array("I", bytes(4 * capacity))
+        self._durations = array("d", bytes(8 * capacity))
+        self._successes = array("B", bytes(capacity))
+        self._head = 0
+        self._size = 0
+        self._name_ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+        self.total_appended = 0
+        self.overwritten = 0
+        self.segments_written = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def name_id(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            with self._lock:
+                name_id = self._name_ids.setdefault(name, len(self._names))
+                if name_id == len(self._names):
+                    self._names.append(name)
+        return name_id
+
+    def append(self, name_id: int, duration_ms: float, success: bool) -> None:
+        with self._lock:
+            self.total_appended += 1
+            if self._size == self.capacity:
+                if self.writer is not None:
+                    self._flush()
+                else:
+                    self._head = (self._head + 1) % self.capacity
+                    self._size -= 1
+                    self.overwritten += 1
+            position = (self._head + self._size) % self.capacity
+            self._ids[position] = name_id
+            self._durations[position] = duration_ms
+            self._successes[position] = success
+            self._size += 1
+
+    def extend(self, ids: array, durations: array, successes: array) -> None:
+        """Append equally sized ``I``/``d``/``B`` columns with slice copies."""
+        with self._lock:
+            self._store(ids, durations, successes)
+
+    def columns(self) -> Tuple[array, array, array]:
+        """Return copies of the buffered columns, oldest span first."""
+        with self._lock:
+            return self._ordered()
+
+    def flush(self) -> List[str]:
+        """Write buffered spans to the segment writer (if any) and empty the buffer."""
+        with self._lock:
+            return self._flush()
+
+    def _store(self, ids: array, durations: array, successes: array) -> None:
+        capacity = self.capacity
+        total = len(ids)
+        self.total_appended += total
+        if self.writer is None and total > capacity:
+            # Only the newest ``capacity`` spans can survive the wrap-around.
+            skip = total - capacity
+            self.overwritten += self._size + skip
+            self._head = self._size = 0
+            ids, durations, successes = ids[skip:], durations[skip:], successes[skip:]
+            total = capacity
+        offset = 0
+        while offset < total:
+            if self._size == capacity and self.writer is not None:
+                self._flush()
+            start = (self._head + self._size) % capacity
+            if self.writer is None:
+                count = min(total - offset, capacity - start)
+                overflow = self._size + count - capacity
+                if overflow > 0:
+                    self._head = (self._head + overflow) % capacity
+                    self._size -= overflow
+                    self.overwritten += overflow
+            else:
+                count = min(total - offset, capacity - self._size, capacity - start)
+            stop = start + count
+            self._ids[start:stop] = ids[offset : offset + count]
+            self._durations[start:stop] = durations[offset : offset + count]
+            self._successes[start:stop] = successes[offset : offset + count]
+            self._size += count
+            offset += count
+
+    def _ordered(self) -> Tuple[array, array, array]:
+        first = self._head
+        last = first + self._size
+        if last <= self.capacity:
+            return self._ids[first:last], self._durations[first:last], self._successes[first:last]
+        wrap = last - self.capacity
+        return (
+            self._ids[first:] + self._ids[:wrap],
+            self._durations[first:] + self._durations[:wrap],
+            self._successes[first:] + self._successes[:wrap],
+        )
+
+    def _flush(self) -> List[str]:
+        if not self._size:
+            return []
+        paths: List[str] = []
+        if self.writer is not None:
+            paths = self.writer.write(self._names, *self._ordered())
+            self.segments_written += len(paths)
+        self._head = 0
+        self._size = 0
+        return paths
@@ -0,0 +1,202 @@
+"""Columnar per-user time series of daily health aggregates.
+
+Each user's history is four contiguous typed arrays: day gaps (the first
+entry anchors the series, so dates cost two bytes each), steps, activity
+minutes and a one-byte sleep-quality code into the fixed
+:data:`SLEEP_LABELS` vocabulary; labels outside it are kept as ``"other"``
+so clients cannot grow shared state.  Devices sync forward in time, so the
+common write is an append or an overwrite of the newest day.  Window reads walk back from the newest
+day, so they cost O(window) whatever the history length.
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..data_models import HealthAggregate
+
+# Days of history agents consult for the latest sleep quality.
+RECENT_DAYS = 3
+SLEEP_LABELS: Tuple[str, ...] = ("unknown", "poor", "fair", "good", "excellent", "other")
+# Widest span of days one series can hold; every gap must fit its ``H`` slot.
+MAX_SPAN_DAYS = 0xFFFF
+
+_SLEEP_CODES = {label: code for code, label in enumerate(SLEEP_LABELS)}
+_OTHER = _SLEEP_CODES["other"]
+_VALUE_LIMIT = 1 << (8 * array("l").itemsize - 1)
+
+
+@dataclass
+class HealthWindow:
+    """A user's aggregates between two dates, oldest first, as columns."""
+
+    dates: List[date]
+    steps: List[int]
+    sleep_quality: List[str]
+    activity_minutes: List[int]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def on(self, day: date) -> Optional[HealthAggregate]:
+        for index in range(len(self.dates) - 1, -1, -1):
+            if self.dates[index] == day:
+                return self._aggregate(index)
+        return None
+
+    def latest(self) -> Optional[HealthAggregate]:
+        return self._aggregate(len(self.dates) - 1) if self.dates else None
+
+    def _aggregate(self, index: int) -> HealthAggregate:
+        return HealthAggregate(
+            date=self.dates[index],
+            steps=self.steps[index],
+            sleep_quality=self.sleep_quality[index],
+            activity_minutes=self.activity_minutes[index],
+        )
+
+
+class _Series:
+    __slots__ = ("first", "last", "gaps", "steps", "sleep", "activity")
+
+    def __init__(self) -> None:
+        self.first = 0  # ordinal of the oldest day
+        self.last = 0  # ordinal of the newest day
+        self.gaps = array("H")  # gaps[0] == 0; gaps[i] = ordinal[i] - ordinal[i - 1]
+        self.steps = array("l")
+        self.sleep = array("B")
+        self.activity = array("l")
+
+    def position(self, ordinal: int) -> Tuple[int, int]:
+        """Walk back to the newest index whose day is not after ``ordinal``.
+
+        Returns ``(index, day)``; when every day is later ``index`` is -1 and
+        ``day`` is the first stored day.
+        """
+        index, current = len(self.gaps) - 1, self.last
+        while index >= 0 and current > ordinal:
+            current -= self.gaps[index]
+            index -= 1
+        return index, current
+
+    def put(self, ordinal: int, steps: int, sleep: int, activity: int) -> None:
+        if not self.gaps or ordinal > self.last:
+            if not self.gaps:
+                self.first = ordinal
+            self.gaps.append(ordinal - self.last if self.gaps else 0)
+            self.steps.append(steps)
+            self.sleep.append(sleep)
+            self.activity.append(activity)
+            self.last = ordinal
+            return
+        index, current = self.position(ordinal)
+        if index >= 0 and current == ordinal:
+            self.steps[index], self.sleep[index], self.activity[index] = steps, sleep, activity
+            return
+        # Back-fill: split the gap to the next stored day around the new one.
+        at = index + 1
+        if at == 0:  # before the first day; ``current`` is that first day
+            self.gaps[0] = current - ordinal
+            self.gaps.insert(0, 0)
+            self.first = ordinal
+        else:
+            self.gaps[at] = current + self.gaps[at] - ordinal
+            self.gaps.insert(at, ordinal - current)
+        self.steps.insert(at, steps)
+        self.sleep.insert(at, sleep)
+        self.activity.insert(at, activity)
+
+
+class HealthTimeSeries:
+    """Thread-safe store of every user's :class:`_Series`."""
+
+    def __init__(self) -> None:
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def check(self, user_id: str, aggregates: Iterable[HealthAggregate]) -> None:
+        """Raise ``ValueError`` if :meth:`append` could not store ``aggregates``.
+
+        Callers that also write other stores run this first, so a rejected
+        upload leaves every store untouched.
+        """
+        ordinals: List[int] = []
+        for aggregate in aggregates:
+            for value in (aggregate.steps, aggregate.activity_minutes):
+                if not 0 <= value < _VALUE_LIMIT:
+                    raise ValueError(f"Health aggregate value out of range: {value}")
+            ordinals.append(aggregate.date.toordinal())
+        if not ordinals:
+            return
+        with self._lock:
+            series = self._series.get(user_id)
+            if series is not None and series.gaps:
+                ordinals += (series.first, series.last)
+        if max(ordinals) - min(ordinals) > MAX_SPAN_DAYS:
+            raise ValueError(f"Health history spans more than {MAX_SPAN_DAYS} days")
+
+    def append(self, user_id: str, aggregates: Iterable[HealthAggregate]) -> int:
+        """Upsert ``aggregates`` into the user's series; return how many were written."""
+        written = 0
+        with self._lock:
+            series = self._series.get(user_id)
+            if series is None:
+                series = self._series[user_id] = _Series()
+            for aggregate in aggregates:
+                series.put(
+                    aggregate.date.toordinal(),
+                    aggregate.steps,
+                    _SLEEP_CODES.get(aggregate.sleep_quality.lower(), _OTHER),
+                    aggregate.activity_minutes,
+                )
+                written += 1
+        return written
+
+    def window(self, user_id: str, last: date, days: int) -> HealthWindow:
+        """Aggregates from ``days - 1`` days before ``last`` through ``last``."""
+        dates: List[date] = []
+        steps: List[int] = []
+        sleep: List[str] = []
+        activity: List[int] = []
+        with self._lock:
+            series = self._series.get(user_id)
+            if series is not None:
+                start = last.toordinal() - days + 1
+                index, current = series.position(last.toordinal())
+                while index >= 0 and current >= start:
+                    dates.append(date.fromordinal(current))
+                    steps.append(series.steps[index])
+                    sleep.append(SLEEP_LABELS[series.sleep[index]])
+                    activity.append(series.activity[index])
+                    current -= series.gaps[index]
+                    index -= 1
+        for column in (dates, steps, sleep, activity):
+            column.reverse()
+        return HealthWindow(dates, steps, sleep, activity)
+
+    def recent(
+        self, user_id: str, day: date, days: int = RECENT_DAYS
+    ) -> Tuple[Optional[int], Optional[str]]:
+        """``(steps on day, newest sleep quality in the window)``, ``None`` when unknown."""
+        window = self.window(user_id, day, days)
+        today = window.on(day)
+        latest = window.latest()
+        return (
+            today.steps if today is not None else None,
+            latest.sleep_quality if latest is not None else None,
+        )
+
+    def days(self, user_id: str) -> int:
+        series = self._series.get(user_id)
+        return len(series.gaps) if series is not None else 0
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        with self._lock:
+            return sum(self._series.pop(user_id, None) is not None for user_id in user_ids)
+
+
+__all__ = ["HealthTimeSeries", "HealthWindow", "MAX_SPAN_DAYS", "RECENT_DAYS", "SLEEP_LABELS"]
@@ -0,0 +1,132 @@
+"""Durable account-deletion tombstones with an in-memory read filter.
+
+Deleting an account writes one tombstone row immediately; the user's data
+stays in place, hidden from reads, until the cancel window ends and the
+compactor purges it.  Every process keeps the live tombstones in a dict, so
+filtering a read is one hash lookup.  The dict is reloaded only when SQLite's
+``data_version`` shows that another connection (another worker) committed a
+change since this thread last looked.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tombstones (
+    user_id TEXT PRIMARY KEY,
+    requested_at REAL NOT NULL,
+    purge_after REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+CANCEL_WINDOW_S = 30 * 24 * 3600.0
+
+
+class TombstoneStore:
+    """Pending deletions keyed by user; each thread gets its own connection."""
+
+    def __init__(self, path: str | os.PathLike[str], window_s: float = CANCEL_WINDOW_S) -> None:
+        self.path = os.fspath(path)
+        self.window_s = window_s
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # user_id -> purge_after (epoch seconds); replaced wholesale on reload.
+        self._deleted: Dict[str, float] = {}
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(_SCHEMA)
+        connection.commit()
+        self._refresh(force=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path)
+            self._local.version = None
+        return connection
+
+    def _refresh(self, force: bool = False) -> None:
+        connection = self._connection()
+        version = connection.execute("PRAGMA data_version").fetchone()[0]
+        if not force and version == self._local.version:
+            return
+        with self._lock:  # a reload must not race a local mark or cancel
+            rows = connection.execute("SELECT user_id, purge_after FROM tombstones").fetchall()
+            self._deleted = dict(rows)
+        self._local.version = version
+
+    def mark(self, user_id: str, now: Optional[float] = None) -> float:
+        """Tombstone ``user_id`` (keeping an earlier request); return its purge time."""
+        now = time.time() if now is None else now
+        connection = self._connection()
+        with self._lock, connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO tombstones (user_id, requested_at, purge_after)"
+                " VALUES (?, ?, ?)",
+                (user_id, now, now + self.window_s),
+            )
+            purge_after = connection.execute(
+                "SELECT purge_after FROM tombstones WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+            self._deleted = {**self._deleted, user_id: purge_after}
+        return purge_after
+
+    def cancel(self, user_id: str, now: Optional[float] = None) -> bool:
+        """Lift a deletion still inside its window; ``False`` when none can be lifted."""
+        now = time.time() if now is None else now
+        connection = self._connection()
+        with self._lock, connection:
+            cursor = connection.execute(
+                "DELETE FROM tombstones WHERE user_id = ? AND purge_after > ?", (user_id, now)
+            )
+            if not cursor.rowcount:
+                return False
+            deleted = dict(self._deleted)
+            deleted.pop(user_id, None)
+            self._deleted = deleted
+        return True
+
+    def is_deleted(self, user_id: str) -> bool:
+        self._refresh()
+        return user_id in self._deleted
+
+    def purge_after(self, user_id: str) -> Optional[float]:
+        self._refresh()
+        return self._deleted.get(user_id)
+
+    def due(self, now: Optional[float] = None, limit: int = 1000) -> List[str]:
+        """User ids whose cancel window has ended, in key order."""
+        now = time.time() if now is None else now
+        rows = self._connection().execute(
+            "SELECT user_id FROM tombstones WHERE purge_after <= ? ORDER BY user_id LIMIT ?",
+            (now, limit),
+        )
+        return [user_id for (user_id,) in rows]
+
+    def clear(self, user_ids: Iterable[str]) -> None:
+        """Drop the tombstones of users whose data has been purged."""
+        ids = list(user_ids)
+        connection = self._connection()
+        with self._lock, connection:
+            connection.executemany(
+                "DELETE FROM tombstones WHERE user_id = ?", ((user_id,) for user_id in ids)
+            )
+            deleted = dict(self._deleted)
+            for user_id in ids:
+                deleted.pop(user_id, None)
+            self._deleted = deleted
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._deleted)
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
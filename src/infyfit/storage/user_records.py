@@ -0,0 +1,116 @@
+"""SQLite-backed append log of per-user history for privacy exports.
+
+Every meal scan, product score, workout plan, coach card and telemetry
+event served to a signed-in user is appended as the compact JSON bytes the
+API produced, tagged with its kind.  Reads page through one user's rows by
+primary key in fixed-size chunks, so an export never holds more than one
+chunk in memory or keeps a read transaction open between chunks.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS user_records (
+        seq INTEGER PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        recorded_at REAL NOT NULL,
+        payload BLOB NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS user_records_by_kind ON user_records (user_id, kind, seq)",
+)
+
+RECORD_KINDS: Tuple[str, ...] = (
+    "meal_scans",
+    "product_scores",
+    "workout_plans",
+    "coach_cards",
+    "telemetry",
+)
+
+# (user_id, kind, payload_json)
+RecordRow = Tuple[str, str, bytes]
+# (seq, recorded_at, payload_json)
+StoredRecord = Tuple[int, float, bytes]
+
+
+class UserRecordStore:
+    """Append-only per-user record log; each thread gets its own connection."""
+
+    def __init__(self, path: str | os.PathLike[str], chunk_rows: int = 512) -> None:
+        self.path = os.fspath(path)
+        self.chunk_rows = chunk_rows
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path)
+        return connection
+
+    def append(self, user_id: str, kind: str, payload: bytes) -> None:
+        self.put_many([(user_id, kind, payload)])
+
+    def put_many(self, rows: Iterable[RecordRow]) -> int:
+        """Append ``(user_id, kind, payload_json)`` rows in one transaction."""
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            cursor = connection.executemany(
+                "INSERT INTO user_records (user_id, kind, recorded_at, payload)"
+                " VALUES (?, ?, ?, ?)",
+                ((user_id, kind, now, payload) for user_id, kind, payload in rows),
+            )
+        return cursor.rowcount
+
+    def iter_user(self, user_id: str, kind: str) -> Iterator[StoredRecord]:
+        """Yield one user's records of ``kind`` oldest first, a chunk at a time."""
+        connection = self._connection()
+        last = 0
+        while True:
+            rows = connection.execute(
+                "SELECT seq, recorded_at, payload FROM user_records"
+                " WHERE user_id = ? AND kind = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (user_id, kind, last, self.chunk_rows),
+            ).fetchall()
+            for seq, recorded_at, payload in rows:
+                yield seq, recorded_at, bytes(payload)
+            if len(rows) < self.chunk_rows:
+                return
+            last = rows[-1][0]
+
+    def purge_users(self, user_ids: Iterable[str]) -> int:
+        """Delete every record of ``user_ids`` in one transaction, walking the index in order."""
+        connection = self._connection()
+        with connection:
+            cursor = connection.executemany(
+                "DELETE FROM user_records WHERE user_id = ?",
+                ((user_id,) for user_id in sorted(user_ids)),
+            )
+        return cursor.rowcount
+
+    def count(self, user_id: Optional[str] = None) -> int:
+        if user_id is None:
+            query, params = "SELECT COUNT(*) FROM user_records", ()
+        else:
+            query, params = "SELECT COUNT(*) FROM user_records WHERE user_id = ?", (user_id,)
+        return self._connection().execute(query, params).fetchone()[0]
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
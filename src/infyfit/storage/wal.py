@@ -0,0 +1,272 @@
+"""Segmented write-ahead log with group commit and checkpoints.
+
+Records are appended to numbered segment files; each one is framed as::
+
+    header   payload length, CRC-32 of (lsn, payload), lsn (``<IIQ``)
+    payload  opaque bytes
+
+Log sequence numbers (LSNs) are dense and start at 1.  A segment is named
+after the first LSN it holds, so replay can seek straight to the segment
+containing the checkpoint LSN.  Writers share fsyncs through group commit:
+the first thread that needs durability becomes the leader, flushes every
+record written so far and syncs once, while threads arriving during that
+fsync wait and are covered by the next one.
+
+:meth:`WriteAheadLog.checkpoint` atomically stores a state snapshot together
+with the LSN it reflects and deletes segments that only hold older records,
+so replay on startup reads the checkpoint plus the tail of the log instead
+of the whole history.  Checkpoints are serialised and only ever move
+forward: a snapshot older than the stored one is discarded.  A torn record
+at the end of the last segment (from a crash mid-write) is truncated when
+the log is opened.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import zlib
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+_RECORD = struct.Struct("<IIQ")
+_LSN = struct.Struct("<Q")
+CHECKPOINT_MAGIC = b"IFYWCKP1"
+_CHECKPOINT = struct.Struct("<8sQII")
+CHECKPOINT_NAME = "checkpoint"
+SEGMENT_SUFFIX = ".log"
+
+
+def _segment_name(first_lsn: int) -> str:
+    return f"wal-{first_lsn:020d}{SEGMENT_SUFFIX}"
+
+
+def _crc(lsn: int, payload: bytes) -> int:
+    return zlib.crc32(payload, zlib.crc32(_LSN.pack(lsn)))
+
+
+def _scan(data: bytes) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield ``(end_offset, lsn, payload)`` for each intact record in ``data``."""
+    view = memoryview(data)
+    offset = 0
+    while offset + _RECORD.size <= len(view):
+        length, crc, lsn = _RECORD.unpack_from(view, offset)
+        end = offset + _RECORD.size + length
+        if end > len(view):
+            return
+        payload = bytes(view[offset + _RECORD.size : end])
+        if _crc(lsn, payload) != crc:
+            return
+        yield end, lsn, payload
+        offset = end
+
+
+def _fsync_directory(directory: str) -> None:
+    if not hasattr(os, "O_DIRECTORY"):  # pragma: no cover - Windows
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """Append-only segmented log; ``append`` returns once the record is durable."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        segment_bytes: int = 16 << 20,
+        fsync: bool = True,
+    ) -> None:
+        self.directory = os.fspath(directory)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        os.makedirs(self.directory, exist_ok=True)
+        self._cond = threading.Condition(threading.Lock())
+        self._syncing = False
+        self._checkpoint_lock = threading.Lock()
+        self.appends = 0
+        self.commits = 0
+
+        self.checkpoint_lsn, self._checkpoint_state = self._load_checkpoint()
+        self._segments: List[Tuple[int, str]] = sorted(
+            (int(name[4 : -len(SEGMENT_SUFFIX)]), os.path.join(self.directory, name))
+            for name in os.listdir(self.directory)
+            if name.startswith("wal-") and name.endswith(SEGMENT_SUFFIX)
+        )
+        self.last_lsn = self.checkpoint_lsn
+        if self._segments:
+            self.last_lsn = max(self.last_lsn, self._recover_tail())
+        else:
+            self._segments.append(self._segment_path(self.last_lsn + 1))
+        self._durable_lsn = self.last_lsn
+        self._handle: BinaryIO = open(self._segments[-1][1], "ab")
+
+    # -- writing -----------------------------------------------------------
+
+    def append(self, payload: bytes) -> int:
+        """Write ``payload`` and wait until it is durable; return its LSN."""
+        return self.append_many((payload,))
+
+    def append_many(self, payloads: Iterable[bytes]) -> int:
+        """Write several payloads under one commit; return the last LSN."""
+        with self._cond:
+            for payload in payloads:
+                self._write(payload)
+            self._sync_to(self.last_lsn)
+            return self.last_lsn
+
+    def _write(self, payload: bytes) -> None:
+        if self._handle.tell() >= self.segment_bytes:
+            self._rotate()
+        lsn = self.last_lsn + 1
+        self._handle.write(_RECORD.pack(len(payload), _crc(lsn, payload), lsn))
+        self._handle.write(payload)
+        self.last_lsn = lsn
+        self.appends += 1
+
+    def _sync_to(self, lsn: int) -> None:
+        # Called with the lock held; it is released while the leader fsyncs.
+        while self._durable_lsn < lsn:
+            if self._syncing:
+                self._cond.wait()
+                continue
+            self._syncing = True
+            target = self.last_lsn
+            handle = self._handle
+            try:
+                handle.flush()
+                self._cond.release()
+                try:
+                    if self.fsync:
+                        os.fsync(handle.fileno())
+                finally:
+                    self._cond.acquire()
+                self._durable_lsn = max(self._durable_lsn, target)
+                self.commits += 1
+            finally:
+                self._syncing = False
+                self._cond.notify_all()
+
+    def _rotate(self) -> None:
+        while self._syncing:
+            self._cond.wait()
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+        self._handle.close()
+        self._durable_lsn = self.last_lsn
+        self._segments.append(self._segment_path(self.last_lsn + 1))
+        self._handle = open(self._segments[-1][1], "ab")
+        if self.fsync:
+            _fsync_directory(self.directory)
+
+    def _segment_path(self, first_lsn: int) -> Tuple[int, str]:
+        return first_lsn, os.path.join(self.directory, _segment_name(first_lsn))
+
+    # -- checkpoints and replay ---------------------------------------------
+
+    def checkpoint(self, state: bytes, lsn: int) -> bool:
+        """Persist ``state`` as reflecting every record up to ``lsn`` and compact.
+
+        Returns ``False`` without writing when a checkpoint at or beyond
+        ``lsn`` is already stored.
+        """
+        path = os.path.join(self.directory, CHECKPOINT_NAME)
+        # One writer at a time: dump, replace and compact must not interleave.
+        with self._checkpoint_lock:
+            if lsn <= self.checkpoint_lsn:
+                return False
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as handle:
+                handle.write(
+                    _CHECKPOINT.pack(CHECKPOINT_MAGIC, lsn, len(state), _crc(lsn, state))
+                )
+                handle.write(state)
+                handle.flush()
+                if self.fsync:
+                    os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+            if self.fsync:
+                _fsync_directory(self.directory)
+            with self._cond:
+                self.checkpoint_lsn, self._checkpoint_state = lsn, state
+            self.compact()
+        return True
+
+    def compact(self) -> int:
+        """Delete segments whose records all precede the checkpoint; return the count."""
+        with self._cond:
+            removable = 0
+            # A segment is obsolete once the next one starts at or before checkpoint + 1.
+            while (
+                removable + 1 < len(self._segments)
+                and self._segments[removable + 1][0] <= self.checkpoint_lsn + 1
+            ):
+                removable += 1
+            obsolete, self._segments = self._segments[:removable], self._segments[removable:]
+        for _, path in obsolete:
+            os.remove(path)
+        return len(obsolete)
+
+    def replay(self) -> Tuple[Optional[bytes], Iterator[Tuple[int, bytes]]]:
+        """Return the checkpoint state and an iterator over the records after it."""
+        return self._checkpoint_state, self.records(after=self.checkpoint_lsn)
+
+    def records(self, after: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """Yield ``(lsn, payload)`` for durable records with ``lsn > after``."""
+        with self._cond:
+            self._handle.flush()
+            segments = list(self._segments)
+            limit = self._durable_lsn
+        start = 0
+        for index, (first_lsn, _) in enumerate(segments):
+            if first_lsn <= after + 1:
+                start = index
+        for _, path in segments[start:]:
+            with open(path, "rb") as handle:
+                data = handle.read()
+            for _, lsn, payload in _scan(data):
+                if lsn > limit:
+                    return
+                if lsn > after:
+                    yield lsn, payload
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments)
+
+    def close(self) -> None:
+        with self._cond:
+            self._sync_to(self.last_lsn)
+            self._handle.close()
+
+    def _load_checkpoint(self) -> Tuple[int, Optional[bytes]]:
+        path = os.path.join(self.directory, CHECKPOINT_NAME)
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+        except FileNotFoundError:
+            return 0, None
+        magic, lsn, length, crc = _CHECKPOINT.unpack_from(data)
+        state = data[_CHECKPOINT.size : _CHECKPOINT.size + length]
+        if magic != CHECKPOINT_MAGIC or len(state) != length or _crc(lsn, state) != crc:
+            raise ValueError(f"{path} is not a valid WAL checkpoint")
+        return lsn, state
+
+    def _recover_tail(self) -> int:
+        """Truncate a torn record from the last segment and return its last LSN."""
+        first_lsn, path = self._segments[-1]
+        with open(path, "rb") as handle:
+            data = handle.read()
+        end, last_lsn = 0, first_lsn - 1
+        for end, last_lsn, _ in _scan(data):
+            pass
+        if end < len(data):
+            with open(path, "r+b") as handle:
+                handle.truncate(end)
+                if self.fsync:
+                    os.fsync(handle.fileno())
+        return last_lsn
@@ -0,0 +1,102 @@
+import json
+import random
+import struct
+
+from infyfit.agents.nutrition_resolver import score_from_macros
+from infyfit.barcodes import check_digit
+from infyfit.data_models import NutritionResolverRequest
+from infyfit.jobs import build_alternatives
+from infyfit.services import ServiceContainer
+from infyfit.storage import AlternativesIndex, CatalogueRecord, write_alternatives
+
+DIMS = ("calories", "protein", "fat", "carbs")
+
+
+def barcode(number):
+    body = f"{number:012d}"
+    return body + str(check_digit(body))
+
+
+def product(number, calories, protein, fat, carbs):
+    nutrients = {
+        "calories": calories,
+        "protein": protein,
+        "fat": fat,
+        "carbs": carbs,
+        "serving_size_g": 100.0,
+    }
+    return CatalogueRecord(barcode(number), f"Product {number}", None, (), nutrients)
+
+
+def random_products(count, seed=3):
+    rng = random.Random(seed)
+    for number in range(count):
+        record = product(
+            number,
+            rng.uniform(50, 600),
+            rng.uniform(0, 40),
+            rng.uniform(0, 35),
+            rng.uniform(0, 80),
+        )
+        yield record, rng.choice(["bars", "snacks", "dairy"])
+
+
+def brute_force(products, index, record, category, k=3):
+    def vector(nutrients):
+        raw = [min(max(nutrients[d] / s, 0.0), 1.0) for d, s in zip(DIMS, index.scales)]
+        return struct.unpack("<4f", struct.pack("<4f", *raw))
+
+    query = vector(record.nutrients)
+    score = score_from_macros(*(record.nutrients[d] for d in DIMS))
+    candidates = [
+        (sum((a - b) ** 2 for a, b in zip(vector(other.nutrients), query)), other.name)
+        for other, other_category in products
+        if other_category == category
+        and other.barcode != record.barcode
+        and score_from_macros(*(other.nutrients[d] for d in DIMS)) > score
+    ]
+    return [name for _, name in sorted(candidates)[:k]]
+
+
+def test_nearest_healthier_matches_brute_force(tmp_path):
+    products = list(random_products(3000))
+    # Water-like rows carry no macros at all and must not break scoring.
+    products.append((product(5000, 0, 0, 0, 0), "snacks"))
+    products.append((product(5001, 5, 0, 0, 0), "dairy"))
+    path = tmp_path / "alternatives.ifalt"
+    assert write_alternatives(path, products, score_from_macros) == 3002
+
+    with AlternativesIndex(path) as index:
+        assert sorted(index.categories) == ["bars", "dairy", "snacks"]
+        for record, category in products[:200] + products[-2:]:
+            assert index.category_of(record.barcode) == category
+            score = score_from_macros(*(record.nutrients[d] for d in DIMS))
+            found = index.better_for(record.barcode, record.nutrients, score)
+            assert found == brute_force(products, index, record, category)
+        assert index.better_for("400000000000", products[0][0].nutrients, 1) == []
+
+
+def test_resolver_uses_alternatives_index(tmp_path):
+    source = tmp_path / "products.jsonl"
+    rows = [
+        ("012345678905", "InfyFit Protein Bar", 210, 20, 7, 22, "bars"),
+        ("5012345678900", "Whole Grain Pita", 170, 6, 2, 32, "bread"),
+        (barcode(11), "Lean Bar", 190, 21, 5, 20, "bars"),
+        (barcode(12), "Fudge Bar", 260, 4, 14, 34, "bars"),
+        (barcode(13), "Sourdough", 180, 12, 2, 30, "bread"),
+    ]
+    with open(source, "w", encoding="utf-8") as handle:
+        for code, name, calories, protein, fat, carbs, category in rows:
+            nutrients = {"calories": calories, "protein": protein, "fat": fat, "carbs": carbs}
+            nutrients["serving_size_g"] = 60
+            item = {"barcode": code, "name": name, "nutrients": nutrients, "category": category}
+            handle.write(json.dumps(item) + "\n")
+    path = tmp_path / "alternatives.ifalt"
+    build_alternatives.main([str(path), str(source)])
+
+    container = ServiceContainer.default(alternatives_path=str(path))
+    pita = container.resolve_product(NutritionResolverRequest(barcode="5012345678900"))
+    assert pita.better_alternatives == ["Sourdough"]
+    bar = container.resolve_product(NutritionResolverRequest(barcode="012345678905"))
+    # Nothing in "bars" scores above the protein bar, so its curated list is kept.
+    assert bar.better_alternatives == ["InfyFit Crunch Bar", "InfyFit Nutri Square", "Greek Yogurt"]
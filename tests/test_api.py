@@ -3,6 +3,7 @@ from datetime import date
 from fastapi.testclient import TestClient
 
 from infyfit import create_app
+from infyfit.services import ServiceContainer
 
 
 client = TestClient(create_app())
@@ -81,3 +82,121 @@ def test_telemetry_rejects_invalid_event():
     )
     assert response.status_code == 200
     assert response.json()["accepted"] is False
+
+
+def test_meal_scan_batch_matches_single_scans():
+    scans = [
+        {"hints": ["Grilled Chicken", "Mixed Greens"]},
+        {"hints": []},
+        {"hints": ["fried chicken", "Grilled Chicken", "salad bowl"]},
+    ]
+    response = client.post("/scan/meal/batch", json={"requests": scans})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results == [client.post("/scan/meal", json=scan).json() for scan in scans]
+
+
+def test_meal_scan_fuzzy_matches_unlisted_hint():
+    response = client.post("/scan/meal", json={"hints": ["Grilled chicken breast", "pizza"]})
+    assert response.status_code == 200
+    chicken, pizza = response.json()["items"]
+    assert chicken["calories"] == 247.5  # 165 kcal/100 g for grilled chicken at 150 g
+    assert chicken["confidence"] == "medium"
+    assert pizza["calories"] == 225.0  # no match falls back to the default density
+
+
+def test_product_lookup_by_path_matches_resolve():
+    response = client.get("/product/012345678905", params={"dietary_flags": "vegan"})
+    assert response.status_code == 200
+    expected = client.post(
+        "/product/resolve", json={"barcode": "012345678905", "dietary_flags": ["vegan"]}
+    ).json()
+    assert response.json() == expected
+    assert client.get("/product/resolve").status_code == 405
+
+
+def test_telemetry_batch_counts_accepted_spans():
+    events = [
+        {"event_name": "infyfit.scan.meal", "duration_ms": 120.0},
+        {"event_name": "infyfit.scan.meal", "duration_ms": 9_000.0},
+        {"event_name": "other.span", "duration_ms": 5.0, "success": False},
+        {"event_name": "infyfit.sync.flush", "duration_ms": 42.0, "success": False},
+    ]
+    response = client.post("/telemetry/batch", json={"events": events})
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 2, "rejected": 2}
+
+
+def test_malformed_spans_are_rejected_not_fatal(tmp_path):
+    container = ServiceContainer.default(user_records_path=str(tmp_path / "records.sqlite"))
+    local = TestClient(create_app(container))
+    events = [
+        {"event_name": "infyfit.scan.meal", "duration_ms": "abc", "user_id": "kim"},
+        "not-a-span",
+        {"event_name": "infyfit.scan.meal", "duration_ms": None},
+        {"event_name": "other.span", "duration_ms": 5.0, "user_id": "kim"},
+        {"event_name": "infyfit.scan.meal", "duration_ms": 12.0, "user_id": "kim"},
+    ]
+    response = local.post("/telemetry/batch", json={"events": events})
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 1, "rejected": 4}
+    assert container.user_records.count() == 1
+    assert local.post("/telemetry/batch", json={"events": "nope"}).status_code == 400
+
+
+def test_telemetry_percentiles_endpoint():
+    local = TestClient(create_app())
+    events = [{"event_name": "infyfit.product.resolve", "duration_ms": 20.0}] * 4
+    local.post("/telemetry/batch", json={"events": events})
+    response = local.get(
+        "/telemetry/percentiles", params={"window_s": "60", "event_name": "infyfit.product.resolve"}
+    )
+    assert response.status_code == 200
+    (summary,) = response.json()["events"]
+    assert summary["count"] == 4 and summary["success_rate"] == 1.0
+    for window_s in ("0", "abc", "1.5", "nan"):
+        response = local.get("/telemetry/percentiles", params={"window_s": window_s})
+        assert response.status_code == 400
+
+
+def test_telemetry_rejects_non_finite_durations_and_bad_windows():
+    local = TestClient(create_app())
+    events = [
+        {"event_name": "infyfit.scan.meal", "duration_ms": float("nan")},
+        {"event_name": "infyfit.scan.meal", "duration_ms": float("-inf")},
+        {"event_name": "infyfit.scan.meal", "duration_ms": 12.0},
+    ]
+    assert local.post("/telemetry/batch", json={"events": events}).json() == {
+        "accepted": 1,
+        "rejected": 2,
+    }
+    single = {"event_name": "infyfit.scan.meal", "duration_ms": float("nan"), "success": True}
+    assert local.post("/telemetry", json=single).json()["accepted"] is False
+
+    assert local.get("/telemetry/sketches", params={"window_s": "60"}).status_code == 200
+    for window_s in ("nan", "-5", "soon", "1e9"):
+        response = local.get("/telemetry/sketches", params={"window_s": window_s})
+        assert response.status_code == 400
+
+
+def test_metrics_report_instrumented_agent_calls():
+    container = ServiceContainer.default(instrument=True)
+    local = TestClient(create_app(container))
+    local.post("/scan/meal", json={"hints": ["Grilled Chicken"]})
+    local.post("/product/resolve", json={"barcode": "012345678905"})
+    payload = local.get("/metrics").json()
+    assert payload["instrumented"] is True
+    meal = payload["agents"]["infyfit.agent.meal_scan.estimate"]
+    assert meal["calls"] == 1 and meal["errors"] == 0 and meal["wall_ms"]["p99"] >= 0
+    assert payload["resolver_cache"]["misses"] == 1
+    names = container.telemetry.snapshot(60).events
+    assert "infyfit.agent.nutrition_resolver.resolve_json" in names
+    assert TestClient(create_app()).get("/metrics").json()["agents"] == {}
+
+
+def test_offline_sync_applies_operations():
+    operations = [{"op_id": f"op-{i}", "entity": "meal", "key": f"m{i}"} for i in range(40)]
+    response = client.post("/sync/offline", json={"user_id": "u9", "operations": operations})
+    payload = response.json()
+    assert payload["flushed"] is True
+    assert (payload["operations_applied"], payload["operations_pending"]) == (40, 0)
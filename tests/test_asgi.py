@@ -0,0 +1,90 @@
+import asyncio
+import json
+import threading
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+
+from infyfit import create_app
+
+
+def _call(app, method, path, chunks):
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+        for index, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path}
+    asyncio.run(app(scope, receive, send))
+    start, body = sent
+    return start["status"], json.loads(body["body"])
+
+
+def test_asgi_serves_streamed_json_body():
+    app = create_app()
+    status, payload = _call(app, "POST", "/scan/meal", [b'{"hints": ["Grilled', b' Chicken"]}'])
+    assert status == 200
+    assert payload["items"][0]["name"] == "Grilled Chicken"
+
+
+def test_asgi_runs_sync_handlers_off_the_event_loop_and_awaits_async_ones():
+    app = FastAPI(max_workers=2)
+    loop_thread = threading.get_ident()
+
+    @app.post("/sync")
+    def sync_handler(payload=None):
+        return {"on_loop": threading.get_ident() == loop_thread, "echo": payload}
+
+    @app.post("/async")
+    async def async_handler(payload=None):
+        await asyncio.sleep(0)
+        return {"echo": payload}
+
+    @app.post("/accepted")
+    def accepted(payload=None):
+        return JSONResponse({"state": "pending"}, status_code=202)
+
+    @app.post("/teapot")
+    def teapot(payload=None):
+        raise HTTPException(status_code=418, detail="short and stout")
+
+    assert _call(app, "POST", "/sync", [b'{"a": 1}']) == (200, {"on_loop": False, "echo": {"a": 1}})
+    assert _call(app, "POST", "/async", [b""]) == (200, {"echo": None})
+    assert _call(app, "POST", "/accepted", [b""]) == (202, {"state": "pending"})
+    assert _call(app, "POST", "/teapot", [b""]) == (418, {"detail": "short and stout"})
+    assert _call(app, "POST", "/sync", [b"{not json"])[0] == 400
+    assert _call(app, "GET", "/missing", [b""])[0] == 404
+    assert app.handle_request("POST", "/async", {"b": 2}) == {"echo": {"b": 2}}
+
+
+def test_router_prefers_static_segments_and_extracts_parameters():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: str):
+        return {"item": item_id}
+
+    @app.get("/items/special")
+    def special():
+        return {"item": "special"}
+
+    @app.get("/items/{item_id}/reviews/{review_id}")
+    def review(item_id: str, review_id: str, payload=None):
+        return {"item": item_id, "review": review_id, "query": payload}
+
+    assert app.handle_request("GET", "/items/42") == {"item": "42"}
+    assert app.handle_request("GET", "/items/special") == {"item": "special"}
+    assert app.handle_request("GET", "/items/7/reviews/3", {"sort": "new"}) == {
+        "item": "7",
+        "review": "3",
+        "query": {"sort": "new"},
+    }
+    status, payload = _call(app, "POST", "/items/42", [b""])
+    assert (status, payload) == (405, {"detail": "Method Not Allowed"})
@@ -0,0 +1,81 @@
+import pytest
+
+from infyfit.agents import NutritionResolverAgent, ProductScannerAgent
+from infyfit.agents.reference_products import ProductRecord, reference_records
+from infyfit.barcodes import BarcodeLookup, normalize_barcode
+from infyfit.data_models import NutritionResolverRequest, ProductScanRequest
+from infyfit.services import ServiceContainer
+from infyfit.storage import ProductCatalogue, write_catalogue
+
+
+def test_normalize_barcode_validates_and_pads():
+    assert normalize_barcode("012345678905") == "00012345678905"
+    assert normalize_barcode("0012345678905") == "00012345678905"
+    assert normalize_barcode(" 5012345-678900 ") == "05012345678900"
+    assert normalize_barcode("012345678904") is None
+    assert normalize_barcode("missing") is None
+    assert normalize_barcode("12345") is None
+
+
+def test_lookup_matches_equivalent_spellings_and_rejects_unknown():
+    lookup = BarcodeLookup({record.barcode: record for record in reference_records()})
+
+    assert lookup.lookup("0012345678905").name == "InfyFit Protein Bar"
+    assert lookup.lookup("00012345678905").name == "InfyFit Protein Bar"
+    assert lookup.lookup("400000000000") is None
+    assert lookup.lookup("not-a-barcode") is None
+
+    stats = lookup.stats()
+    assert stats["hits"] == 2
+    assert stats["invalid"] == 2
+    assert stats["bloom_rejects"] + stats["negative_hits"] + stats["false_positives"] == 0
+
+
+def test_false_positive_is_negative_cached():
+    class Counting(dict):
+        gets = 0
+
+        def get(self, key, default=None):
+            Counting.gets += 1
+            return super().get(key, default)
+
+    records = Counting({record.barcode: record for record in reference_records()})
+    lookup = BarcodeLookup(records)
+    lookup.bloom.add("00000000000000")  # force a false positive for an unknown code
+
+    assert lookup.lookup("00000000") is None
+    probes = Counting.gets
+    assert lookup.lookup("0000000000000") is None
+    assert Counting.gets == probes
+    assert lookup.stats()["false_positives"] == 1
+    assert lookup.stats()["negative_hits"] == 1
+
+
+def test_container_shares_one_lookup(tmp_path):
+    path = tmp_path / "products.ifcat"
+    write_catalogue(path, reference_records())
+    container = ServiceContainer.default(catalogue_path=str(path))
+
+    assert container.product_scanner.lookup is container.nutrition_resolver.lookup
+    assert isinstance(container.product_scanner.lookup.records, ProductCatalogue)
+
+    scan = container.scan_product(ProductScanRequest(barcode="0012345678905"))
+    assert scan.candidate.brand == "InfyFit Labs"
+    resolved = container.resolve_product(NutritionResolverRequest(barcode="0012345678905"))
+    assert resolved.name == "InfyFit Protein Bar"
+    assert container.metrics()["barcodes"]["hits"] == 2
+
+
+def test_legacy_table_arguments_still_work_with_a_deprecation_warning():
+    macros = {"calories": 90.0, "protein": 3.0, "fat": 1.0, "carbs": 15.0, "serving_size_g": 25.0}
+    entry = ("Stabilo Snack", macros, [])
+    scanned = ProductRecord(name="Stabilo Snack", brand="Stabilo", ingredients=("oats",))
+    with pytest.warns(DeprecationWarning):
+        resolver = NutritionResolverAgent(product_data={"4006381333931": entry})
+    with pytest.warns(DeprecationWarning):
+        scanner = ProductScannerAgent({"4006381333931": scanned})
+
+    score = resolver.resolve(NutritionResolverRequest(barcode="4006381333931"))
+    assert score.name == "Stabilo Snack"
+    result = scanner.scan(ProductScanRequest(barcode="04006381333931"))
+    assert result.candidate.brand == "Stabilo"
@@ -0,0 +1,50 @@
+from infyfit.agents import NutritionResolverAgent
+from infyfit.cache import TTLCache
+from infyfit.data_models import NutritionResolverRequest
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=2, clock=clock)
+    cache.put("a", 1, ttl_s=10)
+    cache.put("b", 2, ttl_s=60)
+    assert cache.get("a") == 1
+    cache.put("c", 3, ttl_s=60)  # evicts "b", the least recently used entry
+    assert cache.get("b") is None
+    clock.now = 30
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "size": 1,
+        "max_entries": 2,
+        "hits": 2,
+        "misses": 2,
+        "evictions": 1,
+        "expirations": 1,
+    }
+
+
+def test_resolver_cache_honours_score_ttl():
+    clock = FakeClock()
+    agent = NutritionResolverAgent(cache=TTLCache(clock=clock))
+    high = NutritionResolverRequest(barcode="012345678905", dietary_flags=["vegan", "halal"])
+    low = NutritionResolverRequest(barcode="5012345678900")
+
+    first = agent.resolve_json(high)
+    same_key = NutritionResolverRequest(barcode="012345678905", dietary_flags=["halal", "vegan"])
+    assert agent.resolve_json(same_key) is first
+    agent.resolve(low)
+
+    clock.now = 15 * 60  # past the 10 minute TTL for the score-6 pita only
+    agent.resolve(high)
+    agent.resolve(low)
+    assert agent.cache.stats()["hits"] == 2
+    assert agent.cache.stats()["expirations"] == 1
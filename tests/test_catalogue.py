@@ -0,0 +1,37 @@
+from infyfit.agents import NutritionResolverAgent, ProductScannerAgent
+from infyfit.data_models import NutritionResolverRequest, ProductScanRequest
+from infyfit.jobs.build_catalogue import reference_records
+from infyfit.services import ServiceContainer
+from infyfit.storage import ProductCatalogue, write_catalogue
+
+
+def test_catalogue_round_trips_reference_products(tmp_path):
+    path = tmp_path / "products.ifcat"
+    assert write_catalogue(path, reference_records()) == 2
+
+    with ProductCatalogue(path) as catalogue:
+        assert sorted(catalogue) == ["012345678905", "5012345678900"]
+        record = catalogue["5012345678900"]
+        assert record.brand == "Whole Hearth"
+        assert record.ingredients[-1] == "sea salt"
+        assert record.nutrients["carbs"] == 32.0
+        assert "400000000000" not in catalogue
+        assert dict(catalogue.names())["5012345678900"] == "Whole Grain Pita"
+
+
+def test_agents_resolve_identically_from_catalogue(tmp_path):
+    path = tmp_path / "products.ifcat"
+    write_catalogue(path, reference_records())
+    container = ServiceContainer.default(catalogue_path=str(path))
+
+    for barcode in ("012345678905", "5012345678900", "missing"):
+        request = NutritionResolverRequest(barcode=barcode, dietary_flags=["vegan"])
+        expected = NutritionResolverAgent().resolve(request).to_dict()
+        assert container.resolve_product(request).to_dict() == expected
+
+    request = NutritionResolverRequest(ocr_text="Whole Grain Pita\nwholemeal")
+    assert container.resolve_product(request).name == "Whole Grain Pita"
+
+    scan = ProductScanRequest(barcode="012345678905")
+    expected_scan = ProductScannerAgent().scan(scan).to_dict()
+    assert container.scan_product(scan).to_dict() == expected_scan
@@ -0,0 +1,51 @@
+import json
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from infyfit import create_app
+from infyfit.agents import CoachInsightsAgent
+from infyfit.data_models import CoachRequest
+from infyfit.jobs import coach_cards
+from infyfit.services import ServiceContainer
+from infyfit.storage import CoachCardStore
+
+
+def _write_requests(path, count):
+    with open(path, "w", encoding="utf-8") as handle:
+        for index in range(count):
+            request = {
+                "user_id": f"user-{index}",
+                "day": "2024-05-02",
+                "total_calories": 1800 + 10 * index,
+                "steps": 250 * index,
+                "sleep_quality": ["good", "poor", "Fair"][index % 3],
+                "streak_days": index % 15,
+            }
+            handle.write(json.dumps(request) + "\n")
+        handle.write('{"day": "2024-05-02"}\n')
+
+
+def test_job_matches_single_request_cards(tmp_path):
+    source, store_path = tmp_path / "requests.jsonl", tmp_path / "cards.sqlite"
+    _write_requests(source, 300)
+    written, skipped = coach_cards.run(str(source), str(store_path), workers=2, chunk_bytes=997)
+    assert (written, skipped) == (300, 1)
+
+    store = CoachCardStore(store_path)
+    agent = CoachInsightsAgent()
+    with open(source, encoding="utf-8") as handle:
+        for line in list(handle)[:300]:
+            request = CoachRequest.from_dict(json.loads(line))
+            expected = agent.generate(request).to_json_bytes()
+            assert store.get(request.user_id, request.day) == expected
+
+
+def test_coach_route_reads_precomputed_cards(tmp_path):
+    store_path = tmp_path / "cards.sqlite"
+    CoachCardStore(store_path).put_many([("u1", "2024-05-02", b'{"title":"Stored"}')])
+    client = TestClient(create_app(ServiceContainer.default(coach_card_store=str(store_path))))
+    stored = client.post("/coach/card", json={"user_id": "u1", "day": "2024-05-02"})
+    assert stored.json() == {"title": "Stored"}
+    live = client.post("/coach/card", json={"user_id": "u2", "day": "2024-05-02"})
+    assert live.json()["generated_for"] == date(2024, 5, 2).isoformat()
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+
+from infyfit.agents import CoachInsightsAgent
+from infyfit.agents.coach_rules import DEFAULT_RULES, CoachRule, CompiledRules
+from infyfit.data_models import CoachRequest
+
+
+class CountingRequest:
+    """Request stand-in that counts attribute reads."""
+
+    def __init__(self, **fields):
+        self.reads = 0
+        self._fields = fields
+
+    def __getattr__(self, name):
+        self.reads += 1
+        return self._fields[name]
+
+
+def test_each_field_is_read_once_per_request():
+    rules = CompiledRules()
+    request = CountingRequest(total_calories=2600, steps=100, sleep_quality="Poor", streak_days=14)
+    assert rules.mask(request) == 0b1111
+    assert request.reads == 4
+    title, body, category = rules.card(0b1111)
+    assert (title, category) == ("Fuel Check", "nutrition")
+    assert body.count(".") + body.count("!") >= 4
+
+
+def test_custom_rules_compile_for_rows_and_columns():
+    rules = CompiledRules(
+        DEFAULT_RULES
+        + (
+            CoachRule(
+                name="marathon",
+                field="steps",
+                op=">=",
+                value=30_000,
+                category="activity",
+                title="Huge Day",
+                suggestion="Stretch before bed.",
+            ),
+        )
+    )
+    agent = CoachInsightsAgent(rules)
+    requests = [
+        CoachRequest(day=date(2024, 1, 1), total_calories=kcal, steps=steps, sleep_quality="good")
+        for kcal in (1800, 2500)
+        for steps in (1000, 8000, 31_000)
+    ]
+    cards = agent.generate_many(requests)
+    assert cards == [agent.generate(request) for request in requests]
+    assert cards[2].body == "Stretch before bed." and cards[2].title == "Huge Day"
+    assert cards[5].title == "Fuel Check" and cards[5].body.endswith("Stretch before bed.")
+
+
+def test_unknown_operator_is_rejected():
+    with pytest.raises(ValueError):
+        CompiledRules([CoachRule("bad", "steps", "~", 1, "activity", "Bad", "Nope")])
+
+
+def test_columnar_mode_matches_rows():
+    agent = CoachInsightsAgent()
+    columns = {
+        "total_calories": [2000, 2600, 1500],
+        "steps": [8000, 9000, 100],
+        "sleep_quality": ["good", "FAIR", "good"],
+        "streak_days": [0, 7, 3],
+    }
+    days = [date(2024, 1, 1)] * 3
+    requests = [
+        CoachRequest(day=day, **{field: values[i] for field, values in columns.items()})
+        for i, day in enumerate(days)
+    ]
+    assert agent.generate_columns(columns, days) == [agent.generate(r) for r in requests]
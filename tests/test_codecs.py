@@ -0,0 +1,49 @@
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional
+
+import pytest
+
+from infyfit.codecs import codec, wire_default
+from infyfit.data_models import (
+    ConfidenceLevel,
+    MealItemEstimate,
+    MealScanResult,
+    NutrientInfo,
+    ProductScore,
+    WorkoutPlanRequest,
+)
+
+
+@codec
+@dataclass(slots=True)
+class Sample:
+    day: date = wire_default(factory=lambda: date(2024, 1, 1))
+    tags: List[str] = field(default_factory=list)
+    note: Optional[str] = None
+    ratio: float = 0.5
+
+
+def test_generated_codecs_round_trip_and_apply_wire_defaults():
+    sample = Sample.from_dict({"tags": ["a"], "ratio": "2"})
+    assert sample == Sample(day=date(2024, 1, 1), tags=["a"], note=None, ratio=2.0)
+    assert Sample.from_dict(sample.to_dict()) == sample
+    assert WorkoutPlanRequest.from_dict({}).goal == "maintenance"
+    with pytest.raises(AttributeError):
+        sample.unexpected = True  # slotted models reject stray attributes
+
+
+def test_json_bytes_match_compact_json_dumps():
+    results = [
+        MealScanResult(
+            items=[MealItemEstimate("Crème \"brûlée\"", 90, 301.5, ConfidenceLevel.MEDIUM)],
+            total_calories=301.5,
+            confidence_message="ok",
+        ),
+        ProductScore("Bar", None, 9, "Good", ["Yogurt"], NutrientInfo(210, 20, 8, 18, 60)),
+        Sample(day=date(2024, 2, 29), note="x"),
+    ]
+    for result in results:
+        expected = json.dumps(result.to_dict(), separators=(",", ":")).encode()
+        assert result.to_json_bytes() == expected
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from infyfit import create_app
+from infyfit.agents.offline_sync import SyncStore
+from infyfit.services import ServiceContainer
+from infyfit.storage import TombstoneStore
+
+DAY = 24 * 3600.0
+
+
+def _container(tmp_path):
+    return ServiceContainer.default(
+        sync_log_dir=str(tmp_path / "sync"),
+        coach_card_store=str(tmp_path / "cards.sqlite"),
+        user_records_path=str(tmp_path / "records.sqlite"),
+        tombstone_path=str(tmp_path / "tombstones.sqlite"),
+    )
+
+
+def _sync(client, user_id):
+    operation = {"op_id": f"{user_id}-1", "entity": "meal", "key": "m1", "payload": {"kcal": 1}}
+    return client.post("/sync/offline", json={"user_id": user_id, "operations": [operation]})
+
+
+def test_delete_hides_user_and_cancel_restores(tmp_path):
+    container = _container(tmp_path)
+    container.coach_cards.put_many([("dana", "2024-05-02", b'{"title":"Stored"}')])
+    client = TestClient(create_app(container))
+    card = {"user_id": "dana", "day": "2024-05-02"}
+    assert client.post("/coach/card", json=card).json() == {"title": "Stored"}
+    other_worker = TombstoneStore(tmp_path / "tombstones.sqlite")
+    assert not other_worker.is_deleted("dana")
+
+    response = client.post("/privacy", json={"user_id": "dana", "intent": "delete"})
+    assert response.status_code == 200
+    assert container.is_hidden("dana") and not container.is_hidden("erin")
+    assert client.post("/coach/card", json=card).json()["title"] != "Stored"
+    assert _sync(client, "dana").status_code == 400
+    # Another worker's store sees the tombstone through SQLite's data_version.
+    assert other_worker.is_deleted("dana")
+
+    response = client.post("/privacy", json={"user_id": "dana", "intent": "cancel_delete"})
+    assert response.json()["message"].startswith("Account deletion cancelled")
+    assert client.post("/coach/card", json=card).json() == {"title": "Stored"}
+    again = client.post("/privacy", json={"user_id": "dana", "intent": "cancel_delete"})
+    assert again.json()["message"].startswith("There is no pending")
+
+
+def test_compactor_purges_expired_tombstones_in_batches(tmp_path):
+    container = _container(tmp_path)
+    client = TestClient(create_app(container))
+    users = [f"user-{index:02d}" for index in range(25)]
+    for user_id in users:
+        client.post("/scan/meal", json={"hints": ["Rice"], "user_id": user_id})
+        container.coach_cards.put_many([(user_id, "2024-05-02", b"{}")])
+        assert _sync(client, user_id).status_code == 200
+
+    tombstones = container.privacy_ops.tombstones
+    now = time.time()
+    for user_id in users[:20]:
+        tombstones.mark(user_id, now=now - 31 * DAY)
+    tombstones.mark(users[20], now=now - DAY)
+    assert not tombstones.cancel(users[0])  # the window has already ended
+
+    container.compactor.batch_size = 8
+    assert container.compactor.run() == 20
+    assert container.user_records.count() == 5
+    assert container.coach_cards.count() == 5
+    assert container.offline_sync.store.get(users[0], "meal", "m1") is None
+    assert container.offline_sync.store.get(users[21], "meal", "m1") == {"kcal": 1}
+    assert len(tombstones) == 1 and tombstones.is_deleted(users[20])
+
+    # The purge is logged, so a restart does not resurrect the users' entities.
+    container.offline_sync.store.wal.close()
+    reopened = SyncStore.open(str(tmp_path / "sync"))
+    assert reopened.entities(users[0]) == {}
+    assert reopened.get(users[24], "meal", "m1") == {"kcal": 1}
+
+
+def test_asgi_lifespan_runs_the_compactor(tmp_path):
+    container = _container(tmp_path)
+    container.coach_cards.put_many([("gone", "2024-05-02", b"{}")])
+    container.privacy_ops.tombstones.mark("gone", now=time.time() - 31 * DAY)
+    app = create_app(container)
+
+    async def lifespan():
+        inbox, sent = asyncio.Queue(), []
+
+        async def send(message):
+            sent.append(message["type"])
+
+        task = asyncio.ensure_future(app({"type": "lifespan"}, inbox.get, send))
+        await inbox.put({"type": "lifespan.startup"})
+        deadline = time.monotonic() + 5
+        while container.compactor.purged_users < 1 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await inbox.put({"type": "lifespan.shutdown"})
+        await task
+        return sent
+
+    sent = asyncio.run(lifespan())
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert container.coach_cards.count() == 0
+    assert all(thread.name != "deletion-compactor" for thread in threading.enumerate())
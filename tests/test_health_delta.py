@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from infyfit import create_app
+from infyfit.agents.health_delta import (
+    changed_records,
+    decode_delta,
+    decode_leaves,
+    encode_delta,
+    month_digests,
+)
+from infyfit.data_models import HealthAggregate
+
+
+def _history(days, start=date(2024, 1, 1)):
+    qualities = ["good", "poor", "fair", "Restless"]
+    return [
+        HealthAggregate(
+            date=start + timedelta(days=offset),
+            steps=4000 + 37 * offset,
+            sleep_quality=qualities[offset % len(qualities)],
+            activity_minutes=offset % 90,
+        )
+        for offset in range(days)
+    ]
+
+
+def test_delta_round_trip_is_compact():
+    history = _history(365)
+    encoded = encode_delta(history)
+    assert decode_delta(encoded) == history
+    as_json = json.dumps([aggregate.to_dict() for aggregate in history])
+    assert len(encoded) * 8 < len(as_json)
+
+
+def test_reconnect_uploads_only_changed_days():
+    client = TestClient(create_app())
+    history = _history(120)
+    first = client.post("/sync/health", json={"user_id": "u1", "delta": encode_delta(history)})
+    assert first.json()["applied"] == 120
+
+    edited = list(history)
+    edited[45] = HealthAggregate(edited[45].date, 12_345, "excellent", 60)
+    edited.append(HealthAggregate(date(2024, 4, 30), 9000, "good", 30))
+    digests = month_digests(edited)
+    summary = client.post("/sync/health", json={"user_id": "u1", "digests": digests}).json()
+    assert summary["applied"] == 0
+    assert summary["stale_months"] == ["2024-02", "2024-04"]
+
+    server_leaves = decode_leaves(summary["leaves"], summary["stale_months"])
+    changed = changed_records(edited, server_leaves)
+    assert [aggregate.date for aggregate in changed] == [edited[45].date, date(2024, 4, 30)]
+    upload = client.post(
+        "/sync/health",
+        json={"user_id": "u1", "delta": encode_delta(changed), "digests": digests},
+    ).json()
+    assert upload["applied"] == 2 and upload["stale_months"] == []
+    assert upload["digests"] == {month: digests[month] for month in ("2024-02", "2024-04")}
+
+
+def test_invalid_delta_is_rejected():
+    client = TestClient(create_app())
+    response = client.post("/sync/health", json={"user_id": "u1", "delta": "!!"})
+    assert response.status_code == 400
+    incomplete = {"date": "2024-05-01", "sleep_quality": "good", "activity_minutes": 5}
+    response = client.post("/sync/health", json={"user_id": "u1", "aggregates": [incomplete]})
+    assert response.status_code == 400
+    assert client.post("/health/sync", json={"user_id": "u1"}).status_code == 404
+
+
+def test_malformed_varints_are_rejected_not_overflowed():
+    client = TestClient(create_app())
+    fields = bytes([0, 0, 0])  # steps, sleep code, activity minutes
+    huge_gap = base64.b64encode(bytes([1, 0xFF, 0xFF, 0xFF, 0xFF, 0x7F]) + fields).decode("ascii")
+    endless = base64.b64encode(bytes([1] + [0xFF] * 20 + [1]) + fields).decode("ascii")
+    for delta in (huge_gap, endless):
+        with pytest.raises(ValueError):
+            decode_delta(delta)
+        response = client.post("/sync/health", json={"user_id": "u1", "delta": delta})
+        assert response.status_code == 400
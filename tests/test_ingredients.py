@@ -0,0 +1,61 @@
+from infyfit.agents import NutritionResolverAgent, ProductScannerAgent
+from infyfit.agents.ingredients import IngredientIndex, IngredientTerm, default_index
+from infyfit.data_models import NutritionResolverRequest, ProductScanRequest
+
+
+def names(terms):
+    return [term.canonical for term in terms]
+
+
+def test_find_prefers_longest_match_on_word_boundaries():
+    index = default_index()
+    text = "Cocoa butter, coconut milk, eggplant, buckwheat, whey proteins, Soy-Lecithin, honey."
+
+    assert names(index.find([text])) == ["cocoa butter", "coconut milk", "whey", "soy", "honey"]
+    assert names(index.find(["milk chocolate (sugar, milk)", "Whole  Wheat"])) == [
+        "milk chocolate",
+        "milk",
+        "wheat",
+    ]
+    assert index.canonicalize(" Almonds ") == "almond"
+    assert index.canonicalize("rolled oats") == "rolled oats"
+
+
+def test_conflicts_and_allergens():
+    index = default_index()
+    terms = index.find(["wheat flour, gelatine, peanut butter, rum"])
+
+    assert index.allergens(terms) == ["gluten", "peanut"]
+    assert index.conflicts(terms, ["Vegan", "halal", "gluten-free", "keto"]) == {
+        "vegan": ["gelatin"],
+        "halal": ["alcohol"],
+        "gluten_free": ["wheat"],
+    }
+
+
+def test_thousands_of_terms():
+    terms = [IngredientTerm(f"additive {n}", (f"additive {n}", f"e{n}")) for n in range(5000)]
+    index = IngredientIndex(terms + [IngredientTerm("egg", ("egg",), frozenset({"egg"}))])
+
+    assert len(index) == 10_001
+    assert names(index.find(["e4999, additive 12 and egg; e50000"])) == [
+        "additive 4999",
+        "additive 12",
+        "egg",
+    ]
+
+
+def test_agents_report_allergens_and_diet_conflicts():
+    scan = ProductScannerAgent().scan(ProductScanRequest(barcode="012345678905"))
+    assert scan.candidate.ingredients == ["almond", "whey protein", "honey", "sea salt"]
+    assert scan.candidate.allergens == ["milk", "tree_nut"]
+
+    resolver = NutritionResolverAgent()
+    vegan = resolver.resolve(
+        NutritionResolverRequest(barcode="012345678905", dietary_flags=["vegan"])
+    )
+    assert "Not vegan: contains whey protein, honey" in vegan.reason
+    pita = resolver.resolve(
+        NutritionResolverRequest(barcode="5012345678900", dietary_flags=["vegan", "gluten_free"])
+    )
+    assert pita.reason == "Not gluten-free: contains wheat"
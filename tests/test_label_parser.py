@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+
+from infyfit import create_app
+from infyfit.agents import NutritionResolverAgent, ProductScannerAgent
+from infyfit.agents.label_parser import parse_label
+from infyfit.data_models import NutritionResolverRequest, ProductScanRequest
+from infyfit.services import ServiceContainer
+
+LABEL = """
+  Trail Crunch Granola
+Ingredients: rolled oats, milk chocolate (sugar, cocoa butter, milk (whole)),
+honey; almonds, contains 2% or less of: sea salt. May contain traces of peanuts.
+Allergens: milk, soy and tree nuts
+Nutrition Facts
+Serving size 1 bowl (45g)
+Calories 190   Calories from fat 60
+Total Fat 7g  11%
+Total Carbohydrate 27 g
+Protein 5g
+"""
+
+
+def test_parse_label_sections():
+    facts = parse_label(LABEL)
+
+    assert facts.name == "Trail Crunch Granola"
+    assert facts.ingredients == ["rolled oats", "milk chocolate", "honey", "almonds", "sea salt"]
+    assert facts.allergens == ["peanuts", "milk", "soy", "tree nuts"]
+    assert facts.nutrients == {
+        "serving_size_g": 45.0,
+        "calories": 190.0,
+        "fat": 7.0,
+        "carbs": 27.0,
+        "protein": 5.0,
+    }
+
+
+def test_parse_label_units_and_barcode():
+    facts = parse_label("Oat Bar 5012345678900\nEnergy 1046 kJ / 250 kcal\nFat 0,5 g")
+
+    assert facts.barcode == "05012345678900"
+    assert facts.nutrients == {"calories": 250.0, "fat": 0.5}
+    assert facts.complete_nutrients() is None
+    assert parse_label("").name == ""
+
+
+def test_scanner_and_resolver_use_parsed_label():
+    scan = ProductScannerAgent().scan(ProductScanRequest(label_text=LABEL))
+    assert scan.candidate.name == "Trail Crunch Granola"
+    assert scan.candidate.ingredients[:2] == ["rolled oats", "milk chocolate"]
+
+    resolver = NutritionResolverAgent()
+    matched = resolver.resolve(NutritionResolverRequest(ocr_text="PROTEIN BAR\n200 kcal"))
+    assert matched.name == "InfyFit Protein Bar"
+    by_barcode = resolver.resolve(NutritionResolverRequest(ocr_text="EAN 5012345678900"))
+    assert by_barcode.name == "Whole Grain Pita"
+
+    scored = resolver.resolve(NutritionResolverRequest(ocr_text=LABEL))
+    assert scored.name == "Trail Crunch Granola"
+    assert scored.nutrients.serving_size_g == 45.0
+    assert scored.better_alternatives == []
+
+
+def test_zero_macro_label_scores_without_error():
+    text = "Sparkling Water\nCalories 0\nProtein 0g\nTotal Fat 0g\nCarbohydrate 0g"
+    client = TestClient(create_app(ServiceContainer.default()))
+    response = client.post("/product/resolve", json={"ocr_text": text})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Sparkling Water"
+    assert response.json()["nutrients"]["calories"] == 0.0
+
+
+def test_label_facts_win_over_partial_name_matches():
+    resolver = NutritionResolverAgent()
+    panel = "\nCalories 250\nProtein 3g\nTotal Fat 12g\nCarbohydrate 30g"
+    # Nutrition-panel words ("protein") are not read as product-name words.
+    choco = resolver.resolve(NutritionResolverRequest(ocr_text="Choco Crunch Bar" + panel))
+    assert choco.name == "Choco Crunch Bar" and choco.nutrients.calories == 250.0
+    # Two of three name words match, but the label's own facts are complete.
+    chips = resolver.resolve(NutritionResolverRequest(ocr_text="Grain Free Pita Chips" + panel))
+    assert chips.name == "Grain Free Pita Chips" and chips.nutrients.fat == 12.0
+    # An exact header match still names the catalogue product.
+    pita = resolver.resolve(NutritionResolverRequest(ocr_text="Whole Grain Pita" + panel))
+    assert pita.name == "Whole Grain Pita" and pita.nutrients.calories == 170.0
@@ -0,0 +1,69 @@
+from infyfit.agents import OfflineSyncAgent
+from infyfit.agents.offline_sync import SyncStore
+from infyfit.data_models import OfflineSyncRequest, SyncAction, SyncOperation
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SlowStore(SyncStore):
+    """Store whose writes cost one millisecond each on the fake clock."""
+
+    def __init__(self, clock: FakeClock) -> None:
+        super().__init__()
+        self.clock = clock
+
+    def apply_batch(self, user_id, writes, op_ids):
+        self.clock.now += len(writes) / 1000.0
+        super().apply_batch(user_id, writes, op_ids)
+
+
+def _ops(count, start=0):
+    return [
+        SyncOperation(op_id=f"op-{i}", entity="meal", key=f"m{i}", payload={"kcal": i})
+        for i in range(start, start + count)
+    ]
+
+
+def test_coalesces_per_entity_and_is_idempotent():
+    agent = OfflineSyncAgent()
+    operations = [
+        SyncOperation(op_id="1", entity="meal", key="a", payload={"kcal": 100}),
+        SyncOperation(op_id="2", entity="meal", key="a", payload={"kcal": 250}),
+        SyncOperation(op_id="3", entity="meal", key="b", payload={"kcal": 80}),
+        SyncOperation(op_id="4", entity="meal", key="b", action=SyncAction.DELETE),
+    ]
+    request = OfflineSyncRequest(queue_size=0, user_id="u1", operations=operations)
+    first = agent.flush(request)
+    assert first.flushed and first.operations_applied == 4 and first.batches_uploaded == 1
+    assert agent.store.entities("u1") == {("meal", "a"): {"kcal": 250}}
+
+    replay = OfflineSyncRequest.from_dict(request.to_dict())
+    replay.operations.append(SyncOperation(op_id="5", entity="meal", key="c"))
+    second = agent.flush(replay)
+    assert second.flushed and second.operations_applied == 5
+    assert agent.store.get("u1", "meal", "a") == {"kcal": 250}
+    assert set(agent.store.entities("u1")) == {("meal", "a"), ("meal", "c")}
+
+
+def test_large_backlog_drains_within_budget_in_bounded_round_trips():
+    clock = FakeClock()
+    agent = OfflineSyncAgent(store=SlowStore(clock), clock=clock)
+    backlog = _ops(10_000)
+    round_trips = 0
+    while backlog:
+        result = agent.flush(OfflineSyncRequest(queue_size=0, user_id="u1", operations=backlog))
+        round_trips += 1
+        backlog = backlog[result.operations_applied :]
+        assert result.batches_uploaded >= 1
+        assert result.operations_pending == len(backlog)
+    assert round_trips <= 12
+    assert len(agent.store.entities("u1")) == 10_000
+    # Batches settle near the 150 ms target at one millisecond per write.
+    assert 100 <= agent.batch_size <= 200
+    assert 900 <= result.next_batch_size <= 1100
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from infyfit import create_app
+from infyfit.exports import ExportRunner, ExportState
+from infyfit.services import ServiceContainer
+from infyfit.storage import UserRecordStore
+
+
+def _wait_ready(client, user_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(f"/privacy/export/{user_id}")
+        if response.status_code != 202 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.01)
+
+
+def test_export_streams_user_history_into_zip(tmp_path):
+    container = ServiceContainer.default(
+        coach_card_store=str(tmp_path / "cards.sqlite"),
+        user_records_path=str(tmp_path / "records.sqlite"),
+        export_dir=str(tmp_path / "exports"),
+    )
+    container.coach_cards.put_many([("alice", "2024-05-01", b'{"title":"Stored"}')])
+    client = TestClient(create_app(container))
+
+    client.post("/scan/meal", json={"hints": ["Grilled Chicken"], "user_id": "alice"})
+    client.post("/scan/meal", json={"hints": ["Rice"], "user_id": "bob"})
+    client.post("/product/resolve", json={"barcode": "012345678905", "user_id": "alice"})
+    client.post("/workout/plan", json={"goal": "cut", "user_id": "alice"})
+    client.post("/coach/card", json={"day": "2024-05-02", "user_id": "alice"})
+    client.post(
+        "/telemetry/batch",
+        json={"events": [{"event_name": "infyfit.scan", "duration_ms": 5, "user_id": "alice"}]},
+    )
+
+    assert client.get("/privacy/export/alice").status_code == 404
+    assert client.post("/privacy", json={"user_id": "alice", "intent": "export"}).status_code == 200
+    response = _wait_ready(client, "alice")
+    assert response.status_code == 200
+    link = response.json()
+    assert link["url"].startswith("file://") and link["expires_at"]
+
+    job = container.export_status("alice")
+    with zipfile.ZipFile(job.path) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        assert manifest["records"] == {
+            "meal_scans": 1,
+            "product_scores": 1,
+            "workout_plans": 1,
+            "coach_cards": 2,
+            "telemetry": 1,
+        }
+        meals = [json.loads(line) for line in archive.read("meal_scans.jsonl").splitlines()]
+        assert meals[0]["data"]["request"]["hints"] == ["Grilled Chicken"]
+        cards = archive.read("coach_cards.jsonl").splitlines()
+        assert json.loads(cards[-1]) == {"day": "2024-05-01", "data": {"title": "Stored"}}
+    container.privacy_ops.exports.close()
+
+
+def test_runner_reuses_live_job_and_expires_archives(tmp_path):
+    records = UserRecordStore(tmp_path / "records.sqlite", chunk_rows=7)
+    records.put_many(("carol", "telemetry", b'{"n":%d}' % index) for index in range(50))
+    assert [payload for _, _, payload in records.iter_user("carol", "telemetry")][-1] == b'{"n":49}'
+
+    now = [datetime(2024, 5, 1, tzinfo=timezone.utc)]
+    runner = ExportRunner(tmp_path / "exports", records=records, clock=lambda: now[0])
+    job = runner.submit("carol")
+    runner.close()
+    assert job.state == ExportState.READY and job.records == 50
+    assert runner.submit("carol") is job
+    assert runner.link(job).expires_at == now[0] + timedelta(hours=24)
+
+    now[0] += timedelta(hours=25)
+    assert runner.status("carol") is None
+    assert not job.path.exists()
+
+
+def test_pending_export_returns_202_with_its_state(tmp_path):
+    container = ServiceContainer.default(
+        user_records_path=str(tmp_path / "records.sqlite"), export_dir=str(tmp_path / "exports")
+    )
+    runner, release = container.privacy_ops.exports, threading.Event()
+    write_archive = runner._write_archive
+
+    def blocked_write_archive(handle, user_id):
+        release.wait(10)
+        return write_archive(handle, user_id)
+
+    runner._write_archive = blocked_write_archive
+    client = TestClient(create_app(container))
+    client.post("/privacy", json={"user_id": "bob", "intent": "export"})
+    response = client.get("/privacy/export/bob")
+    assert response.status_code == 202
+    assert response.json()["state"] in (ExportState.PENDING, ExportState.RUNNING)
+    release.set()
+    assert _wait_ready(client, "bob").status_code == 200
+    runner.close()
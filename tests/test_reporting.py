@@ -0,0 +1,123 @@
+import csv
+import random
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from fastapi.testclient import TestClient
+
+from infyfit import create_app
+from infyfit.agents.reporting import DailyRollups, ReportingAgent
+from infyfit.data_models import ReportRequest, WorkoutPlanRequest
+from infyfit.services import ServiceContainer
+
+
+def _report_path(url):
+    return Path(url2pathname(urlparse(url).path))
+
+
+def _read_report(url):
+    with open(_report_path(url), encoding="utf-8", newline="") as handle:
+        return list(csv.reader(handle))
+
+
+def test_range_totals_match_brute_force():
+    rollups = DailyRollups()
+    rng = random.Random(5)
+    start = date(2023, 11, 1)
+    logged = {}
+    for _ in range(2000):
+        day = start + timedelta(days=rng.randrange(500))
+        values = [rng.randrange(3), rng.uniform(0, 900), 0.0, rng.uniform(0, 60), 0.0]
+        rollups.add("u", day, values)
+        logged.setdefault(day, []).append(values)
+
+    for _ in range(100):
+        first = start + timedelta(days=rng.randrange(500))
+        last = first + timedelta(days=rng.randrange(400))
+        expected = [0.0] * 5
+        for day, rows in logged.items():
+            if first <= day <= last:
+                for values in rows:
+                    expected = [a + b for a, b in zip(expected, values)]
+        found = rollups.total("u", first, last)
+        assert all(abs(a - b) < 1e-6 for a, b in zip(found, expected))
+    assert rollups.total("nobody", start, start) == [0.0] * 5
+
+
+def test_report_endpoint_streams_daily_weekly_and_total_rows(tmp_path):
+    container = ServiceContainer.default(report_dir=str(tmp_path / "reports"))
+    container.reporting.today = lambda: date(2024, 5, 1)  # a Wednesday
+    client = TestClient(create_app(container))
+    client.post("/scan/meal", json={"hints": ["Grilled Chicken"], "user_id": "fay"})
+    client.post("/scan/meal", json={"hints": ["Rice"], "user_id": "fay"})
+    client.post("/scan/meal", json={"hints": ["Rice"], "user_id": "gus"})
+    client.post("/workout/plan", json={"goal": "weight_loss", "user_id": "fay"})
+    plan = container.workout_planner.build_plan(WorkoutPlanRequest("weight_loss", 0.0, 0, "good"))
+    container.reporting.record_workout("fay", plan, day=date(2024, 5, 6))
+
+    payload = {"user_id": "fay", "from_date": "2024-04-29", "to_date": "2024-05-07"}
+    response = client.post("/report", json=payload)
+    assert response.status_code == 200
+    rows = _read_report(response.json()["url"])
+    assert rows[0][:4] == ["period", "start", "end", "meals"]
+    assert [row[0] for row in rows[1:]] == ["day"] * 9 + ["week", "week", "total"]
+    assert rows[3][:4] == ["day", "2024-05-01", "2024-05-01", "2.0"]
+    assert rows[10][:3] == ["week", "2024-04-29", "2024-05-05"]
+    assert rows[11][:3] == ["week", "2024-05-06", "2024-05-07"]
+    assert (rows[10][5], rows[11][5]) == ("1.0", "1.0")  # one workout each week
+    assert rows[-1][3:6:2] == ["2.0", "2.0"]
+
+    meals_only = dict(payload, include_workouts=False)
+    rows = _read_report(client.post("/report", json=meals_only).json()["url"])
+    assert rows[0] == ["period", "start", "end", "meals", "meal_calories"]
+
+    reversed_range = dict(payload, from_date="2024-05-08")
+    assert client.post("/report", json=reversed_range).status_code == 400
+    assert client.post("/report", json={"user_id": "fay"}).status_code == 400
+
+
+def test_reporting_agent_links_with_base_url(tmp_path):
+    agent = ReportingAgent(tmp_path, base_url="https://files.example/reports/")
+    link = agent.build(ReportRequest(date(2024, 1, 1), date(2024, 12, 31), user_id="hal"))
+    assert link.url.startswith("https://files.example/reports/report-")
+    assert len(list(tmp_path.glob("report-*.csv"))) == 1
+
+
+def test_reports_are_deleted_on_expiry_and_purge(tmp_path):
+    now = [datetime(2024, 5, 1, tzinfo=timezone.utc)]
+    agent = ReportingAgent(tmp_path, ttl=timedelta(hours=1), clock=lambda: now[0])
+    request = ReportRequest(date(2024, 5, 1), date(2024, 5, 7), user_id="hal")
+    stale = agent.build(request)
+    assert stale.expires_at == now[0] + timedelta(hours=1)
+    now[0] += timedelta(hours=2)
+    agent.build(request)
+    agent.build(ReportRequest(date(2024, 5, 1), date(2024, 5, 7), user_id="ivy"))
+    assert not _report_path(stale.url).exists()
+    assert len(list(tmp_path.glob("report-*.csv"))) == 2
+
+    agent.purge_users(["hal"])
+    assert len(list(tmp_path.glob("report-*.csv"))) == 1
+    now[0] += timedelta(hours=2)
+    assert agent.expire() == 1 and not list(tmp_path.glob("report-*.csv"))
+
+
+def test_default_report_directory_is_created_on_first_build():
+    first, second = ServiceContainer.default(), ServiceContainer.default()
+    assert first.reporting.directory is None and second.reporting.directory is None
+    request = ReportRequest(date(2024, 5, 1), date(2024, 5, 7), user_id="hal")
+    link = first.build_report(request)
+    directory = first.reporting.directory
+    try:
+        assert directory is not None and _report_path(link.url).parent == directory.resolve()
+        assert second.reporting.directory is None
+    finally:
+        first.reporting.purge_users(["hal"])
+        directory.rmdir()
+
+
+def test_report_rejects_mistyped_fields(tmp_path):
+    client = TestClient(create_app(ServiceContainer.default(report_dir=str(tmp_path))))
+    response = client.post("/report", json={"user_id": "hal", "from_date": 5, "to_date": 6})
+    assert response.status_code == 400
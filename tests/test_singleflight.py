@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from infyfit.data_models import NutritionResolverRequest
+from infyfit.services import ServiceContainer
+from infyfit.singleflight import SingleFlight
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
+
+
+def test_threads_share_one_call_and_its_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flights.do, "k", compute) for _ in range(8)]
+        _wait_for(lambda: flights.coalesced == 7)
+        release.set()
+        results = {id(future.result()) for future in futures}
+    assert len(calls) == 1 and len(results) == 1
+    assert flights.stats() == {"executed": 1, "coalesced": 7, "in_flight": 0}
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flights.do("k", fail)
+    assert flights.do("k", lambda: 3) == 3  # a landed flight is not cached
+
+
+def test_coroutines_and_threads_join_the_same_flight():
+    flights = SingleFlight()
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(flights.do_async("k", compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flights.do_async("k", compute)) for _ in range(3)]
+        loop = asyncio.get_running_loop()
+        threaded = loop.run_in_executor(None, flights.do, "k", lambda: "recomputed")
+        deadline = time.monotonic() + 5
+        while flights.coalesced < 4 and time.monotonic() < deadline:
+            await asyncio.sleep(0.001)
+        release.set()
+        return await asyncio.gather(leader, *followers, threaded)
+
+    assert asyncio.run(scenario()) == ["done"] * 5
+    assert flights.executed == 1
+
+
+def test_cancelled_callers_do_not_fail_the_flight():
+    flights = SingleFlight()
+    runs = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def compute():
+            runs.append(1)
+            await release.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(flights.do_async("k", compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flights.do_async("k", compute)) for _ in range(3)]
+        await asyncio.wait_for(_until(lambda: flights.coalesced == 3), 5)
+        followers[0].cancel()
+        await asyncio.sleep(0)
+        # A cancelled leader hands the flight over instead of failing it.
+        leader.cancel()
+        await asyncio.wait_for(_until(lambda: len(runs) == 2), 5)
+        release.set()
+        results = await asyncio.gather(leader, *followers, return_exceptions=True)
+        return [type(result) if isinstance(result, BaseException) else result for result in results]
+
+    cancelled = asyncio.CancelledError
+    assert asyncio.run(scenario()) == [cancelled, cancelled, "done", "done"]
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_container_coalesces_equivalent_barcode_spellings():
+    container = ServiceContainer.default()
+    resolver = container.nutrition_resolver
+    original, calls, release = resolver.resolve_json, [], threading.Event()
+
+    def slow_resolve_json(request):
+        calls.append(request.barcode)
+        release.wait(5)
+        return original(request)
+
+    resolver.resolve_json = slow_resolve_json
+    spellings = ["012345678905", "0012345678905"] * 3
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        futures = [
+            pool.submit(container.resolve_product_json, NutritionResolverRequest(barcode=code))
+            for code in spellings
+        ]
+        _wait_for(lambda: container.flights.coalesced == 5)
+        release.set()
+        bodies = {future.result() for future in futures}
+    assert len(calls) == 1 and len(bodies) == 1
+    assert container.metrics()["singleflight"]["coalesced"] == 5
@@ -0,0 +1,49 @@
+import random
+
+from infyfit.agents import TelemetryAgent
+from infyfit.data_models import TelemetryEvent, TelemetryPercentilesRequest
+from infyfit.sketches import RELATIVE_ACCURACY, LatencyHistogram, SketchSnapshot
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_histogram_quantiles_stay_within_relative_accuracy():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(3.0, 1.0) for _ in range(20_000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.add(value)
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(histogram.quantile(q) - exact) <= RELATIVE_ACCURACY * exact * 1.001
+
+
+def test_snapshots_merge_across_processes():
+    left, right = TelemetryAgent(), TelemetryAgent()
+    left.ingest_batch([{"event_name": "infyfit.scan", "duration_ms": 10.0}] * 90)
+    failed = {"event_name": "infyfit.scan", "duration_ms": 500.0, "success": False}
+    right.ingest_batch([failed] * 10)
+    shipped = SketchSnapshot.from_dict(right.snapshot(60).to_dict())
+    response = left.percentiles(TelemetryPercentilesRequest(window_s=60), peers=[shipped])
+    (summary,) = response.events
+    assert summary.count == 100 and summary.success_rate == 0.9
+    assert abs(summary.p50_ms - 10.0) <= 0.1
+    assert abs(summary.p99_ms - 500.0) <= 5.0
+
+
+def test_rolling_window_drops_old_slots():
+    clock = FakeClock()
+    agent = TelemetryAgent(clock=clock)
+    agent.ingest(TelemetryEvent(event_name="infyfit.coach.card", duration_ms=100.0))
+    clock.now += 120
+    agent.ingest(TelemetryEvent(event_name="infyfit.coach.card", duration_ms=5.0))
+    recent = agent.percentiles(TelemetryPercentilesRequest(window_s=60))
+    assert [(event.count, event.p99_ms) for event in recent.events] == [(1, 5.0)]
+    full = agent.percentiles(TelemetryPercentilesRequest(window_s=300))
+    assert full.events[0].count == 2
@@ -0,0 +1,44 @@
+import os
+from array import array
+
+from infyfit.agents import TelemetryAgent
+from infyfit.storage import SpanBuffer, SpanSegmentWriter, read_segment
+
+
+def test_span_buffer_wraps_without_writer():
+    buffer = SpanBuffer(capacity=3)
+    buffer.extend(array("I", [0, 1, 2, 3]), array("d", [1, 2, 3, 4]), array("B", [1, 1, 0, 1]))
+    buffer.append(4, 5.0, True)
+    ids, durations, successes = buffer.columns()
+    assert list(ids) == [2, 3, 4]
+    assert list(durations) == [3.0, 4.0, 5.0]
+    assert buffer.overwritten == 2
+
+
+def test_full_buffer_spills_size_bounded_segments(tmp_path):
+    writer = SpanSegmentWriter(tmp_path, segment_bytes=64)
+    agent = TelemetryAgent(buffer=SpanBuffer(capacity=8, writer=writer))
+    lines = [b'{"event_name": "infyfit.coach.card", "duration_ms": %d}' % i for i in range(20)]
+    result = agent.ingest_stream(lines + [b"", b'{"event_name": "bad", "duration_ms": 1}'])
+    assert (result.accepted, result.rejected) == (20, 1)
+
+    segments = sorted(tmp_path.iterdir())
+    assert len(agent.buffer) == 4 and agent.buffer.segments_written == len(segments)
+    assert all(path.stat().st_size <= 64 for path in segments)
+    spilled = [value for path in segments for value in read_segment(path)[2]]
+    assert spilled == [float(i) for i in range(16)]
+    assert read_segment(segments[0])[0] == ["infyfit.coach.card"]
+
+
+def test_segment_numbering_survives_deleted_segments(tmp_path):
+    columns = (array("I", [0]), array("d", [1.0]), array("B", [1]))
+    (tmp_path / "spans-00000000.seg").write_bytes(b"old")
+    (tmp_path / "spans-00000001.seg").write_bytes(b"live")
+    (tmp_path / "spans-00000000.seg").unlink()
+
+    [path] = SpanSegmentWriter(tmp_path).write(["infyfit.coach.card"], *columns)
+    [other] = SpanSegmentWriter(tmp_path).write(["infyfit.coach.card"], *columns)
+    assert (tmp_path / "spans-00000001.seg").read_bytes() == b"live"
+    assert os.path.basename(path).startswith("spans-00000002-")
+    assert os.path.basename(other).startswith("spans-00000003-")
+    assert read_segment(path)[2] == array("d", [1.0])
@@ -0,0 +1,101 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from infyfit import create_app
+from infyfit.data_models import HealthAggregate, WorkoutPlanRequest
+from infyfit.services import ServiceContainer
+from infyfit.storage import HealthTimeSeries
+
+
+def test_windows_match_dictionary_reference_with_backfills():
+    rng = random.Random(1)
+    series, reference = HealthTimeSeries(), {}
+    start = date(2024, 1, 1)
+    for step in range(3000):
+        day = start + timedelta(days=rng.randrange(400))
+        aggregate = HealthAggregate(day, rng.randrange(20000), rng.choice(["good", "Poor"]), 30)
+        series.append("u", [aggregate])
+        reference[day] = aggregate
+        if step % 50 == 0:
+            last, days = start + timedelta(days=rng.randrange(420)), rng.randrange(1, 60)
+            expected = sorted(d for d in reference if last - timedelta(days=days - 1) <= d <= last)
+            window = series.window("u", last, days)
+            assert window.dates == expected
+            assert window.steps == [reference[d].steps for d in expected]
+            assert window.sleep_quality == [reference[d].sleep_quality.lower() for d in expected]
+    assert series.days("u") == len(reference)
+    assert series.window("nobody", start, 7).latest() is None
+
+
+def test_health_sync_route_feeds_planner_and_coach_context():
+    container = ServiceContainer.default()
+    today = date(2024, 5, 2)
+    container.workout_planner.today = lambda: today
+    client = TestClient(create_app(container))
+    aggregates = [
+        {"date": "2024-05-01", "steps": 4000, "sleep_quality": "good", "activity_minutes": 20},
+        {"date": "2024-05-02", "steps": 12000, "sleep_quality": "Poor", "activity_minutes": 75},
+    ]
+    response = client.post("/sync/health", json={"user_id": "ivy", "aggregates": aggregates})
+    assert response.status_code == 200 and response.json()["applied"] == 2
+
+    request = WorkoutPlanRequest("maintenance", 0.0, 0, "unknown", user_id="ivy")
+    synced = container.build_workout_plan(request)
+    explicit = container.workout_planner.build_plan(
+        WorkoutPlanRequest("maintenance", 0.0, 12000, "poor")
+    )
+    assert synced == explicit
+
+    card = client.post("/coach/card", json={"user_id": "ivy", "day": "2024-05-02"}).json()
+    expected = client.post(
+        "/coach/card", json={"day": "2024-05-02", "steps": 12000, "sleep_quality": "poor"}
+    ).json()
+    assert card == expected
+    assert card != client.post("/coach/card", json={"day": "2024-05-02"}).json()
+
+
+def test_sleep_vocabulary_is_fixed_and_rejected_uploads_touch_no_store():
+    container = ServiceContainer.default()
+    client = TestClient(create_app(container))
+    series = container.offline_sync.health_series
+    day = date(2024, 5, 2)
+
+    def aggregate(when, sleep):
+        return {"date": when, "steps": 1, "sleep_quality": sleep, "activity_minutes": 0}
+
+    for index in range(300):
+        body = {"user_id": "eve", "aggregates": [aggregate(day.isoformat(), f"label-{index}")]}
+        assert client.post("/sync/health", json=body).status_code == 200
+    body = {"user_id": "zoe", "aggregates": [aggregate(day.isoformat(), "Fair")]}
+    assert client.post("/sync/health", json=body).status_code == 200
+    assert series.window("zoe", day, 1).sleep_quality == ["fair"]
+    assert series.window("eve", day, 1).sleep_quality == ["other"]
+
+    far = aggregate("1800-01-01", "good")
+    response = client.post("/sync/health", json={"user_id": "zoe", "aggregates": [far]})
+    assert response.status_code == 400
+    assert [record.date for record in container.offline_sync.health_log.records("zoe")] == [day]
+    assert series.days("zoe") == 1
+
+
+def test_negative_values_are_rejected_before_either_store_changes():
+    container = ServiceContainer.default()
+    client = TestClient(create_app(container))
+    health_log, series = container.offline_sync.health_log, container.offline_sync.health_series
+    good = {"date": "2024-05-01", "steps": 10, "sleep_quality": "good", "activity_minutes": 5}
+    body = {"user_id": "a", "aggregates": [good]}
+    digests = client.post("/sync/health", json=body).json()["digests"]
+    before = health_log.records("a")
+
+    bad = {**good, "date": "2024-05-02", "steps": -5}
+    body = {"user_id": "a", "aggregates": [{**good, "steps": 11}, bad]}
+    assert client.post("/sync/health", json=body).status_code == 400
+    assert health_log.records("a") == before and series.days("a") == 1
+    assert health_log.stale_months("a", digests) == []
+    # The log rejects unencodable records on its own, without a series in front of it.
+    with pytest.raises(ValueError):
+        health_log.upsert("a", [HealthAggregate(date(2024, 5, 3), -1, "good", 0)])
+    assert health_log.records("a") == before
@@ -0,0 +1,121 @@
+import threading
+
+from infyfit.agents import OfflineSyncAgent
+from infyfit.agents.offline_sync import SyncStore
+from infyfit.data_models import OfflineSyncRequest, SyncOperation
+from infyfit.storage import WriteAheadLog
+
+
+def test_group_commit_shares_fsyncs_between_writers(tmp_path):
+    wal = WriteAheadLog(tmp_path, segment_bytes=4096)
+    threads = [
+        threading.Thread(target=lambda: [wal.append(b"x" * 64) for _ in range(50)])
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wal.appends == 400 and wal.last_lsn == 400
+    assert wal.commits <= wal.appends
+    assert wal.segment_count > 1
+    assert [lsn for lsn, _ in wal.records()] == list(range(1, 401))
+
+
+def test_torn_tail_is_truncated_on_open(tmp_path):
+    wal = WriteAheadLog(tmp_path, fsync=False)
+    wal.append_many([b"first", b"second"])
+    wal.close()
+    (segment,) = tmp_path.glob("wal-*.log")
+    segment.write_bytes(segment.read_bytes()[:-3])
+
+    reopened = WriteAheadLog(tmp_path, fsync=False)
+    assert [payload for _, payload in reopened.records()] == [b"first"]
+    assert reopened.append(b"third") == 2
+
+
+def test_checkpoint_compacts_and_bounds_replay(tmp_path):
+    wal = WriteAheadLog(tmp_path, segment_bytes=256, fsync=False)
+    for index in range(40):
+        wal.append(b"record-%d" % index)
+    before = wal.segment_count
+    wal.checkpoint(b"state@30", lsn=30)
+    assert wal.segment_count < before
+    wal.close()
+
+    state, records = WriteAheadLog(tmp_path, fsync=False).replay()
+    assert state == b"state@30"
+    assert [lsn for lsn, _ in records] == list(range(31, 41))
+
+
+def test_sync_store_recovers_from_checkpoint_and_log(tmp_path):
+    store = SyncStore.open(tmp_path, fsync=False)
+    store.CHECKPOINT_RECORDS = 3
+    agent = OfflineSyncAgent(store=store)
+    for batch in range(5):
+        operations = [
+            SyncOperation(op_id=f"{batch}-{i}", entity="meal", key=f"m{i}", payload={"v": batch})
+            for i in range(4)
+        ]
+        result = agent.flush(OfflineSyncRequest(queue_size=0, user_id="u1", operations=operations))
+        assert result.flushed and result.batches_uploaded == 1
+    store.wal.close()
+
+    recovered = SyncStore.open(tmp_path, fsync=False)
+    assert recovered.wal.checkpoint_lsn >= 3
+    assert recovered.entities("u1") == {("meal", f"m{i}"): {"v": 4} for i in range(4)}
+    assert recovered.is_applied("u1", "0-0") and recovered.is_applied("u1", "4-3")
+
+
+def test_concurrent_checkpoints_never_move_backwards(tmp_path):
+    wal = WriteAheadLog(tmp_path, segment_bytes=128, fsync=False)
+    for index in range(120):
+        wal.append(b"record-%d" % index)
+    barrier = threading.Barrier(8)
+
+    def checkpoint(lsn):
+        barrier.wait()
+        return wal.checkpoint(b"state@%d" % lsn, lsn)
+
+    threads = [threading.Thread(target=checkpoint, args=(lsn,)) for lsn in range(50, 130, 10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wal.checkpoint_lsn == 120
+    assert not wal.checkpoint(b"state@100", 100)
+    wal.close()
+    state, records = WriteAheadLog(tmp_path, fsync=False).replay()
+    assert state == b"state@120" and list(records) == []
+    assert not any(path.suffix == ".tmp" for path in tmp_path.iterdir())
+
+
+def test_sync_store_survives_concurrent_flush_checkpoints(tmp_path):
+    store = SyncStore.open(tmp_path, fsync=False)
+    store.CHECKPOINT_RECORDS = 5
+    agent = OfflineSyncAgent(store=store)
+    errors = []
+
+    def flush(worker):
+        try:
+            for batch in range(60):
+                operation = SyncOperation(
+                    op_id=f"{worker}-{batch}", entity="meal", key="m", payload={"v": batch}
+                )
+                request = OfflineSyncRequest(
+                    queue_size=0, user_id=f"u{worker}", operations=[operation]
+                )
+                agent.flush(request)
+        except Exception as exc:  # surfaced below; a thread cannot fail the test itself
+            errors.append(exc)
+
+    threads = [threading.Thread(target=flush, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    store.wal.close()
+    recovered = SyncStore.open(tmp_path, fsync=False)
+    for worker in range(8):
+        assert recovered.entities(f"u{worker}") == {("meal", "m"): {"v": 59}}
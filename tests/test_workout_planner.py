@@ -0,0 +1,20 @@
+import itertools
+
+from infyfit.agents import WorkoutPlannerAgent
+from infyfit.data_models import WorkoutPlanRequest
+
+
+def test_table_and_batch_paths_match_exact_plans():
+    agent = WorkoutPlannerAgent()
+    requests = [
+        WorkoutPlanRequest(goal=goal, recent_intake=intake, steps_today=steps, sleep_quality=sleep)
+        for goal, sleep, steps, intake in itertools.product(
+            ["weight_loss", "Muscle_Gain", "maintenance", "unknown-goal"],
+            ["poor", "FAIR", "good"],
+            [0, 10_000, 10_001],
+            [0, 1800, 2000, 2250, 2500.0, 3000, 10_000, 10_500, 2700.5],
+        )
+    ]
+    exact = [agent._build_exact(request) for request in requests]
+    assert [agent.build_plan(request) for request in requests] == exact
+    assert agent.build_plans(requests) == exact